@@ -0,0 +1,123 @@
+from copy import copy
+from functools import lru_cache
+from time import time_ns
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+
+from api.tokens import EPOCH_CLAIM
+from reviews.versions import get_cache
+from users.models import RoleMixin, User
+
+AUTH_STATE_KEY = "auth-state:{}"
+# Эпоха удалённого или заблокированного пользователя: с ней не
+# совпадает ни один токен.
+REVOKED_EPOCH = -1
+USER_ROW_CACHE_SIZE = 256
+# Сколько секунд процесс доверяет эпохе из кэша, не перечитывая её из БД.
+AUTH_STATE_TIMEOUT = 30
+
+
+def auth_state_key(user_id):
+    return AUTH_STATE_KEY.format(user_id)
+
+
+def get_auth_state(user_id):
+    """
+    Эпоха токенов и версия строки пользователя.
+
+    Эпоха берётся из БД (``User.token_epoch``) и кэшируется на
+    ``AUTH_STATE_TIMEOUT`` секунд; у удалённого или заблокированного
+    пользователя она отозвана (``REVOKED_EPOCH``).
+    """
+    cache = get_cache()
+    key = auth_state_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        epoch, is_active = (
+            User.objects.filter(pk=user_id)
+            .values_list("token_epoch", "is_active")
+            .first()
+        ) or (None, False)
+        state = (epoch if is_active else REVOKED_EPOCH, time_ns())
+        cache.add(key, state, timeout=get_auth_state_timeout())
+        state = cache.get(key, state)
+    return state
+
+
+def get_auth_state_timeout():
+    return getattr(settings, "AUTH_STATE_TIMEOUT", AUTH_STATE_TIMEOUT)
+
+
+def refresh_auth_state(user):
+    """
+    Сбрасывает состояние пользователя в кэше после фиксации транзакции.
+
+    Следующий запрос перечитает эпоху из БД и получит новую версию
+    строки: токены с устаревшей ролью или удалённого пользователя
+    отклоняются, а закэшированные процессами строки перечитываются.
+    """
+    key = auth_state_key(user.pk)
+    transaction.on_commit(lambda: get_cache().delete(key))
+
+
+@lru_cache(maxsize=USER_ROW_CACHE_SIZE)
+def load_user_row(user_id, version):
+    return User.objects.get(pk=user_id)
+
+
+class ClaimsUser(RoleMixin, TokenUser):
+    """
+    Пользователь, восстановленный из клеймов токена.
+
+    Роль и ``is_superuser`` берутся из токена, проверки роли — общие с
+    моделью (``RoleMixin``). Строка из БД загружается только по
+    требованию — через ``get_user_row``.
+    """
+
+    row_version = None
+
+    def __str__(self):
+        return f"ClaimsUser {self.id}"
+
+
+def get_user_row(user):
+    """
+    Модель пользователя запроса.
+
+    Для ``ClaimsUser`` строка берётся из LRU-кэша процесса по версии из
+    общего кэша, так что повторные запросы одного пользователя не ходят в
+    БД, пока его строка не изменилась. Каждый запрос получает свою копию:
+    изменения в ней не попадают в кэш.
+    """
+    if isinstance(user, ClaimsUser):
+        return copy(load_user_row(user.pk, user.row_version))
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация без загрузки пользователя на каждый запрос.
+
+    Пользователь строится из клеймов ``RoleAccessToken``; из общего кэша
+    читается только эпоха токенов, чтобы отклонять токены, выданные до
+    смены роли, блокировки или удаления пользователя. Токены без клейма
+    эпохи проверяются по БД, как раньше.
+    """
+
+    def get_user(self, validated_token):
+        if EPOCH_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        user = ClaimsUser(validated_token)
+        epoch, version = get_auth_state(user.pk)
+        if validated_token[EPOCH_CLAIM] != epoch:
+            raise AuthenticationFailed(
+                "Токен отозван: роль или статус пользователя изменились. "
+                "Получите новый токен.",
+                code="token_revoked",
+            )
+        user.row_version = version
+        return user
@@ -0,0 +1,110 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from reviews.versions import get_cache, get_model_state
+
+DEFAULT_RESPONSE_CACHE_TIMEOUT = 60 * 60
+CONDITIONAL_METHODS = ("GET", "HEAD")
+
+
+class CachedResponseMixin:
+    """Условные GET-запросы и кэширование ответов для анонимных клиентов."""
+
+    cache_models = ()
+
+    def get_cache_models(self):
+        return self.cache_models or (self.queryset.model,)
+
+    def is_response_cacheable(self, request):
+        return request.method == "GET" and not request.user.is_authenticated
+
+    def get_request_digest(self, request):
+        query = sorted(
+            (key, sorted(values))
+            for key, values in request.query_params.lists()
+        )
+        return md5(
+            f"{request.path}?{query}".encode(), usedforsecurity=False
+        ).hexdigest()
+
+    def get_response_cache_key(self, request, versions):
+        versions = ".".join(map(str, versions))
+        return (
+            f"response:{self.__class__.__name__}:{self.action}:"
+            f"{versions}:{self.get_request_digest(request)}"
+        )
+
+    def get_etag(self, request, versions):
+        # Формат ответа входит в ETag: JSON и страница browsable API
+        # по одному адресу — разные представления.
+        return quote_etag(
+            md5(
+                f"{self.__class__.__name__}:{self.action}:{versions}:"
+                f"{request.accepted_renderer.format}:"
+                f"{self.get_request_digest(request)}".encode(),
+                usedforsecurity=False,
+            ).hexdigest()
+        )
+
+    def set_validators(self, response, etag, last_modified):
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.method not in CONDITIONAL_METHODS:
+            return handler(request, *args, **kwargs)
+
+        versions, last_modified = get_model_state(*self.get_cache_models())
+        etag = self.get_etag(request, versions)
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return self.set_validators(not_modified, etag, last_modified)
+
+        if not self.is_response_cacheable(request):
+            response = handler(request, *args, **kwargs)
+        else:
+            response = self.cached_handler(
+                handler, request, versions, *args, **kwargs
+            )
+        if response.status_code == status.HTTP_200_OK:
+            self.set_validators(response, etag, last_modified)
+        return response
+
+    def cached_handler(self, handler, request, versions, *args, **kwargs):
+        cache = get_cache()
+        key = self.get_response_cache_key(request, versions)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(
+                key,
+                response.data,
+                getattr(
+                    settings,
+                    "API_RESPONSE_CACHE_TIMEOUT",
+                    DEFAULT_RESPONSE_CACHE_TIMEOUT,
+                ),
+            )
+            response["X-Cache"] = "MISS"
+        return response
+
+
+class CachedListMixin(CachedResponseMixin):
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,93 @@
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+from django.db import connections, router
+from rest_framework.settings import api_settings
+
+from api.authentication import ClaimsJWTAuthentication
+from reviews.models import Change
+from reviews.versions import get_cache
+
+
+@register(Tags.caches, deploy=True)
+def check_auth_state_cache(app_configs, **kwargs):
+    """
+    Аутентификация по клеймам требует общего кэша.
+
+    С кэшем, локальным для процесса, смена роли и удаление пользователя
+    видны другим процессам только через ``AUTH_STATE_TIMEOUT`` секунд.
+    Для разработки с одним процессом это неважно, поэтому проверка
+    выполняется только в ``check --deploy``.
+    """
+    if (
+        ClaimsJWTAuthentication
+        not in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ):
+        return []
+    if not isinstance(get_cache(), LocMemCache):
+        return []
+    return [
+        Warning(
+            "Кэш для состояния токенов локален для процесса: смена роли "
+            "и удаление пользователя дойдут до других процессов не сразу, "
+            "а через AUTH_STATE_TIMEOUT секунд.",
+            hint=(
+                "Для нескольких процессов укажите в API_CACHE_ALIAS общий "
+                "кэш (Redis, Memcached) или уменьшите AUTH_STATE_TIMEOUT."
+            ),
+            id="api.W001",
+        )
+    ]
+
+
+@register(Tags.caches, deploy=True)
+def check_response_cache(app_configs, **kwargs):
+    """
+    Версии моделей для кэша ответов и ETag должны быть общими.
+
+    С кэшем, локальным для процесса, запись поднимает версии только в
+    обработавшем её процессе, а остальные отдают свои закэшированные
+    ответы и ``304`` до ``API_RESPONSE_CACHE_TIMEOUT`` секунд. Проверка
+    выполняется в ``check --deploy``, как и ``api.W001``.
+    """
+    if not isinstance(get_cache(), LocMemCache):
+        return []
+    return [
+        Warning(
+            "Кэш ответов и версий моделей локален для процесса: после "
+            "записи другие процессы отдают устаревшие анонимные ответы "
+            "до API_RESPONSE_CACHE_TIMEOUT секунд.",
+            hint=(
+                "Для нескольких процессов укажите в API_CACHE_ALIAS общий "
+                "кэш (Redis, Memcached) или уменьшите "
+                "API_RESPONSE_CACHE_TIMEOUT."
+            ),
+            id="api.W003",
+        )
+    ]
+
+
+@register(Tags.compatibility)
+def check_change_feed_database(app_configs, **kwargs):
+    """
+    Курсор ленты изменений полагается на порядок записи в SQLite.
+
+    Там пишущие транзакции выполняются по одной, и ``id`` записей журнала
+    становятся видимыми по возрастанию. В БД с параллельными пишущими
+    транзакциями запись с меньшим ``id`` может зафиксироваться позже
+    записи с большим, и потребитель с курсором её пропустит.
+    """
+    alias = router.db_for_write(Change)
+    if connections[alias].vendor == "sqlite":
+        return []
+    return [
+        Warning(
+            "Лента изменений читается по курсору на id, который монотонен "
+            "по времени фиксации только в SQLite: записи долгих "
+            "транзакций могут быть пропущены.",
+            hint=(
+                "Храните журнал изменений в SQLite или перечитывайте "
+                "ленту с запасом от последнего курсора."
+            ),
+            id="api.W002",
+        )
+    ]
@@ -0,0 +1,93 @@
+import json
+
+from django.db.models import F
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from api.serializers import CommentSerializer, ReviewSerializer
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+EXPORT_CHUNK_SIZE = 1000
+
+
+def ndjson_line(data):
+    return (
+        json.dumps(data, cls=JSONEncoder, ensure_ascii=False) + "\n"
+    ).encode()
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Рендерер для выгрузки NDJSON.
+
+    Сама выгрузка отдаётся потоком мимо рендерера, а через него проходят
+    только ошибки: объект ответа становится одной строкой JSON.
+    """
+
+    media_type = NDJSON_CONTENT_TYPE
+    format = "ndjson"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return ndjson_line(data)
+
+
+def export_review_lines(reviews, comments=None, chunk_size=None):
+    """
+    Строки NDJSON с отзывами и, если передан ``comments``, комментариями.
+
+    Отзывы идут в порядке списка API (``-pub_date, id``), комментарии —
+    в том же порядке их отзывов, а внутри отзыва тоже от новых к старым.
+    Оба набора читаются через ``iterator()`` по индексам (комментарии
+    досортировываются не дальше одного отзыва) и сливаются в один поток
+    без загрузки в память: после строки отзыва идут строки его
+    комментариев. Комментарии отзывов, которых нет в ``reviews``,
+    пропускаются.
+    """
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    review_serializer = ReviewSerializer()
+    reviews = reviews.order_by("-pub_date", "id").iterator(chunk_size)
+    if comments is None:
+        for review in reviews:
+            yield review_line(review_serializer, review)
+        return
+
+    comment_serializer = CommentSerializer()
+    comments = (
+        comments.annotate(review_pub_date=F("review__pub_date"))
+        .order_by("-review__pub_date", "review__id", "-pub_date", "id")
+        .iterator(chunk_size)
+    )
+    comment = next(comments, None)
+    for review in reviews:
+        yield review_line(review_serializer, review)
+        while comment is not None and not_after(comment, review):
+            if comment.review_id == review.pk:
+                yield ndjson_line(
+                    {
+                        "type": "comment",
+                        "review": review.pk,
+                        **comment_serializer.to_representation(comment),
+                    }
+                )
+            comment = next(comments, None)
+
+
+def not_after(comment, review):
+    """Отзыв комментария идёт в потоке не позже ``review``."""
+    return comment.review_pub_date > review.pub_date or (
+        comment.review_pub_date == review.pub_date
+        and comment.review_id <= review.pk
+    )
+
+
+def review_line(serializer, review):
+    return ndjson_line(
+        {
+            "type": "review",
+            "title": review.title_id,
+            **serializer.to_representation(review),
+        }
+    )
@@ -0,0 +1,124 @@
+from django.db.models import Prefetch
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+class SparseFieldsMixin:
+    """
+    Выбор полей ответа параметрами ``?fields=`` и ``?omit=``.
+
+    Параметры принимают имена полей через запятую. Невыбранные связи не
+    попадают в select_related и prefetch_related, а столбцы модели
+    подгружаются через ``only()``, поэтому ответ становится меньше не
+    только по объёму, но и по запросам к БД. Имена полей сериализатора
+    должны совпадать с полями модели.
+    """
+
+    fields_query_param = "fields"
+    omit_query_param = "omit"
+    sparse_fields_serializer_class = None
+    unknown_fields_message = "Неизвестные поля: {}."
+
+    def get_sparse_fields_serializer_class(self):
+        return (
+            self.sparse_fields_serializer_class or self.get_serializer_class()
+        )
+
+    def get_sparse_fields(self):
+        """Множество выбранных полей или None, если выбор не задан."""
+        if not hasattr(self, "_sparse_fields"):
+            self._sparse_fields = self.parse_sparse_fields()
+        return self._sparse_fields
+
+    def parse_sparse_fields(self):
+        if self.request.method not in SAFE_METHODS:
+            return None
+        params = self.request.query_params
+        fields = self.split_fields(params.get(self.fields_query_param))
+        omit = self.split_fields(params.get(self.omit_query_param))
+        if not fields and not omit:
+            return None
+
+        available = set(self.get_sparse_fields_serializer_class()().fields)
+        for param, names in (
+            (self.fields_query_param, fields),
+            (self.omit_query_param, omit),
+        ):
+            unknown = names - available
+            if unknown:
+                raise ValidationError(
+                    {
+                        param: self.unknown_fields_message.format(
+                            ", ".join(sorted(unknown))
+                        )
+                    }
+                )
+        return (fields or available) - omit
+
+    @staticmethod
+    def split_fields(value):
+        if not value:
+            return set()
+        return {name.strip() for name in value.split(",") if name.strip()}
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["sparse_fields"] = self.get_sparse_fields()
+        return context
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+        # Поля, по которым можно сортировать, нужны курсору при любом
+        # выбранном порядке.
+        ordering = [*getattr(self, "cursor_ordering", ())]
+        ordering_fields = getattr(self, "ordering_fields", None)
+        if isinstance(ordering_fields, (list, tuple)):
+            ordering.extend(ordering_fields)
+        return sparse_queryset(queryset, fields, ordering)
+
+
+def sparse_queryset(queryset, fields, ordering=()):
+    """
+    Урезает выборку до полей ``fields``.
+
+    Связи, которых нет среди полей, убираются из select_related и
+    prefetch_related, остальные столбцы откладываются. Первичный ключ и
+    поля ``ordering`` загружаются всегда: по ним строится курсор.
+    """
+    select_related = queryset.query.select_related
+    if isinstance(select_related, dict):
+        kept = [name for name in select_related if name in fields]
+        queryset = queryset.select_related(None)
+        if kept:
+            queryset = queryset.select_related(*kept)
+    lookups = queryset._prefetch_related_lookups
+    if lookups:
+        queryset = queryset.prefetch_related(None).prefetch_related(
+            *(lookup for lookup in lookups if _lookup_root(lookup) in fields)
+        )
+
+    opts = queryset.model._meta
+    columns = {opts.pk.name}
+    columns.update(name.lstrip("-") for name in ordering)
+    columns.update(
+        field.name for field in opts.concrete_fields if field.name in fields
+    )
+    # Ограничения only() для оставленных связей (например,
+    # ``author__username``) сохраняются.
+    immediate, defer = queryset.query.deferred_loading
+    if not defer:
+        columns.update(
+            name
+            for name in immediate
+            if "__" in name and name.split("__")[0] in fields
+        )
+    return queryset.only(*columns)
+
+
+def _lookup_root(lookup):
+    if isinstance(lookup, Prefetch):
+        lookup = lookup.prefetch_to
+    return lookup.split("__")[0]
@@ -1,13 +1,62 @@
 from django_filters import rest_framework as filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter, SearchFilter
 
 from reviews.models import Title
+from reviews.search import search_titles
+from users.search import search_users
 
 
 class TitleFilter(filters.FilterSet):
     name = filters.CharFilter(field_name="name", lookup_expr="icontains")
     genre = filters.CharFilter(field_name="genre__slug")
     category = filters.CharFilter(field_name="category__slug")
+    q = filters.CharFilter(method="filter_search")
 
     class Meta:
         model = Title
-        fields = ("genre", "category", "year", "name")
+        fields = ("genre", "category", "year", "name", "q")
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
+
+
+class StableOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter с однозначным порядком для пагинации курсором.
+
+    К выбранному порядку добавляется ``id``, а итог сохраняется во
+    ``view.cursor_ordering``, чтобы курсор строился по тем же полям.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view) or ())
+        if not {"id", "-id"} & set(ordering):
+            ordering.append("id")
+        view.cursor_ordering = tuple(ordering)
+        return ordering
+
+
+class UserSearchFilter(SearchFilter):
+    """
+    Поиск пользователей по ``?search=``.
+
+    По умолчанию ищет по началу username или email без учёта регистра,
+    по функциональным индексам (см. ``users.search``). Поиск по
+    подстроке, который просматривает всю таблицу, включается явно:
+    ``?search_mode=contains``.
+    """
+
+    mode_param = "search_mode"
+    PREFIX = "prefix"
+    CONTAINS = "contains"
+    invalid_mode_message = "Допустимые значения: prefix, contains."
+
+    def filter_queryset(self, request, queryset, view):
+        mode = request.query_params.get(self.mode_param, self.PREFIX)
+        if mode == self.CONTAINS:
+            return super().filter_queryset(request, queryset, view)
+        if mode != self.PREFIX:
+            raise ValidationError({self.mode_param: self.invalid_mode_message})
+        text = request.query_params.get(self.search_param, "")
+        return search_users(queryset, text.replace("\x00", ""))
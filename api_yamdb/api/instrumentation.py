@@ -0,0 +1,216 @@
+import json
+import logging
+import random
+import re
+import sys
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.fields import Field
+
+logger = logging.getLogger("api.queries")
+
+# Списки параметров IN (%s, %s, ...) разной длины — одна форма запроса.
+PLACEHOLDER_LIST = re.compile(r"%s(?:, %s)+")
+
+QUERY_PROFILE_SAMPLE_RATE = 0.0
+QUERY_PROFILE_BUDGET = 20
+
+
+def query_shape(sql):
+    """Текст запроса без значений: по нему ищутся повторы."""
+    return PLACEHOLDER_LIST.sub("%s", sql)
+
+
+def serializer_field_origin():
+    """
+    Поле сериализатора, из которого выполняется запрос.
+
+    Ищется ближайший по стеку кадр метода поля DRF: для связи, которую
+    не подгрузили заранее, это поле вроде ``ReviewSerializer.author``.
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        field = frame.f_locals.get("self")
+        if isinstance(field, Field):
+            parent = getattr(field, "parent", None)
+            if field.field_name and parent is not None:
+                return f"{type(parent).__name__}.{field.field_name}"
+            return type(field).__name__
+        frame = frame.f_back
+    return None
+
+
+class QueryProfile:
+    """
+    Статистика запросов к БД: число, суммарное время, самые медленные
+    запросы и повторы одной формы SELECT (признак N+1).
+
+    Объект подключается к соединениям как ``execute_wrapper``, поэтому
+    работает и при ``DEBUG = False``. Для повторяющихся запросов
+    запоминается поле сериализатора, из которого они выполнялись.
+    """
+
+    def __init__(self, slowest=3, repeat_threshold=2):
+        self.slowest_limit = slowest
+        self.repeat_threshold = repeat_threshold
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = []
+        self.shapes = Counter()
+        self.origins = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, perf_counter() - start)
+
+    def record(self, sql, duration):
+        self.count += 1
+        self.duration += duration
+        self.slowest.append((duration, sql))
+        if len(self.slowest) > self.slowest_limit:
+            self.slowest.remove(min(self.slowest))
+        if not sql.lstrip().upper().startswith("SELECT"):
+            return
+        shape = query_shape(sql)
+        self.shapes[shape] += 1
+        # Стек разбирается только для повторов: первый запрос формы
+        # обычный, а источник у повторов тот же.
+        if self.shapes[shape] == 2:
+            self.origins[shape] = serializer_field_origin()
+
+    @property
+    def repeated(self):
+        """Формы SELECT, выполненные не меньше ``repeat_threshold`` раз."""
+        return [
+            {
+                "sql": shape,
+                "count": count,
+                "origin": self.origins.get(shape),
+            }
+            for shape, count in self.shapes.most_common()
+            if count >= self.repeat_threshold
+        ]
+
+    def as_dict(self):
+        return {
+            "queries": self.count,
+            "db_time_ms": round(self.duration * 1000, 2),
+            "slowest": [
+                {"sql": sql, "ms": round(duration * 1000, 2)}
+                for duration, sql in sorted(self.slowest, reverse=True)
+            ],
+            "repeated": self.repeated,
+        }
+
+    def report(self):
+        """Текстовый отчёт для сообщений об ошибках в тестах."""
+        lines = [
+            f"Запросов к БД: {self.count}, "
+            f"время: {self.duration * 1000:.1f} мс"
+        ]
+        for item in self.repeated:
+            origin = item["origin"] or "источник не найден"
+            lines.append(f"N+1 ({item['count']} раз, {origin}): {item['sql']}")
+        for duration, sql in sorted(self.slowest, reverse=True):
+            lines.append(f"{duration * 1000:.1f} мс: {sql}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def profile_queries(profile=None, **kwargs):
+    """
+    Собирает QueryProfile по всем соединениям внутри блока ``with``.
+
+    Переданный ``profile`` дополняется, иначе создаётся новый.
+    """
+    if profile is None:
+        profile = QueryProfile(**kwargs)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(profile))
+        yield profile
+
+
+class QueryProfileMiddleware:
+    """
+    Статистика запросов к БД по выборке HTTP-запросов.
+
+    Профилируется доля запросов ``QUERY_PROFILE_SAMPLE_RATE`` (0 —
+    выключено, 1 — все). Статистика пишется строкой JSON в логгер
+    ``api.queries``: WARNING, если найдены повторы, INFO, если запросов
+    больше ``QUERY_PROFILE_BUDGET``, и DEBUG в остальных случаях. У
+    потокового ответа учитываются и запросы, выполненные при чтении
+    тела, а строка пишется после его отправки.
+
+    В режиме DEBUG статистика отдаётся ещё и в заголовках
+    ``X-DB-Queries``, ``X-DB-Time`` (мс) и ``X-DB-Repeated`` (число форм
+    с повторами); у потокового ответа — без запросов из тела, которое
+    отправляется после заголовков.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = getattr(
+            settings, "QUERY_PROFILE_SAMPLE_RATE", QUERY_PROFILE_SAMPLE_RATE
+        )
+        if random.random() >= rate:
+            return self.get_response(request)
+        with profile_queries() as profile:
+            response = self.get_response(request)
+        if settings.DEBUG:
+            response["X-DB-Queries"] = profile.count
+            response["X-DB-Time"] = f"{profile.duration * 1000:.2f}"
+            response["X-DB-Repeated"] = len(profile.repeated)
+        if response.streaming and not response.is_async:
+            response.streaming_content = self.profile_stream(
+                request, response, profile, response.streaming_content
+            )
+        else:
+            self.log(request, response, profile)
+        return response
+
+    def profile_stream(self, request, response, profile, content):
+        content = iter(content)
+        try:
+            while True:
+                with profile_queries(profile):
+                    chunk = next(content, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            self.log(request, response, profile)
+
+    def log(self, request, response, profile):
+        budget = getattr(
+            settings, "QUERY_PROFILE_BUDGET", QUERY_PROFILE_BUDGET
+        )
+        if profile.repeated:
+            level = logging.WARNING
+        elif profile.count > budget:
+            level = logging.INFO
+        else:
+            level = logging.DEBUG
+        if not logger.isEnabledFor(level):
+            return
+        logger.log(
+            level,
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    **profile.as_dict(),
+                },
+                ensure_ascii=False,
+            ),
+        )
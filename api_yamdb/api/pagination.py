@@ -1,17 +1,374 @@
-from rest_framework.pagination import LimitOffsetPagination
-from rest_framework.response import Response
-
-
-class StandardResultsSetPagination(LimitOffsetPagination):
-    default_limit = 5
-
-    def get_paginated_response(self, data):
-
-        return Response(
-            {
-                "count": self.count,
-                "next": self.get_next_link(),
-                "previous": self.get_previous_link(),
-                "results": data,
-            }
-        )
+import datetime as dt
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+from hashlib import md5
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import DatabaseError, connection
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from reviews.versions import get_cache, get_model_versions
+
+OFFSET_MODE = "offset"
+CURSOR_MODE = "cursor"
+ESTIMATED_COUNT = "estimated"
+
+
+class StandardResultsSetPagination(LimitOffsetPagination):
+    """
+    Пагинация limit/offset с опциональным режимом курсора (keyset).
+
+    Режим курсора включается параметром ``?pagination=cursor``, наличием
+    ``?cursor=`` в запросе или атрибутом ``pagination_mode = "cursor"``
+    у вьюсета. Страницы выбираются условием по полям
+    ``view.cursor_ordering`` вместо OFFSET и без COUNT(*), поэтому любая
+    страница стоит столько же, сколько первая. Ключ ``count`` в этом
+    режиме равен ``None``.
+
+    В режиме limit/offset число объектов кэшируется по вьюсету и
+    параметрам фильтрации, а ключ включает версии моделей из
+    ``view.cache_models``, так что любая запись сбрасывает его. Для
+    нефильтрованных списков клиент может запросить ``?count=estimated``:
+    тогда для больших таблиц число берётся из статистики БД. Ключ
+    ``count_exact`` в ответе сообщает, точное ли число.
+    """
+
+    default_limit = 5
+    mode_query_param = "pagination"
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    cursor_ordering = ("id",)
+    invalid_cursor_message = "Неверный курсор."
+    count_cache_timeout = 60 * 60
+    estimated_count_threshold = 100_000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.mode = self.get_mode(request, view)
+        if self.mode == OFFSET_MODE:
+            return self.paginate_offset(queryset, request, view)
+        return self.paginate_keyset(queryset, request, view)
+
+    def get_mode(self, request, view):
+        mode = request.query_params.get(self.mode_query_param)
+        if mode in (OFFSET_MODE, CURSOR_MODE):
+            return mode
+        if self.cursor_query_param in request.query_params:
+            return CURSOR_MODE
+        return getattr(view, "pagination_mode", OFFSET_MODE)
+
+    def paginate_offset(self, queryset, request, view):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        self.count, self.count_exact = self.get_count_info(
+            queryset, request, view
+        )
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+        # Следующая страница определяется по лишней строке, а не по count,
+        # который в оценочном режиме может быть неточным.
+        start, end = self.offset, self.offset + self.limit + 1
+        results = list(queryset[start:end])
+        self.has_next = len(results) > self.limit
+        return results[: self.limit]
+
+    def get_count_info(self, queryset, request, view):
+        key = self.get_count_cache_key(queryset, request, view)
+        cached = get_cache().get(key)
+        if cached is not None:
+            return cached
+
+        count, exact = None, True
+        if self.is_estimate_allowed(queryset, request, view):
+            estimate = estimate_table_rows(queryset.model)
+            if (
+                estimate is not None
+                and estimate >= self.estimated_count_threshold
+            ):
+                count, exact = estimate, False
+        if count is None:
+            count = self.get_count(queryset)
+        get_cache().set(key, (count, exact), self.count_cache_timeout)
+        return count, exact
+
+    def is_estimate_allowed(self, queryset, request, view):
+        mode = request.query_params.get(self.count_query_param)
+        return mode == ESTIMATED_COUNT and not queryset.query.where
+
+    def get_count_cache_key(self, queryset, request, view):
+        models = getattr(view, "cache_models", None) or (queryset.model,)
+        ignored = {
+            self.limit_query_param,
+            self.offset_query_param,
+            self.mode_query_param,
+            self.cursor_query_param,
+        }
+        params = sorted(
+            (key, sorted(values))
+            for key, values in request.query_params.lists()
+            if key not in ignored
+        )
+        kwargs = sorted(getattr(view, "kwargs", {}).items())
+        digest = md5(
+            json.dumps([params, kwargs], default=str).encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+        versions = ".".join(map(str, get_model_versions(*models)))
+        return f"count:{view.__class__.__name__}:{versions}:{digest}"
+
+    def paginate_keyset(self, queryset, request, view):
+        self.request = request
+        self.count = None
+        self.count_exact = None
+        self.limit = self.get_limit(request)
+        self.ordering = tuple(
+            getattr(view, "cursor_ordering", self.cursor_ordering)
+        )
+        self.base_url = request.build_absolute_uri()
+        position, reverse = self.decode_cursor(request, queryset)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(invert_order(field) for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(keyset_filter(ordering, position))
+
+        results = list(queryset[: self.limit + 1])
+        has_more = len(results) > self.limit
+        results = results[: self.limit]
+        if reverse:
+            results.reverse()
+
+        self.next_position = self.previous_position = None
+        if results:
+            if has_more or reverse:
+                self.next_position = self.get_position(results[-1])
+            if position is not None and (has_more or not reverse):
+                self.previous_position = self.get_position(results[0])
+        return results
+
+    def get_position(self, obj):
+        return [getattr(obj, field.lstrip("-")) for field in self.ordering]
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps(
+            {"p": position, "r": reverse},
+            default=encode_position_value,
+            separators=(",", ":"),
+        )
+        cursor = b64encode(payload.encode()).decode()
+        url = remove_query_param(self.base_url, self.offset_query_param)
+        url = replace_query_param(url, self.mode_query_param, CURSOR_MODE)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, queryset):
+        """
+        Позиция и направление из ``?cursor=``.
+
+        Курсор приходит от клиента, поэтому каждое значение позиции
+        приводится к типу своего поля упорядочивания: испорченный курсор
+        даёт ответ 400, а не ошибку в запросе к БД.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(b64decode(encoded.encode(), validate=True))
+            position, reverse = payload["p"], bool(payload["r"])
+            if not isinstance(position, list) or len(position) != len(
+                self.ordering
+            ):
+                raise ValueError
+            position = [
+                to_position_value(queryset, field, value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (
+            BinasciiError,
+            ValueError,
+            TypeError,
+            KeyError,
+            DjangoValidationError,
+        ):
+            raise ValidationError({"cursor": self.invalid_cursor_message})
+        return position, reverse
+
+    def get_next_link(self):
+        if self.mode == OFFSET_MODE:
+            if not self.has_next:
+                return None
+            url = self.request.build_absolute_uri()
+            url = replace_query_param(url, self.limit_query_param, self.limit)
+            return replace_query_param(
+                url, self.offset_query_param, self.offset + self.limit
+            )
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, False)
+
+    def get_previous_link(self):
+        if self.mode == OFFSET_MODE:
+            return super().get_previous_link()
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, True)
+
+    def get_paginated_response(self, data):
+
+        return Response(
+            {
+                "count": self.count,
+                "count_exact": self.count_exact,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+
+class ChangeFeedPagination(BasePagination):
+    """
+    Чтение журнала изменений пачками по возрастанию ``id``.
+
+    Курсор — ``id`` последней прочитанной записи: клиент передаёт его в
+    ``?after=`` и получает записи строго после него, условием по
+    первичному ключу без OFFSET и COUNT(*). В отличие от ``next`` обычной
+    пагинации курсор и ссылка ``next`` есть и на последней странице,
+    поэтому потребитель может сохранить курсор, опрашивать ``next`` и
+    продолжить чтение после перезапуска. ``has_more`` сообщает, что
+    записи после курсора уже есть.
+    """
+
+    after_query_param = "after"
+    limit_query_param = "limit"
+    default_limit = 100
+    max_limit = 1000
+    invalid_after_message = "Передайте id последней прочитанной записи."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        after = self.get_after(request)
+        limit = self.get_limit(request)
+        results = list(
+            queryset.filter(pk__gt=after).order_by("pk")[: limit + 1]
+        )
+        self.has_more = len(results) > limit
+        results = results[:limit]
+        self.cursor = results[-1].pk if results else after
+        return results
+
+    def get_after(self, request):
+        try:
+            after = int(request.query_params.get(self.after_query_param, 0))
+        except ValueError:
+            after = -1
+        if after < 0:
+            raise ValidationError(
+                {self.after_query_param: self.invalid_after_message}
+            )
+        return after
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        if limit <= 0:
+            return self.default_limit
+        return min(limit, self.max_limit)
+
+    def get_next_link(self):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.after_query_param, self.cursor)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "cursor": self.cursor,
+                "has_more": self.has_more,
+                "next": self.get_next_link(),
+                "results": data,
+            }
+        )
+
+
+def estimate_table_rows(model):
+    """
+    Оценка числа строк таблицы по статистике БД или None.
+
+    Для SQLite статистика появляется после ANALYZE, для PostgreSQL
+    берётся из pg_class.reltuples.
+    """
+    table = model._meta.db_table
+    if connection.vendor == "postgresql":
+        sql = "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass"
+    elif connection.vendor == "sqlite":
+        sql = "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1"
+    else:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    return estimate if estimate >= 0 else None
+
+
+def encode_position_value(value):
+    # DjangoJSONEncoder обрезает микросекунды, а позиция курсора должна
+    # совпадать со значением в БД точно.
+    if isinstance(value, (dt.datetime, dt.date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} нельзя сохранить в курсоре")
+
+
+def to_position_value(queryset, field, value):
+    """Значение позиции курсора, приведённое к типу поля или аннотации."""
+    if value is None:
+        raise ValueError("Позиция курсора не может быть пустой")
+    name = field.lstrip("-")
+    annotation = queryset.query.annotations.get(name)
+    try:
+        if annotation is not None:
+            model_field = annotation.output_field
+        else:
+            model_field = queryset.model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return value
+    value = model_field.to_python(value)
+    if value is None:
+        raise ValueError("Позиция курсора не может быть пустой")
+    return value
+
+
+def invert_order(field):
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+def keyset_filter(ordering, position):
+    """
+    Условие «строго после позиции» для упорядочивания по нескольким полям.
+
+    Для ``("name", "id")`` получается
+    ``name > a OR (name = a AND id > b)``.
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, position):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        condition |= equal & Q(**{f"{name}__{lookup}": value})
+        equal &= Q(**{name: value})
+    return condition
@@ -11,16 +11,38 @@ class IsAdminOrReadOnly(BasePermission):
 
 
 class IsAdminOrModeratorOrAuthor(BasePermission):
-    """Пермишн даёт доступ не для чтения автору, модератору и админу"""
+    """
+    Пермишн даёт доступ не для чтения автору, модератору и админу.
+
+    Автор сравнивается по ``author_id``, без загрузки связанного
+    пользователя.
+    """
 
     def has_object_permission(self, request, view, obj):
         return (
             request.method in SAFE_METHODS
-            or obj.author == request.user
-            or request.user.is_moderator
-            or request.user.is_admin
+            or self.can_moderate(request.user)
+            or obj.author_id == request.user.pk
         )
 
+    @staticmethod
+    def can_moderate(user):
+        return user.is_authenticated and (user.is_moderator or user.is_admin)
+
+    def filter_queryset(self, request, queryset):
+        """
+        Объекты, которые пользователь может изменять и удалять.
+
+        Для массовых операций: права на все объекты проверяются одним
+        условием в запросе, а не по одному объекту.
+        """
+        user = request.user
+        if not user.is_authenticated:
+            return queryset.none()
+        if self.can_moderate(user):
+            return queryset
+        return queryset.filter(author_id=user.pk)
+
 
 class IsAdmin(BasePermission):
     """Пермишн даёт доступ только админу"""
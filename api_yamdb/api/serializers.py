@@ -2,16 +2,24 @@ import datetime as dt
 import re
 
 from django.contrib.auth.tokens import default_token_generator
+from django.db import IntegrityError, transaction
+from django.db.models import Q, prefetch_related_objects
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from rest_framework.utils import html
 
+from reviews.changes import record_changes
 from reviews.constants import (
     EMAIL_MAX_LENGTH,
     FORBIDDEN_USERNAME,
+    MAX_ID,
+    MIN_ID,
     USERNAME_MAX_LENGTH,
     USERNAME_REGEX,
 )
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.models import Category, Change, Comment, Genre, Review, Title
+from reviews.versions import bump_model_version
 from users.models import User
 
 
@@ -28,22 +36,32 @@ class UsernameValidationMixin:
         return value
 
     def validate(self, data):
+        """
+        Email и username свободны или принадлежат одному пользователю.
+
+        Пользователи с таким email или username выбираются одним
+        запросом (их не больше двух), а исход определяется по ним.
+        """
         email = data.get("email")
         username = data.get("username")
+        if email is None and username is None:
+            return data
 
-        user_and_email = User.objects.filter(
-            email=email, username=username
-        ).exists()
+        matches = list(
+            User.objects.filter(
+                Q(email=email) | Q(username=username)
+            ).values_list("email", "username")[:2]
+        )
 
-        if user_and_email:
+        if (email, username) in matches:
             return data
 
-        if User.objects.filter(email=email).exists():
+        if any(match_email == email for match_email, _ in matches):
             raise serializers.ValidationError(
                 {"email": ["Пользователь с таким email уже зарегистрирован."]}
             )
 
-        if User.objects.filter(username=username).exists():
+        if any(match_username == username for _, match_username in matches):
             raise serializers.ValidationError(
                 {"username": ["Этот username уже занят."]}
             )
@@ -62,6 +80,8 @@ class GetTokenSerializer(serializers.Serializer):
             user, data["confirmation_code"]
         ):
             raise serializers.ValidationError("Неверный код подтверждения!")
+        if not user.is_active:
+            raise serializers.ValidationError("Пользователь заблокирован.")
 
         data["user"] = user
 
@@ -103,6 +123,27 @@ class SignUpSerializer(UsernameValidationMixin, serializers.Serializer):
     )
 
 
+class SparseFieldsSerializerMixin:
+    """
+    Оставляет в ответе только поля из ``context["sparse_fields"]``.
+
+    Выбор применяется к сериализатору верхнего уровня (или к элементу
+    списка), вложенные сериализаторы отдают свои поля целиком.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selected = self.context.get("sparse_fields")
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if selected is None or parent is not None:
+            return fields
+        return {
+            name: field for name, field in fields.items() if name in selected
+        }
+
+
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
@@ -115,7 +156,9 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ("name", "slug")
 
 
-class TitleReadSerializer(serializers.ModelSerializer):
+class TitleReadSerializer(
+    SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(many=True, read_only=True)
     rating = serializers.IntegerField(read_only=True, default=0)
@@ -133,12 +176,100 @@ class TitleReadSerializer(serializers.ModelSerializer):
         )
 
 
+class PreloadedSlugRelatedField(serializers.SlugRelatedField):
+    """
+    SlugRelatedField, который ищет объекты в заранее загруженном словаре.
+
+    Словарь ``{slug: объект}`` кладётся в контекст под ключом
+    ``related_by_slug[model]``; без него поле работает как обычно.
+    """
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get("related_by_slug", {})
+        objects = preloaded.get(self.get_queryset().model)
+        if objects is None:
+            return super().to_internal_value(data)
+        if not isinstance(data, str):
+            self.fail("invalid")
+        try:
+            return objects[data]
+        except KeyError:
+            self.fail("does_not_exist", slug_name=self.slug_field, value=data)
+
+
+def preload_related(items):
+    """
+    Категории и жанры элементов ``items`` по слагам: по запросу на модель.
+
+    Результат кладётся в контекст для ``PreloadedSlugRelatedField``.
+    """
+    category_slugs, genre_slugs = set(), set()
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        # Слагами считаются только строки: остальные значения отклонит
+        # PreloadedSlugRelatedField с ошибкой валидации.
+        category = item.get("category")
+        if isinstance(category, str):
+            category_slugs.add(category)
+        if html.is_html_input(item):
+            genres = item.getlist("genre")
+        else:
+            genres = item.get("genre")
+        if isinstance(genres, list):
+            genre_slugs.update(
+                genre for genre in genres if isinstance(genre, str)
+            )
+    return {
+        model: {obj.slug: obj for obj in model.objects.filter(slug__in=slugs)}
+        for model, slugs in (
+            (Category, category_slugs),
+            (Genre, genre_slugs),
+        )
+    }
+
+
+class TitleListSerializer(serializers.ListSerializer):
+    """
+    Массовое создание произведений.
+
+    Категории и жанры всех элементов загружаются двумя запросами до
+    валидации, а произведения и их связи с жанрами вставляются через
+    bulk_create. Ошибки возвращаются списком по элементам запроса.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.context["related_by_slug"] = preload_related(data)
+        return super().to_internal_value(data)
+
+    @transaction.atomic
+    def create(self, validated_data):
+        genres = [item.pop("genre") for item in validated_data]
+        titles = Title.objects.bulk_create(
+            Title(**item) for item in validated_data
+        )
+        TitleGenre = Title.genre.through
+        links = []
+        for title, title_genres in zip(titles, genres):
+            links.extend(
+                TitleGenre(title=title, genre=genre)
+                for genre in dict.fromkeys(title_genres)
+            )
+        TitleGenre.objects.bulk_create(links)
+        # Жанры всех созданных произведений для ответа одним запросом.
+        prefetch_related_objects(titles, "genre")
+        record_changes(titles, Change.CREATED)
+        bump_model_version(Title)
+        return titles
+
+
 class TitleWriteSerializer(serializers.ModelSerializer):
     year = serializers.IntegerField()
-    category = serializers.SlugRelatedField(
+    category = PreloadedSlugRelatedField(
         slug_field="slug", queryset=Category.objects.all()
     )
-    genre = serializers.SlugRelatedField(
+    genre = PreloadedSlugRelatedField(
         slug_field="slug",
         queryset=Genre.objects.all(),
         many=True,
@@ -147,6 +278,13 @@ class TitleWriteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Title
         fields = ("id", "name", "year", "description", "genre", "category")
+        list_serializer_class = TitleListSerializer
+
+    def to_internal_value(self, data):
+        # При массовом создании слаги уже загружены TitleListSerializer.
+        if "related_by_slug" not in self.context:
+            self.context["related_by_slug"] = preload_related([data])
+        return super().to_internal_value(data)
 
     def validate_year(self, value):
         if value > dt.date.today().year:
@@ -163,34 +301,61 @@ class TitleWriteSerializer(serializers.ModelSerializer):
         return value
 
     def to_representation(self, instance):
-        serializer = TitleReadSerializer(instance)
+        serializer = TitleReadSerializer(instance, context=self.context)
         return serializer.data
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(
+    SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
     author = serializers.SlugRelatedField(
         slug_field="username", read_only=True
     )
 
     class Meta:
         model = Review
-        fields = ("id", "text", "author", "score", "pub_date")
-
-    def validate(self, data):
-        request = self.context.get("request")
-        if request.method != "POST":
-            return data
-
-        user = request.user
-        title_id = self.context["view"].kwargs.get("title_pk")
-        if Review.objects.filter(author=user, title_id=title_id).exists():
+        fields = (
+            "id",
+            "text",
+            "author",
+            "score",
+            "pub_date",
+            "comments_count",
+            "last_comment_at",
+        )
+        read_only_fields = ("comments_count", "last_comment_at")
+
+    duplicate_review_message = "Вы уже оставили отзыв на это произведение."
+
+    def create(self, validated_data):
+        """
+        Создаёт отзыв, полагаясь на ограничение unique_review в БД.
+
+        Предварительная проверка существования не защищает от
+        параллельных запросов, поэтому вставка делается в отдельной
+        транзакции (или точке сохранения), а нарушение ограничения
+        превращается в ошибку валидации.
+        """
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            if not Review.objects.filter(
+                author=validated_data["author"], title=validated_data["title"]
+            ).exists():
+                raise
             raise serializers.ValidationError(
-                "Вы уже оставили отзыв на это произведение."
+                {
+                    api_settings.NON_FIELD_ERRORS_KEY: [
+                        self.duplicate_review_message
+                    ]
+                }
             )
-        return data
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(
+    SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
 
     author = serializers.SlugRelatedField(
         read_only=True, slug_field="username"
@@ -199,3 +364,67 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ("id", "text", "author", "pub_date")
+
+
+class ChangeSerializer(serializers.ModelSerializer):
+    title = serializers.IntegerField(source="title_id", read_only=True)
+    review = serializers.IntegerField(source="review_id", read_only=True)
+
+    class Meta:
+        model = Change
+        fields = (
+            "id",
+            "model",
+            "object_id",
+            "action",
+            "title",
+            "review",
+            "created",
+        )
+
+
+class BulkDeleteSerializer(serializers.Serializer):
+    """
+    Отбор отзывов или комментариев для массового удаления.
+
+    Объекты задаются списком ``ids`` или автором с необязательным
+    интервалом дат публикации ``[since, until)``.
+    """
+
+    MODELS = {"reviews": Review, "comments": Comment}
+
+    model = serializers.ChoiceField(choices=tuple(MODELS))
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=MIN_ID, max_value=MAX_ID),
+        allow_empty=False,
+        max_length=1000,
+        required=False,
+    )
+    author = serializers.CharField(
+        max_length=USERNAME_MAX_LENGTH, required=False
+    )
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        if "ids" not in data and "author" not in data:
+            raise serializers.ValidationError(
+                "Передайте список ids или автора."
+            )
+        return data
+
+    def get_queryset(self):
+        data = self.validated_data
+        lookups = {
+            "pk__in": data.get("ids"),
+            "author__username": data.get("author"),
+            "pub_date__gte": data.get("since"),
+            "pub_date__lt": data.get("until"),
+        }
+        return self.MODELS[data["model"]].objects.filter(
+            **{
+                lookup: value
+                for lookup, value in lookups.items()
+                if value is not None
+            }
+        )
@@ -0,0 +1,17 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.authentication import refresh_auth_state
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def refresh_auth_state_on_save(sender, instance, **kwargs):
+    refresh_auth_state(instance)
+
+
+@receiver(post_delete, sender=User)
+def revoke_tokens_on_delete(sender, instance, **kwargs):
+    refresh_auth_state(instance)
@@ -0,0 +1,150 @@
+import json
+import logging
+from collections.abc import Mapping
+from hashlib import sha256
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from reviews.versions import get_cache
+
+logger = logging.getLogger("api.throttling")
+
+THROTTLE_KEY = "throttle:{scope}:{ident}:{window}"
+REJECTIONS_KEY = "throttle-rejections:{}"
+
+
+def count_rejection(scope):
+    """Увеличивает общий счётчик отказов по области ограничения."""
+    cache = get_cache()
+    key = REJECTIONS_KEY.format(scope)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, timeout=None)
+
+
+def get_rejection_counts(*scopes):
+    """Число отказов по областям ограничения с момента запуска кэша."""
+    values = get_cache().get_many([REJECTIONS_KEY.format(s) for s in scopes])
+    return {
+        scope: values.get(REJECTIONS_KEY.format(scope), 0) for scope in scopes
+    }
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Ограничение частоты запросов по скользящему окну.
+
+    Окно приближается двумя счётчиками фиксированных окон в кэше:
+    текущего и предыдущего, вклад которого убывает по мере того, как
+    текущее окно идёт к концу. Счётчик увеличивается атомарным ``incr``
+    до проверки, так что параллельные запросы не проходят сверх лимита, а
+    отклонённый запрос возвращает своё место. Проверка идёт до
+    сериализатора и запросов к БД и стоит одного ``get_many`` и одного
+    ``incr`` к кэшу.
+
+    Область — ``{view.throttle_scope}_{kind}``, частота берётся из
+    ``DEFAULT_THROTTLE_RATES``; без частоты запросы не ограничиваются.
+    Отказы пишутся строкой JSON в логгер ``api.throttling`` и считаются в
+    кэше (см. ``get_rejection_counts``).
+    """
+
+    kind = None
+    scope = None
+
+    def get_rate(self):
+        # Область зависит от представления, поэтому при создании
+        # ограничения частоты ещё нет: она читается в allow_request.
+        if self.scope is None:
+            return None
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_ident_value(self, request):
+        return self.get_ident(request)
+
+    def allow_request(self, request, view):
+        self.scope = f"{view.throttle_scope}_{self.kind}"
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        ident = self.get_ident_value(request)
+        if ident is None:
+            return True
+        now = self.timer()
+        window, self.elapsed = divmod(now, self.duration)
+        current_key, previous_key = (
+            THROTTLE_KEY.format(scope=self.scope, ident=ident, window=number)
+            for number in (int(window), int(window) - 1)
+        )
+        cache = get_cache()
+        self.previous = cache.get(previous_key, 0)
+        if cache.add(current_key, 1, timeout=2 * self.duration):
+            self.current = 1
+        else:
+            try:
+                self.current = cache.incr(current_key)
+            except ValueError:
+                cache.add(current_key, 1, timeout=2 * self.duration)
+                self.current = 1
+        weight = 1 - self.elapsed / self.duration
+        if self.previous * weight + self.current <= self.num_requests:
+            return True
+        cache.decr(current_key)
+        self.current -= 1
+        return self.throttle_failure(request)
+
+    def throttle_failure(self, request):
+        count_rejection(self.scope)
+        logger.warning(
+            json.dumps(
+                {
+                    "scope": self.scope,
+                    "method": request.method,
+                    "path": request.path,
+                    "wait": round(self.wait(), 1),
+                },
+                ensure_ascii=False,
+            )
+        )
+        return False
+
+    def wait(self):
+        """Время до освобождения места в окне, в секундах."""
+        if self.current < self.num_requests:
+            # Место освободится, когда вклад предыдущего окна уменьшится.
+            free = (self.num_requests - self.current) / self.previous
+            return max(self.duration * (1 - free) - self.elapsed, 0)
+        # Текущее окно заполнено: ждём следующего, где оно станет
+        # предыдущим.
+        free = self.num_requests / self.current
+        return self.duration - self.elapsed + self.duration * (1 - free)
+
+
+class IPSlidingWindowThrottle(SlidingWindowThrottle):
+    """Ограничение по IP-адресу клиента (с учётом ``NUM_PROXIES``)."""
+
+    kind = "ip"
+
+
+class UsernameSlidingWindowThrottle(SlidingWindowThrottle):
+    """
+    Ограничение по username из тела запроса.
+
+    Username не проверяется (это делает сериализатор после ограничения),
+    поэтому в ключ кэша идёт его хэш. Запросы без username (в том числе
+    с телом не в виде объекта) не ограничиваются: их отклонит
+    сериализатор.
+    """
+
+    kind = "username"
+
+    def get_ident_value(self, request):
+        if not isinstance(request.data, Mapping):
+            return None
+        username = request.data.get("username")
+        if not isinstance(username, str) or not username:
+            return None
+        return sha256(username.lower().encode()).hexdigest()[:32]
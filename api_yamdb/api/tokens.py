@@ -0,0 +1,24 @@
+from rest_framework_simplejwt.tokens import AccessToken
+
+ROLE_CLAIM = "role"
+SUPERUSER_CLAIM = "is_superuser"
+EPOCH_CLAIM = "epoch"
+
+
+class RoleAccessToken(AccessToken):
+    """
+    Access-токен с ролью пользователя.
+
+    Клеймы ``role`` и ``is_superuser`` позволяют проверять права по
+    самому токену, без загрузки пользователя из БД. Клейм ``epoch`` —
+    эпоха токенов пользователя на момент выдачи: после смены роли эпоха
+    растёт, и выданные раньше токены перестают приниматься.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[ROLE_CLAIM] = user.role
+        token[SUPERUSER_CLAIM] = user.is_superuser
+        token[EPOCH_CLAIM] = user.token_epoch
+        return token
@@ -3,9 +3,11 @@ from rest_framework.routers import DefaultRouter
 from rest_framework_nested import routers
 
 from api.views import (
+    APIBulkDelete,
     APIGetToken,
     APISignup,
     CategoryViewSet,
+    ChangeViewSet,
     CommentsViewSet,
     GenreViewSet,
     ReviewsViewSet,
@@ -18,6 +20,7 @@ router_v1.register("titles", TitleViewSet, basename="titles")
 router_v1.register("categories", CategoryViewSet, basename="categories")
 router_v1.register("genres", GenreViewSet, basename="genres")
 router_v1.register("users", UserViewSet, basename="users")
+router_v1.register("changes", ChangeViewSet, basename="changes")
 
 titles_router = routers.NestedSimpleRouter(
     router_v1, r"titles", lookup="title"
@@ -38,6 +41,7 @@ urlpatterns_auth = [
 
 urlpatterns_v1 = [
     path("auth/", include(urlpatterns_auth)),
+    path("moderation/delete/", APIBulkDelete.as_view(), name="bulk_delete"),
     path("", include(router_v1.urls)),
     path("", include(titles_router.urls)),
     path("", include(reviews_router.urls)),
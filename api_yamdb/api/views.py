@@ -1,55 +1,87 @@
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
-from django.db.models.functions import Round
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import (
     AllowAny,
     IsAuthenticated,
     IsAuthenticatedOrReadOnly,
 )
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import AccessToken
 
-from api.filters import TitleFilter
-from api.pagination import StandardResultsSetPagination
+from api.authentication import get_user_row
+from api.cache import CachedListMixin, CachedRetrieveMixin
+from api.exports import (
+    NDJSON_CONTENT_TYPE,
+    NDJSONRenderer,
+    export_review_lines,
+)
+from api.fieldsets import SparseFieldsMixin
+from api.filters import StableOrderingFilter, TitleFilter, UserSearchFilter
+from api.pagination import (
+    ChangeFeedPagination,
+    StandardResultsSetPagination,
+)
 from api.permissions import (
     IsAdmin,
     IsAdminOrModeratorOrAuthor,
     IsAdminOrReadOnly,
 )
 from api.serializers import (
+    BulkDeleteSerializer,
     CategorySerializer,
+    ChangeSerializer,
     CommentSerializer,
     GenreSerializer,
     GetTokenSerializer,
     ReviewSerializer,
     SignUpSerializer,
+    TitleReadSerializer,
     TitleWriteSerializer,
     UserSerializer,
 )
-from reviews.models import Category, Comment, Genre, Review, Title
+from api.throttling import (
+    IPSlidingWindowThrottle,
+    UsernameSlidingWindowThrottle,
+)
+from api.tokens import RoleAccessToken
+from reviews.constants import MAX_ID, MIN_ID
+from reviews.models import Category, Change, Comment, Genre, Review, Title
+from reviews.moderation import delete_in_chunks
+from reviews.ratings import get_score_distributions
+from reviews.search import SEARCH_ORDERING
 from users.models import User
+from users.outbox import enqueue_email
+
+TRUE_VALUES = ("1", "true", "yes")
 
 
 class APIGetToken(APIView):
     """
     Получение JWT-токена при использовании username и confirmation code.
 
-    Права доступа: Доступно без токена.
+    Права доступа: Доступно без токена. Частота запросов ограничена по
+    IP и по username.
     """
 
     permission_classes = (AllowAny,)
+    throttle_classes = (IPSlidingWindowThrottle, UsernameSlidingWindowThrottle)
+    throttle_scope = "token"
 
     def post(self, request):
         serializer = GetTokenSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data["user"]
-        token = AccessToken.for_user(user)
+        token = RoleAccessToken.for_user(user)
 
         return Response(
             {"token": str(token)},
@@ -63,41 +95,77 @@ class APISignup(APIView):
 
     Права доступа: Доступно без токена. Использовать имя 'me' в качестве
     username запрещено. Поля email и username должны быть уникальными.
+    Частота запросов ограничена по IP и по username.
     """
 
     permission_classes = (AllowAny,)
+    throttle_classes = (IPSlidingWindowThrottle, UsernameSlidingWindowThrottle)
+    throttle_scope = "signup"
 
     def post(self, request):
         serializer = SignUpSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user, _ = User.objects.get_or_create(
-            username=serializer.validated_data["username"],
-            email=serializer.validated_data["email"],
-        )
-        confirmation_code = default_token_generator.make_token(user)
-        email_body = (
-            f"Приветствую, {user.username}."
-            f"\nКод подтверждения для доступа к API: {confirmation_code}"
-        )
+        with transaction.atomic():
+            user, _ = User.objects.get_or_create(
+                username=serializer.validated_data["username"],
+                email=serializer.validated_data["email"],
+            )
+            confirmation_code = default_token_generator.make_token(user)
+            email_body = (
+                f"Приветствую, {user.username}."
+                f"\nКод подтверждения для доступа к API: {confirmation_code}"
+            )
+            # Письмо отправит команда send_emails: ответ не ждёт почтовый
+            # сервер.
+            enqueue_email(
+                subject="Код подтверждения для API Yamdb",
+                body=email_body,
+                recipient=user.email,
+            )
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class APIBulkDelete(APIView):
+    """
+    Массовое удаление отзывов или комментариев.
 
-        send_mail(
-            subject="Код подтверждения для API Yamdb",
-            message=email_body,
-            from_email=None,
-            recipient_list=[user.email],
+    Права доступа: модератор и админ удаляют любые объекты, остальные
+    пользователи — только свои. Права на весь список проверяются одним
+    запросом, удаление идёт пачками, а оценки произведений
+    пересчитываются один раз на пачку. Идентификаторы, которых нет или
+    которые удалять нельзя, возвращаются в ``not_found``.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        serializer = BulkDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        queryset = IsAdminOrModeratorOrAuthor().filter_queryset(
+            request, serializer.get_queryset()
+        )
+        deleted = delete_in_chunks(queryset)
+        ids = serializer.validated_data.get("ids", ())
+        return Response(
+            {
+                "deleted": len(deleted),
+                "not_found": sorted(set(ids).difference(deleted)),
+            },
+            status=status.HTTP_200_OK,
         )
-        return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(CachedRetrieveMixin, CachedListMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     pagination_class = StandardResultsSetPagination
+    cursor_ordering = ("username",)
+    cache_models = (User,)
     lookup_field = "username"
     permission_classes = [
         IsAdmin,
     ]
-    filter_backends = [filters.SearchFilter]
+    filter_backends = [UserSearchFilter]
     search_fields = ["username", "email"]
 
     http_method_names = [
@@ -116,34 +184,215 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated],
     )
     def me(self, request):
-        serializer = self.get_serializer(
-            request.user, data=request.data, partial=True
-        )
+        user = get_user_row(request.user)
+        if request.method == "GET":
+            return Response(self.get_serializer(user).data)
+        serializer = self.get_serializer(user, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class AtomicWriteMixin:
+    """Изменение объекта и запись о нём в журнал — в одной транзакции."""
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            super().perform_update(serializer)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            super().perform_destroy(instance)
+
+
+class TitleViewSet(
+    AtomicWriteMixin,
+    SparseFieldsMixin,
+    CachedRetrieveMixin,
+    CachedListMixin,
+    viewsets.ModelViewSet,
+):
     """
     Получение всех произведений, добавление нового произведения.
 
     /id/ Получение, удаление, изменение конкретного произведения
     """
 
-    queryset = Title.objects.annotate(
-        rating=Round(Avg("reviews__score"), 1)
-    ).order_by("name")
+    queryset = (
+        Title.objects.select_related("category")
+        .prefetch_related("genre")
+        .order_by("name", "id")
+    )
 
     serializer_class = TitleWriteSerializer
+    sparse_fields_serializer_class = TitleReadSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
     permission_classes = (IsAdminOrReadOnly,)
     pagination_class = StandardResultsSetPagination
+    cursor_ordering = ("name", "id")
+    cache_models = (Title, Category, Genre)
+    bulk_max_titles = 1000
+    distribution_max_titles = 100
     http_method_names = ["get", "post", "patch", "delete", "head", "options"]
 
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        # Результаты полнотекстового поиска упорядочены по релевантности,
+        # и курсор строится по ней же.
+        if "search_rank" in queryset.query.annotations:
+            self.cursor_ordering = SEARCH_ORDERING
+        return queryset
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        Создание нескольких произведений одним запросом.
+
+        Принимает массив произведений. Если хотя бы одно невалидно,
+        ничего не создаётся, а в ответе ошибки перечислены по элементам.
+        """
+        serializer = self.get_serializer(
+            data=request.data, many=True, max_length=self.bulk_max_titles
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, url_path="score-distribution")
+    def score_distribution(self, request, pk=None):
+        """Число отзывов с каждой оценкой от 1 до 10."""
+        return self.cached_response(
+            self.score_distribution_response, request, pk=pk
+        )
+
+    def score_distribution_response(self, request, pk):
+        try:
+            title_id = int(pk)
+        except ValueError:
+            raise Http404
+        if not MIN_ID <= title_id <= MAX_ID:
+            raise Http404
+        distributions = get_score_distributions([title_id])
+        if not distributions:
+            raise Http404
+        return Response(distribution_data(*distributions.popitem()))
+
+    @action(detail=False, url_path="score-distribution")
+    def score_distributions(self, request):
+        """
+        Распределения оценок для списка произведений ``?ids=1,2,3``.
+
+        Несуществующие произведения в ответ не попадают.
+        """
+        return self.cached_response(self.score_distributions_response, request)
+
+    def score_distributions_response(self, request):
+        title_ids = parse_ids(
+            request.query_params.get("ids"), self.distribution_max_titles
+        )
+        distributions = get_score_distributions(title_ids)
+        return Response(
+            [
+                distribution_data(title_id, distributions[title_id])
+                for title_id in title_ids
+                if title_id in distributions
+            ]
+        )
+
+    @action(
+        detail=True,
+        renderer_classes=(NDJSONRenderer, JSONRenderer),
+    )
+    def export(self, request, pk=None):
+        """
+        Все отзывы произведения потоком NDJSON, по строке на объект.
+
+        ``?comments=true`` добавляет после каждого отзыва его комментарии,
+        ``?since=<ISO 8601>`` оставляет только опубликованное с этого
+        момента (включительно): отзывы и комментарии, а с комментариями —
+        ещё и более старые отзывы, к которым появились новые комментарии.
+        """
+        since = parse_since(request.query_params.get("since"))
+        with_comments = request.query_params.get("comments") in TRUE_VALUES
+        if not Title.objects.filter(pk=parse_pk(pk)).exists():
+            raise Http404
+
+        reviews = with_author_username(Review.objects.filter(title_id=pk))
+        comments = None
+        if with_comments:
+            comments = with_author_username(
+                Comment.objects.filter(review__title_id=pk)
+            )
+        if since is not None:
+            new_reviews = Q(pub_date__gte=since)
+            if with_comments:
+                new_reviews |= Q(last_comment_at__gte=since)
+                comments = comments.filter(pub_date__gte=since)
+            reviews = reviews.filter(new_reviews)
+        return StreamingHttpResponse(
+            export_review_lines(reviews, comments),
+            content_type=NDJSON_CONTENT_TYPE,
+        )
+
+
+def distribution_data(title_id, distribution):
+    return {
+        "title": title_id,
+        "count": sum(distribution.values()),
+        "distribution": distribution,
+    }
+
+
+def parse_pk(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise Http404
+
+
+def parse_since(value):
+    """Момент времени из ``?since=`` в формате ISO 8601 или None."""
+    if not value:
+        return None
+    try:
+        since = parse_datetime(value)
+    except ValueError:
+        since = None
+    if since is None:
+        raise ValidationError(
+            {"since": "Передайте дату и время в формате ISO 8601."}
+        )
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def parse_ids(value, max_ids):
+    """Список идентификаторов из строки ``1,2,3`` без повторов."""
+    try:
+        ids = list(dict.fromkeys(int(part) for part in value.split(",")))
+    except (AttributeError, ValueError):
+        raise ValidationError(
+            {"ids": "Передайте идентификаторы через запятую."}
+        )
+    if not all(MIN_ID <= id_ <= MAX_ID for id_ in ids):
+        raise ValidationError(
+            {"ids": f"Идентификаторы должны быть от {MIN_ID} до {MAX_ID}."}
+        )
+    if len(ids) > max_ids:
+        raise ValidationError(
+            {"ids": f"Не больше {max_ids} идентификаторов за запрос."}
+        )
+    return ids
+
 
 class ListCreateDestroyViewSet(
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.DestroyModelMixin,
@@ -152,6 +401,7 @@ class ListCreateDestroyViewSet(
     """Базовый ViewSet для категорий и жанров."""
 
     pagination_class = StandardResultsSetPagination
+    cursor_ordering = ("name", "id")
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (filters.SearchFilter,)
     search_fields = ("name",)
@@ -163,6 +413,7 @@ class CategoryViewSet(ListCreateDestroyViewSet):
 
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_models = (Category,)
 
 
 class GenreViewSet(ListCreateDestroyViewSet):
@@ -170,51 +421,126 @@ class GenreViewSet(ListCreateDestroyViewSet):
 
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_models = (Genre,)
+
+
+def with_author_username(queryset):
+    """
+    Автор подгружается джойном, из его столбцов — только username.
+
+    Сериализаторы отзывов и комментариев выводят автора по username,
+    поэтому остальные поля пользователя откладываются через ``only()``.
+    """
+    fields = [field.name for field in queryset.model._meta.concrete_fields]
+    return queryset.select_related("author").only(*fields, "author__username")
 
 
-class BaseCommentReviewViewSet(viewsets.ModelViewSet):
+class BaseCommentReviewViewSet(
+    SparseFieldsMixin,
+    CachedRetrieveMixin,
+    CachedListMixin,
+    viewsets.ModelViewSet,
+):
     """Базовый класс для отзывов и комментариев."""
 
     http_method_names = ["get", "post", "patch", "delete", "head", "options"]
     pagination_class = StandardResultsSetPagination
+    cursor_ordering = ("-pub_date", "id")
     permission_classes = (
         IsAuthenticatedOrReadOnly,
         IsAdminOrModeratorOrAuthor,
     )
+    parent_field = None
+    parent_lookups = {}
+
+    def get_parent_id(self, kwarg):
+        """Идентификатор родителя из URL; вне диапазона ключа — 404."""
+        try:
+            parent_id = int(self.kwargs.get(kwarg))
+        except (TypeError, ValueError):
+            raise Http404
+        if not MIN_ID <= parent_id <= MAX_ID:
+            raise Http404
+        return parent_id
+
+    def get_parent_object(self):
+        field = self.queryset.model._meta.get_field(self.parent_field)
+        lookups = {}
+        for lookup, kwarg in self.parent_lookups.items():
+            if lookup == field.attname:
+                lookup = "pk"
+            else:
+                lookup = lookup.removeprefix(f"{self.parent_field}__")
+            lookups[lookup] = self.get_parent_id(kwarg)
+        return get_object_or_404(field.related_model, **lookups)
+
+    def get_parent(self):
+        if not hasattr(self, "_parent"):
+            self._parent = self.get_parent_object()
+        return self._parent
 
+    def get_queryset(self):
+        return (
+            super()
+            .get_queryset()
+            .filter(
+                **{
+                    field: self.get_parent_id(kwarg)
+                    for field, kwarg in self.parent_lookups.items()
+                }
+            )
+        )
 
-class ReviewsViewSet(BaseCommentReviewViewSet):
-    """Получение, создание, изменение, удаление обзоров на произведений"""
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not page:
+            self.get_parent()
+        return page
 
-    queryset = Review.objects.all()
-    serializer_class = ReviewSerializer
+    def perform_create(self, serializer):
+        serializer.save(
+            author=get_user_row(self.request.user),
+            **{self.parent_field: self.get_parent()},
+        )
 
-    def get_title(self):
-        return get_object_or_404(Title, pk=self.kwargs.get("title_pk"))
 
-    def get_queryset(self):
-        title = self.get_title()
-        return title.reviews.all()
+class ReviewsViewSet(AtomicWriteMixin, BaseCommentReviewViewSet):
+    """Получение, создание, изменение, удаление обзоров на произведений"""
 
-    def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+    queryset = with_author_username(Review.objects.all())
+    serializer_class = ReviewSerializer
+    cache_models = (Review, Title, User)
+    filter_backends = (StableOrderingFilter,)
+    ordering_fields = ("pub_date", "comments_count")
+    ordering = ("-pub_date",)
+    parent_field = "title"
+    parent_lookups = {"title_id": "title_pk"}
 
 
-class CommentsViewSet(BaseCommentReviewViewSet):
+class CommentsViewSet(AtomicWriteMixin, BaseCommentReviewViewSet):
     """Получение, создание, изменение, удаление комментариев на обзоры"""
 
-    queryset = Comment.objects.all()
+    queryset = with_author_username(Comment.objects.all())
     serializer_class = CommentSerializer
+    cache_models = (Comment, Review, User)
+    parent_field = "review"
+    parent_lookups = {
+        "review_id": "review_pk",
+        "review__title_id": "title_pk",
+    }
 
-    def get_review(self):
-        return get_object_or_404(
-            Review,
-            pk=self.kwargs.get("review_pk"),
-            title_id=self.kwargs.get("title_pk"),
-        )
 
-    def get_queryset(self):
-        return self.get_review().comments.all()
+class ChangeViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Лента изменений произведений, отзывов и комментариев.
 
-    def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+    Записи отдаются по возрастанию ``id`` пачками по курсору ``?after=``
+    и фильтруются по ``?model=`` и ``?action=``.
+    """
+
+    queryset = Change.objects.all()
+    serializer_class = ChangeSerializer
+    pagination_class = ChangeFeedPagination
+    permission_classes = (IsAdmin,)
+    filter_backends = (DjangoFilterBackend,)
+    filterset_fields = ("model", "action")
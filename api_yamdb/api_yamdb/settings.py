@@ -26,6 +26,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.instrumentation.QueryProfileMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -67,6 +68,54 @@ DATABASES = {
 }
 
 
+# Cache
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "api-yamdb",
+    }
+}
+
+# Алиас кэша для версий моделей и ответов API и время жизни ответов.
+API_CACHE_ALIAS = "default"
+
+API_RESPONSE_CACHE_TIMEOUT = 60 * 60
+
+# Сколько секунд процесс доверяет состоянию токенов пользователя из кэша
+# (api.authentication). Для нескольких процессов нужен общий кэш.
+AUTH_STATE_TIMEOUT = 30
+
+
+# Статистика запросов к БД (api.instrumentation): доля профилируемых
+# запросов и число запросов, сверх которого статистика пишется с INFO.
+QUERY_PROFILE_SAMPLE_RATE = 1.0 if DEBUG else 0.01
+QUERY_PROFILE_BUDGET = 20
+
+
+# Логи: статистика запросов к БД (api.instrumentation).
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "api.queries": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+        "api.throttling": {
+            "handlers": ["console"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
+}
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -102,8 +151,16 @@ USE_TZ = True
 REST_FRAMEWORK = {
     "EXCEPTION_HANDLER": "api.exceptions.response_exception_handler",
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.ClaimsJWTAuthentication",
     ),
+    # Ограничения регистрации и получения токена (api.throttling):
+    # область — throttle_scope представления и вид ограничения.
+    "DEFAULT_THROTTLE_RATES": {
+        "signup_ip": "10/min",
+        "signup_username": "3/min",
+        "token_ip": "20/min",
+        "token_username": "5/min",
+    },
 }
 
 # Static files (CSS, JavaScript, Images)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.models import Category, Change, Comment, Genre, Review, Title
 
 
 @admin.register(Category)
@@ -14,6 +14,19 @@ class CategoryAdmin(admin.ModelAdmin):
     search_fields = ("name",)
 
 
+@admin.register(Change)
+class ChangeAdmin(admin.ModelAdmin):
+    list_display = ("id", "model", "object_id", "action", "created")
+    list_filter = ("model", "action")
+    ordering = ("-id",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     list_display = ("id", "author", "text", "pub_date", "review")
@@ -60,9 +73,11 @@ class TitleAdmin(admin.ModelAdmin):
         "category",
         "get_genres",
         "description",
+        "rating",
     )
     ordering = ("name",)
     search_fields = ("name", "year")
+    readonly_fields = ("score_sum", "score_count", "rating")
 
     @admin.display(description="Жанры")
     def get_genres(self, obj):
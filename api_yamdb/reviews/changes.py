@@ -0,0 +1,65 @@
+from django.db.models import Subquery
+
+from reviews.models import Change, Comment, Review, Title
+
+
+def change_entry(instance, action):
+    """Несохранённая запись журнала об изменении ``instance``."""
+    change = Change(
+        model=instance._meta.model_name, object_id=instance.pk, action=action
+    )
+    if isinstance(instance, Title):
+        change.title_id = instance.pk
+    elif isinstance(instance, Review):
+        change.title_id = instance.title_id
+    else:
+        change.review_id = instance.review_id
+        change.title_id = comment_title_id(instance)
+    return change
+
+
+def comment_title_id(comment):
+    """
+    Произведение комментария без отдельного запроса.
+
+    Если отзыв уже загружен, произведение берётся из него, иначе
+    подставляется подзапросом прямо в INSERT записи журнала.
+    """
+    if Comment.review.is_cached(comment):
+        return comment.review.title_id
+    return Subquery(
+        Review.objects.filter(pk=comment.review_id).values("title_id")
+    )
+
+
+def record_change(instance, action):
+    change_entry(instance, action).save()
+
+
+def record_changes(instances, action):
+    """Записи журнала для пачки объектов одним INSERT."""
+    Change.objects.bulk_create(
+        change_entry(instance, action) for instance in instances
+    )
+
+
+def title_update_entry(title_id):
+    """
+    Несохранённая запись журнала об изменении произведения ``title_id``.
+
+    Нужна там, где произведение меняется через ``QuerySet.update()`` без
+    сигналов, например при пересчёте рейтинга по отзывам.
+    """
+    return Change(
+        model=Title._meta.model_name,
+        object_id=title_id,
+        title_id=title_id,
+        action=Change.UPDATED,
+    )
+
+
+def record_title_updates(title_ids):
+    """Записи журнала об изменении произведений одним INSERT."""
+    Change.objects.bulk_create(
+        title_update_entry(title_id) for title_id in title_ids
+    )
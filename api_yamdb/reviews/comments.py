@@ -0,0 +1,42 @@
+from django.db.models import Count, F, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from reviews.models import Comment, Review
+from reviews.versions import bump_model_version
+
+
+def apply_comment_added(review_id, pub_date):
+    """Атомарно учитывает новый комментарий у отзыва одним UPDATE."""
+    Review.objects.filter(pk=review_id).update(
+        comments_count=F("comments_count") + 1,
+        last_comment_at=Greatest(
+            Coalesce("last_comment_at", Value(pub_date)), Value(pub_date)
+        ),
+    )
+    bump_model_version(Review)
+
+
+def recount_comments(queryset=None):
+    """
+    Пересчитывает счётчики комментариев по таблице комментариев.
+
+    Используется после удаления, когда последний комментарий нужно
+    искать заново, и для полного пересчёта. Возвращает число отзывов.
+    """
+    if queryset is None:
+        queryset = Review.objects.all()
+    comments = (
+        Comment.objects.filter(review=OuterRef("pk"))
+        .order_by()
+        .values("review")
+    )
+    updated = queryset.update(
+        comments_count=Coalesce(
+            Subquery(comments.annotate(total=Count("id")).values("total")), 0
+        ),
+        last_comment_at=Subquery(
+            comments.annotate(last=Max("pub_date")).values("last")
+        ),
+    )
+    bump_model_version(Review)
+    return updated
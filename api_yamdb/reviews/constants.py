@@ -10,3 +10,7 @@ CODE_MAX_LENGTH = 255
 ROLE_MAX_LENGTH = 20
 USERNAME_REGEX = r"^[\w.@+-]+\Z"
 FORBIDDEN_USERNAME = "me"
+CHANGE_FIELD_MAX_LENGTH = 16
+EMAIL_SUBJECT_MAX_LENGTH = 255
+MIN_ID = 1
+MAX_ID = 2**63 - 1
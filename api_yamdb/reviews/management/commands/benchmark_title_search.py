@@ -0,0 +1,123 @@
+import random
+import sqlite3
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews.search import (
+    FTS_TABLE,
+    REBUILD_SQL,
+    SEARCH_INDEX_SQL,
+    build_match_query,
+)
+
+SYLLABLES = "ка ро ми ла то се ну ве да ри бо ле жи по на ты гу ше ко за"
+PAGE_SIZE = 5
+
+
+class Command(BaseCommand):
+    """
+    Сравнение поиска icontains и FTS5 на синтетических произведениях.
+
+    Данные создаются в отдельной временной базе SQLite, рабочая база не
+    затрагивается. Для каждого запроса замеряется то же, что делает
+    список произведений: COUNT(*) и первая страница.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--titles", type=int, default=1_000_000)
+        parser.add_argument("--queries", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        vocabulary = [
+            "".join(rng.choices(SYLLABLES.split(), k=rng.randint(2, 4)))
+            for _ in range(20_000)
+        ]
+        db = sqlite3.connect(":memory:")
+
+        started = time.perf_counter()
+        self.fill(db, rng, vocabulary, options["titles"])
+        self.stdout.write(
+            f"Создано произведений: {options['titles']} "
+            f"за {time.perf_counter() - started:.1f} с"
+        )
+        started = time.perf_counter()
+        for statement in SEARCH_INDEX_SQL + REBUILD_SQL:
+            db.execute(statement)
+        self.stdout.write(
+            f"Индекс FTS5 построен за {time.perf_counter() - started:.1f} с"
+        )
+
+        terms = rng.sample(vocabulary, options["queries"])
+        for label, run in (
+            ("icontains", self.search_like),
+            ("fts5", self.search_fts),
+            ("fts5 prefix", self.search_fts_prefix),
+        ):
+            timings = [
+                self.measure(run, db, term, options["repeat"])
+                for term in terms
+            ]
+            self.stdout.write(
+                f"{label:>12}: медиана {statistics.median(timings):8.2f} мс, "
+                f"максимум {max(timings):8.2f} мс"
+            )
+
+    def fill(self, db, rng, vocabulary, count):
+        db.execute(
+            "CREATE TABLE reviews_title ("
+            "id INTEGER PRIMARY KEY, name TEXT, description TEXT)"
+        )
+        rows = (
+            (
+                " ".join(rng.choices(vocabulary, k=rng.randint(1, 4))),
+                " ".join(rng.choices(vocabulary, k=rng.randint(5, 30))),
+            )
+            for _ in range(count)
+        )
+        db.executemany(
+            "INSERT INTO reviews_title (name, description) VALUES (?, ?)",
+            rows,
+        )
+        db.execute("CREATE INDEX reviews_title_name ON reviews_title (name)")
+
+    def measure(self, run, db, term, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run(db, term)
+            timings.append((time.perf_counter() - started) * 1000)
+        return min(timings)
+
+    def search_like(self, db, term):
+        where = "WHERE name LIKE ? ESCAPE '\\'"
+        pattern = f"%{term}%"
+        db.execute(
+            f"SELECT COUNT(*) FROM reviews_title {where}", [pattern]
+        ).fetchone()
+        db.execute(
+            f"SELECT id FROM reviews_title {where} "
+            f"ORDER BY name, id LIMIT {PAGE_SIZE}",
+            [pattern],
+        ).fetchall()
+
+    def search_fts(self, db, term, query=None):
+        query = query or build_match_query(term)
+        db.execute(
+            f"SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?",
+            [query],
+        ).fetchone()
+        db.execute(
+            f"SELECT reviews_title.id FROM reviews_title "
+            f"JOIN {FTS_TABLE} ON reviews_title.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH ? ORDER BY {FTS_TABLE}.rank "
+            f"LIMIT {PAGE_SIZE}",
+            [query],
+        ).fetchall()
+
+    def search_fts_prefix(self, db, term):
+        self.search_fts(db, term, build_match_query(f"{term[:4]}*"))
@@ -5,7 +5,10 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
 
+from reviews.comments import recount_comments
 from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.ratings import rebuild_ratings
+from reviews.versions import bump_model_version
 
 User = get_user_model()
 
@@ -33,6 +36,7 @@ class Command(BaseCommand):
                     self.style.WARNING(f"Файл {filename} не найден.")
                 )
 
+        bump_model_version(User, Category, Genre, Title, Review, Comment)
         self.stdout.write(self.style.SUCCESS("--- ИМПОРТ ЗАВЕРШЕН ---"))
 
     def import_users(self, path):
@@ -113,7 +117,8 @@ class Command(BaseCommand):
                 for row in reader
             ]
             Review.objects.bulk_create(objs, ignore_conflicts=True)
-        self.stdout.write("Отзывы загружены")
+        rebuild_ratings()
+        self.stdout.write("Отзывы загружены, рейтинги пересчитаны")
 
     def import_comments(self, path):
         with open(path, "r", encoding="utf-8") as file:
@@ -129,4 +134,5 @@ class Command(BaseCommand):
                 for row in reader
             ]
             Comment.objects.bulk_create(objs, ignore_conflicts=True)
-        self.stdout.write("Комментарии загружены")
+        recount_comments()
+        self.stdout.write("Комментарии загружены, счётчики пересчитаны")
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.ratings import (
+    find_bucket_drift,
+    find_rating_drift,
+    rebuild_ratings,
+)
+
+
+class Command(BaseCommand):
+    """Пересчёт рейтингов произведений по отзывам и проверка расхождений"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только проверить расхождения, ничего не изменяя.",
+        )
+
+    def handle(self, *args, **options):
+        drift = list(find_rating_drift())
+        for title in drift:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{title.pk} «{title}»: сохранено "
+                    f"{title.score_sum}/{title.score_count}, по отзывам "
+                    f"{title.actual_sum}/{title.actual_count}"
+                )
+            )
+
+        bucket_drift = list(find_bucket_drift())
+        for title in bucket_drift:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{title.pk} «{title}»: распределение оценок "
+                    "расходится с отзывами"
+                )
+            )
+        titles = {title.pk for title in drift + bucket_drift}
+
+        if options["check"]:
+            if titles:
+                raise CommandError(
+                    f"Рейтинги расходятся у {len(titles)} произведений."
+                )
+            self.stdout.write(self.style.SUCCESS("Расхождений нет"))
+            return
+
+        updated = rebuild_ratings()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Рейтинги пересчитаны: {updated} произведений, "
+                f"исправлено расхождений: {len(titles)}"
+            )
+        )
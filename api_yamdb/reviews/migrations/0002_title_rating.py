@@ -0,0 +1,73 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:13
+
+from django.db import migrations, models
+from django.db.models import (
+    Case,
+    Count,
+    FloatField,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, Coalesce, Round
+from django.db.models.lookups import Exact
+
+
+def fill_ratings(apps, schema_editor):
+    Title = apps.get_model("reviews", "Title")
+    Review = apps.get_model("reviews", "Review")
+    reviews = Review.objects.filter(title=OuterRef("pk")).values("title")
+    score_sum = Coalesce(
+        Subquery(reviews.annotate(total=Sum("score")).values("total")),
+        0,
+        output_field=IntegerField(),
+    )
+    score_count = Coalesce(
+        Subquery(reviews.annotate(total=Count("id")).values("total")),
+        0,
+        output_field=IntegerField(),
+    )
+    Title.objects.update(
+        score_sum=score_sum,
+        score_count=score_count,
+        rating=Case(
+            When(Exact(score_count, 0), then=Value(None)),
+            default=Round(Cast(score_sum, FloatField()) / score_count, 1),
+            output_field=FloatField(),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="title",
+            name="rating",
+            field=models.FloatField(
+                blank=True, null=True, verbose_name="Рейтинг"
+            ),
+        ),
+        migrations.AddField(
+            model_name="title",
+            name="score_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Количество оценок"
+            ),
+        ),
+        migrations.AddField(
+            model_name="title",
+            name="score_sum",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Сумма оценок"
+            ),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Полнотекстовый индекс FTS5 и триггеры, которые держат его в
+# синхронизации с таблицей произведений (только SQLite).
+CREATE_SEARCH_INDEX_SQL = (
+    """
+    CREATE VIRTUAL TABLE reviews_title_fts USING fts5(
+        name, description,
+        content='reviews_title', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    "INSERT INTO reviews_title_fts(reviews_title_fts, rank) "
+    "VALUES ('rank', 'bm25(10.0, 1.0)')",
+    """
+    CREATE TRIGGER reviews_title_fts_insert AFTER INSERT ON reviews_title
+    BEGIN
+        INSERT INTO reviews_title_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER reviews_title_fts_delete AFTER DELETE ON reviews_title
+    BEGIN
+        INSERT INTO reviews_title_fts(
+            reviews_title_fts, rowid, name, description
+        )
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER reviews_title_fts_update
+    AFTER UPDATE OF name, description ON reviews_title
+    BEGIN
+        INSERT INTO reviews_title_fts(
+            reviews_title_fts, rowid, name, description
+        )
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO reviews_title_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    "INSERT INTO reviews_title_fts(reviews_title_fts) VALUES ('rebuild')",
+    "INSERT INTO reviews_title_fts(reviews_title_fts) VALUES ('optimize')",
+)
+DROP_SEARCH_INDEX_SQL = (
+    "DROP TRIGGER IF EXISTS reviews_title_fts_insert",
+    "DROP TRIGGER IF EXISTS reviews_title_fts_delete",
+    "DROP TRIGGER IF EXISTS reviews_title_fts_update",
+    "DROP TABLE IF EXISTS reviews_title_fts",
+)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in CREATE_SEARCH_INDEX_SQL:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in DROP_SEARCH_INDEX_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0002_title_rating"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TitleSearchIndex",
+            fields=[
+                (
+                    "title",
+                    models.OneToOneField(
+                        db_column="rowid",
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="search_index",
+                        serialize=False,
+                        to="reviews.title",
+                    ),
+                ),
+                ("name", models.TextField()),
+                ("description", models.TextField()),
+                # В модели это reviews.search.FullTextField; модель не
+                # управляется миграциями, тип поля на схему не влияет.
+                (
+                    "document",
+                    models.TextField(db_column="reviews_title_fts"),
+                ),
+                ("rank", models.FloatField()),
+            ],
+            options={
+                "db_table": "reviews_title_fts",
+                "managed": False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
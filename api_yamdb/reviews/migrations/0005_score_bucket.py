@@ -0,0 +1,73 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_score_buckets(apps, schema_editor):
+    Review = apps.get_model("reviews", "Review")
+    ScoreBucket = apps.get_model("reviews", "ScoreBucket")
+    ScoreBucket.objects.bulk_create(
+        ScoreBucket(title_id=row["title"], score=row["score"], count=row["n"])
+        for row in Review.objects.values("title", "score")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0003_title_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScoreBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "score",
+                    models.PositiveSmallIntegerField(verbose_name="Оценка"),
+                ),
+                (
+                    "count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Количество отзывов"
+                    ),
+                ),
+                (
+                    "title",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="reviews.title",
+                        verbose_name="Произведение",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Распределение оценок",
+                "verbose_name_plural": "Распределения оценок",
+                "default_related_name": "score_buckets",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("title", "score"), name="unique_score_bucket"
+                    ),
+                    models.CheckConstraint(
+                        condition=models.Q(("score__range", (1, 10))),
+                        name="score_bucket_range",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(fill_score_buckets, migrations.RunPython.noop),
+    ]
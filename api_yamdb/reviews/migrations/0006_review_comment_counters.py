@@ -0,0 +1,59 @@
+# Generated by Django 5.1.1 on 2026-10-18 20:02
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_comment_counters(apps, schema_editor):
+    Review = apps.get_model("reviews", "Review")
+    Comment = apps.get_model("reviews", "Comment")
+    comments = (
+        Comment.objects.filter(review=OuterRef("pk"))
+        .order_by()
+        .values("review")
+    )
+    Review.objects.update(
+        comments_count=Coalesce(
+            Subquery(comments.annotate(total=Count("id")).values("total")), 0
+        ),
+        last_comment_at=Subquery(
+            comments.annotate(last=Max("pub_date")).values("last")
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0005_score_bucket"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="review",
+            name="comments_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Количество комментариев"
+            ),
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="last_comment_at",
+            field=models.DateTimeField(
+                blank=True,
+                null=True,
+                verbose_name="Дата последнего комментария",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["title", "-comments_count", "id"],
+                name="review_discussed_idx",
+            ),
+        ),
+        migrations.RunPython(fill_comment_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,149 @@
+# Generated by Django 5.1.1 on 2026-10-18 20:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# SQLite пересоздаёт таблицу произведений при изменении её столбцов, а
+# вместе с таблицей пропадают триггеры полнотекстового индекса, поэтому
+# индекс пересоздаётся. SQL — копия 0003_title_search_index на момент
+# этой миграции.
+DROP_SEARCH_INDEX_SQL = (
+    "DROP TRIGGER IF EXISTS reviews_title_fts_insert",
+    "DROP TRIGGER IF EXISTS reviews_title_fts_delete",
+    "DROP TRIGGER IF EXISTS reviews_title_fts_update",
+    "DROP TABLE IF EXISTS reviews_title_fts",
+)
+CREATE_SEARCH_INDEX_SQL = (
+    """
+    CREATE VIRTUAL TABLE reviews_title_fts USING fts5(
+        name, description,
+        content='reviews_title', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    "INSERT INTO reviews_title_fts(reviews_title_fts, rank) "
+    "VALUES ('rank', 'bm25(10.0, 1.0)')",
+    """
+    CREATE TRIGGER reviews_title_fts_insert AFTER INSERT ON reviews_title
+    BEGIN
+        INSERT INTO reviews_title_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER reviews_title_fts_delete AFTER DELETE ON reviews_title
+    BEGIN
+        INSERT INTO reviews_title_fts(
+            reviews_title_fts, rowid, name, description
+        )
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER reviews_title_fts_update
+    AFTER UPDATE OF name, description ON reviews_title
+    BEGIN
+        INSERT INTO reviews_title_fts(
+            reviews_title_fts, rowid, name, description
+        )
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO reviews_title_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    "INSERT INTO reviews_title_fts(reviews_title_fts) VALUES ('rebuild')",
+    "INSERT INTO reviews_title_fts(reviews_title_fts) VALUES ('optimize')",
+)
+
+
+def recreate_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in DROP_SEARCH_INDEX_SQL + CREATE_SEARCH_INDEX_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0006_review_comment_counters"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, recreate_search_index),
+        migrations.AlterField(
+            model_name="comment",
+            name="review",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="reviews.review",
+                verbose_name="Отзыв",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="review",
+            name="title",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="reviews.title",
+                verbose_name="Публикация",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="title",
+            name="category",
+            field=models.ForeignKey(
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="reviews.category",
+                verbose_name="Категория произведения",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="category",
+            index=models.Index(
+                fields=["name", "id"], name="category_name_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["review", "-pub_date", "id"],
+                name="comment_review_pub_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="genre",
+            index=models.Index(fields=["name", "id"], name="genre_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["title", "-pub_date", "id"],
+                name="review_title_pub_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="title",
+            index=models.Index(fields=["name", "id"], name="title_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="title",
+            index=models.Index(
+                fields=["category", "name", "id"],
+                name="title_category_name_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="title",
+            index=models.Index(
+                fields=["year", "name", "id"], name="title_year_name_idx"
+            ),
+        ),
+        migrations.RunPython(recreate_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.1.1 on 2026-10-18 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0007_access_path_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Change",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "model",
+                    models.CharField(max_length=16, verbose_name="Модель"),
+                ),
+                (
+                    "object_id",
+                    models.PositiveBigIntegerField(
+                        verbose_name="Идентификатор объекта"
+                    ),
+                ),
+                (
+                    "title_id",
+                    models.PositiveBigIntegerField(
+                        verbose_name="Произведение"
+                    ),
+                ),
+                (
+                    "review_id",
+                    models.PositiveBigIntegerField(
+                        blank=True, null=True, verbose_name="Отзыв"
+                    ),
+                ),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("created", "Создание"),
+                            ("updated", "Изменение"),
+                            ("deleted", "Удаление"),
+                        ],
+                        max_length=16,
+                        verbose_name="Действие",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Дата записи"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Изменение",
+                "verbose_name_plural": "Журнал изменений",
+                "ordering": ["id"],
+            },
+        ),
+    ]
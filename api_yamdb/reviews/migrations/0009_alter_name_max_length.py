@@ -0,0 +1,90 @@
+# Generated by Django 5.1.1 on 2026-10-18 23:10
+
+from django.db import migrations, models
+
+# Длина названий в моделях — NAME_MAX_LENGTH (256), а 0001_initial
+# создала столбцы длиной 150. SQLite пересоздаёт таблицу произведений при
+# изменении её столбцов, а вместе с таблицей пропадают триггеры
+# полнотекстового индекса, поэтому индекс пересоздаётся. SQL — копия
+# 0003_title_search_index на момент этой миграции.
+DROP_SEARCH_INDEX_SQL = (
+    "DROP TRIGGER IF EXISTS reviews_title_fts_insert",
+    "DROP TRIGGER IF EXISTS reviews_title_fts_delete",
+    "DROP TRIGGER IF EXISTS reviews_title_fts_update",
+    "DROP TABLE IF EXISTS reviews_title_fts",
+)
+CREATE_SEARCH_INDEX_SQL = (
+    """
+    CREATE VIRTUAL TABLE reviews_title_fts USING fts5(
+        name, description,
+        content='reviews_title', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    "INSERT INTO reviews_title_fts(reviews_title_fts, rank) "
+    "VALUES ('rank', 'bm25(10.0, 1.0)')",
+    """
+    CREATE TRIGGER reviews_title_fts_insert AFTER INSERT ON reviews_title
+    BEGIN
+        INSERT INTO reviews_title_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER reviews_title_fts_delete AFTER DELETE ON reviews_title
+    BEGIN
+        INSERT INTO reviews_title_fts(
+            reviews_title_fts, rowid, name, description
+        )
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER reviews_title_fts_update
+    AFTER UPDATE OF name, description ON reviews_title
+    BEGIN
+        INSERT INTO reviews_title_fts(
+            reviews_title_fts, rowid, name, description
+        )
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO reviews_title_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    "INSERT INTO reviews_title_fts(reviews_title_fts) VALUES ('rebuild')",
+    "INSERT INTO reviews_title_fts(reviews_title_fts) VALUES ('optimize')",
+)
+
+
+def recreate_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in DROP_SEARCH_INDEX_SQL + CREATE_SEARCH_INDEX_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0008_change_log"),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, recreate_search_index),
+        migrations.AlterField(
+            model_name="category",
+            name="name",
+            field=models.CharField(max_length=256, verbose_name="Название"),
+        ),
+        migrations.AlterField(
+            model_name="genre",
+            name="name",
+            field=models.CharField(max_length=256, verbose_name="Название"),
+        ),
+        migrations.AlterField(
+            model_name="title",
+            name="name",
+            field=models.CharField(max_length=256, verbose_name="Название"),
+        ),
+        migrations.RunPython(recreate_search_index, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,58 @@
 from django.conf import settings
-from django.db import models
+from django.db import DatabaseError, models, router, transaction
 
-from reviews.constants import NAME_MAX_LENGTH, SYMBOLS_FOR_TEXT_FIELD
+from reviews.constants import (
+    CHANGE_FIELD_MAX_LENGTH,
+    MAX_SCORE,
+    MIN_SCORE,
+    NAME_MAX_LENGTH,
+    SYMBOLS_FOR_TEXT_FIELD,
+)
+from reviews.search import FTS_TABLE, FullTextField
 from reviews.validators import validate_score, validate_year
 
 
+class CounterFieldsMixin:
+    """
+    Не даёт save() затереть счётчики, которые меняются атомарными UPDATE.
+
+    При сохранении существующего объекта без ``update_fields`` поля из
+    ``COUNTER_FIELDS`` и отложенные (``only()``/``defer()``) поля не
+    записываются: значение счётчика в памяти может быть устаревшим, если
+    он успел измениться параллельно. Если строку успели удалить,
+    поднимается ``DoesNotExist``, а не создаётся новая строка.
+    """
+
+    COUNTER_FIELDS = ()
+
+    def save(self, *args, **kwargs):
+        if self._state.adding or kwargs.get("update_fields") is not None:
+            return super().save(*args, **kwargs)
+        deferred = self.get_deferred_fields()
+        kwargs["update_fields"] = [
+            field.name
+            for field in self._meta.concrete_fields
+            if not field.primary_key
+            and field.name not in self.COUNTER_FIELDS
+            and field.attname not in deferred
+        ]
+        try:
+            super().save(*args, **kwargs)
+        except DatabaseError as error:
+            # Django поднимает сам DatabaseError, когда UPDATE с
+            # update_fields не нашёл строку; ошибки БД — его подклассы.
+            if type(error) is not DatabaseError:
+                raise
+            using = kwargs.get("using") or router.db_for_write(type(self))
+            if type(self)._base_manager.using(using).filter(
+                pk=self.pk
+            ).exists():
+                raise
+            raise self.DoesNotExist(
+                f"{self._meta.object_name} {self.pk} уже удалён(а)."
+            ) from None
+
+
 class CategoryGenreBase(models.Model):
     name = models.CharField("Название", max_length=NAME_MAX_LENGTH)
     slug = models.SlugField("Слаг", unique=True)
@@ -12,6 +60,9 @@ class CategoryGenreBase(models.Model):
     class Meta:
         abstract = True
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["name", "id"], name="%(class)s_name_idx")
+        ]
 
     def __str__(self):
         return self.name
@@ -48,27 +99,48 @@ class Genre(CategoryGenreBase):
         verbose_name_plural = "Жанры"
 
 
-class Title(models.Model):
+class Title(CounterFieldsMixin, models.Model):
     name = models.CharField("Название", max_length=NAME_MAX_LENGTH)
     year = models.SmallIntegerField(
         validators=[validate_year],
         verbose_name="Год выпуска",
     )
+    # Индекс по категории не нужен: category_id — первый столбец
+    # title_category_name_idx.
     category = models.ForeignKey(
         Category,
         on_delete=models.SET_NULL,
         verbose_name="Категория произведения",
         null=True,
+        db_index=False,
     )
     genre = models.ManyToManyField(
         Genre,
         verbose_name="Жанр произведения",
     )
     description = models.TextField("Описание произведения")
+    score_sum = models.PositiveIntegerField("Сумма оценок", default=0)
+    score_count = models.PositiveIntegerField("Количество оценок", default=0)
+    rating = models.FloatField("Рейтинг", null=True, blank=True)
+
+    # Рейтинг меняется только атомарными UPDATE из отзывов.
+    COUNTER_FIELDS = ("score_sum", "score_count", "rating")
 
     class Meta:
         ordering = ["name"]
         default_related_name = "titles"
+        # Список произведений отдаётся в порядке (name, id), в том числе
+        # при фильтрации по категории и году.
+        indexes = [
+            models.Index(fields=["name", "id"], name="title_name_idx"),
+            models.Index(
+                fields=["category", "name", "id"],
+                name="title_category_name_idx",
+            ),
+            models.Index(
+                fields=["year", "name", "id"], name="title_year_name_idx"
+            ),
+        ]
         verbose_name = "Произведение"
         verbose_name_plural = "Произведения"
 
@@ -76,16 +148,78 @@ class Title(models.Model):
         return self.name
 
 
-class Review(CommentReviewBase):
+class ScoreBucket(models.Model):
+    """Число отзывов с данной оценкой у произведения."""
+
+    title = models.ForeignKey(
+        Title, on_delete=models.CASCADE, verbose_name="Произведение"
+    )
+    score = models.PositiveSmallIntegerField("Оценка")
+    count = models.PositiveIntegerField("Количество отзывов", default=0)
+
+    class Meta:
+        default_related_name = "score_buckets"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["title", "score"], name="unique_score_bucket"
+            ),
+            models.CheckConstraint(
+                condition=models.Q(score__range=(MIN_SCORE, MAX_SCORE)),
+                name="score_bucket_range",
+            ),
+        ]
+        verbose_name = "Распределение оценок"
+        verbose_name_plural = "Распределения оценок"
+
+
+class TitleSearchIndex(models.Model):
+    """
+    Полнотекстовый индекс FTS5 по названию и описанию произведения.
+
+    Таблица и триггеры синхронизации создаются миграцией только в SQLite.
+    """
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column="rowid",
+        related_name="search_index",
+    )
+    name = models.TextField()
+    description = models.TextField()
+    document = FullTextField(db_column=FTS_TABLE)
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = FTS_TABLE
+
+
+class Review(CounterFieldsMixin, CommentReviewBase):
 
     score = models.PositiveSmallIntegerField(
         validators=[validate_score],
         verbose_name="Оценка",
     )
+    # Индекс по произведению не нужен: title_id — первый столбец
+    # review_title_pub_date_idx.
     title = models.ForeignKey(
-        Title, on_delete=models.CASCADE, verbose_name="Публикация"
+        Title,
+        on_delete=models.CASCADE,
+        verbose_name="Публикация",
+        db_index=False,
+    )
+    comments_count = models.PositiveIntegerField(
+        "Количество комментариев", default=0
+    )
+    last_comment_at = models.DateTimeField(
+        "Дата последнего комментария", null=True, blank=True
     )
 
+    # Счётчики комментариев меняются только атомарными UPDATE.
+    COUNTER_FIELDS = ("comments_count", "last_comment_at")
+
     class Meta(CommentReviewBase.Meta):
         default_related_name = "reviews"
         constraints = [
@@ -93,17 +227,107 @@ class Review(CommentReviewBase):
                 fields=["author", "title"], name="unique_review"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["title", "-pub_date", "id"],
+                name="review_title_pub_date_idx",
+            ),
+            models.Index(
+                fields=["title", "-comments_count", "id"],
+                name="review_discussed_idx",
+            ),
+        ]
         verbose_name = "Отзыв"
         verbose_name_plural = "Отзывы"
 
+    _saved_score = None
+    _saved_title_id = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_score()
+        return instance
+
+    def remember_score(self):
+        """Запоминает сохранённые оценку и произведение для пересчёта."""
+        self._saved_score = self.__dict__.get("score")
+        self._saved_title_id = self.__dict__.get("title_id")
+
+    def lock_saved_score(self):
+        """Блокирует строку отзыва и берёт сохранённую оценку из БД."""
+        row = (
+            Review.objects.select_for_update()
+            .filter(pk=self.pk)
+            .values_list("title_id", "score")
+            .first()
+        )
+        self._saved_title_id, self._saved_score = row or (None, None)
+        return row is not None
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(Review)
+        with transaction.atomic(using=using, savepoint=False):
+            if not self._state.adding and not self.lock_saved_score():
+                raise Review.DoesNotExist(f"Отзыв {self.pk} уже удалён.")
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(Review)
+        with transaction.atomic(using=using, savepoint=False):
+            if not self.lock_saved_score():
+                return 0, {}
+            return super().delete(*args, **kwargs)
+
 
 class Comment(CommentReviewBase):
 
+    # Индекс по отзыву не нужен: review_id — первый столбец
+    # comment_review_pub_date_idx.
     review = models.ForeignKey(
-        Review, on_delete=models.CASCADE, verbose_name="Отзыв"
+        Review,
+        on_delete=models.CASCADE,
+        verbose_name="Отзыв",
+        db_index=False,
     )
 
     class Meta(CommentReviewBase.Meta):
         default_related_name = "comments"
+        indexes = [
+            models.Index(
+                fields=["review", "-pub_date", "id"],
+                name="comment_review_pub_date_idx",
+            )
+        ]
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
+
+
+class Change(models.Model):
+    """Запись журнала изменений произведений, отзывов и комментариев."""
+
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    ACTIONS = (
+        (CREATED, "Создание"),
+        (UPDATED, "Изменение"),
+        (DELETED, "Удаление"),
+    )
+
+    model = models.CharField("Модель", max_length=CHANGE_FIELD_MAX_LENGTH)
+    object_id = models.PositiveBigIntegerField("Идентификатор объекта")
+    title_id = models.PositiveBigIntegerField("Произведение")
+    review_id = models.PositiveBigIntegerField("Отзыв", null=True, blank=True)
+    action = models.CharField(
+        "Действие", max_length=CHANGE_FIELD_MAX_LENGTH, choices=ACTIONS
+    )
+    created = models.DateTimeField("Дата записи", auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        verbose_name = "Изменение"
+        verbose_name_plural = "Журнал изменений"
+
+    def __str__(self):
+        return f"{self.model} {self.object_id}: {self.action}"
@@ -0,0 +1,53 @@
+from django.db import transaction
+
+from reviews.changes import record_changes
+from reviews.comments import recount_comments
+from reviews.models import Change, Comment, Review, Title
+from reviews.ratings import rebuild_ratings
+
+DELETE_CHUNK_SIZE = 500
+
+
+def delete_in_chunks(queryset, chunk_size=None):
+    """
+    Удаляет отзывы или комментарии из ``queryset`` пачками.
+
+    Идентификаторы выбираются одним запросом, после чего каждая пачка
+    удаляется в своей транзакции. Сигналы удаления не пересчитывают
+    счётчики по каждому объекту: после пачки оценки затронутых
+    произведений (или счётчики комментариев отзывов) пересчитываются
+    один раз, а в журнал изменений пишется одна вставка. Возвращает
+    идентификаторы удалённых объектов (без каскадных).
+    """
+    chunk_size = chunk_size or DELETE_CHUNK_SIZE
+    ids = list(queryset.order_by("pk").values_list("pk", flat=True))
+    deleted = []
+    for start in range(0, len(ids), chunk_size):
+        end = start + chunk_size
+        deleted.extend(delete_chunk(queryset.model, ids[start:end]))
+    return deleted
+
+
+@transaction.atomic
+def delete_chunk(model, ids):
+    if model is Review:
+        objects = Review.objects.filter(pk__in=ids).only("title_id")
+    else:
+        objects = Comment.objects.filter(pk__in=ids).select_related("review")
+        objects = objects.only("review_id", "review__title_id")
+    objects = list(objects)
+    if not objects:
+        return []
+    record_changes(objects, Change.DELETED)
+    chunk = model.objects.filter(pk__in=[obj.pk for obj in objects])
+    chunk.deferred_recount = True
+    chunk.delete()
+    if model is Review:
+        rebuild_ratings(
+            Title.objects.filter(pk__in={obj.title_id for obj in objects})
+        )
+    else:
+        recount_comments(
+            Review.objects.filter(pk__in={obj.review_id for obj in objects})
+        )
+    return [obj.pk for obj in objects]
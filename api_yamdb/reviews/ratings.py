@@ -0,0 +1,208 @@
+from django.db import connections, router
+from django.db.models import (
+    Case,
+    Count,
+    Exists,
+    F,
+    FloatField,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, Coalesce, Round
+from django.db.models.lookups import Exact
+
+from reviews.changes import record_title_updates, title_update_entry
+from reviews.constants import MAX_SCORE, MIN_SCORE
+from reviews.models import Review, ScoreBucket, Title
+from reviews.versions import bump_model_version
+
+
+def rating_expression(score_sum, score_count):
+    """Средняя оценка, округлённая до десятых; NULL, если оценок нет."""
+    return Case(
+        When(Exact(score_count, 0), then=Value(None)),
+        default=Round(Cast(score_sum, FloatField()) / score_count, 1),
+        output_field=FloatField(),
+    )
+
+
+def apply_score_delta(title_id, sum_delta, count_delta):
+    """
+    Атомарно меняет сумму и количество оценок произведения.
+
+    Все поля считаются одним UPDATE от текущих значений в БД,
+    поэтому параллельные отзывы не затирают друг друга. Изменение
+    рейтинга попадает в журнал изменений как изменение произведения.
+    """
+    if not sum_delta and not count_delta:
+        return
+    new_sum = F("score_sum") + sum_delta
+    new_count = F("score_count") + count_delta
+    if Title.objects.filter(pk=title_id).update(
+        score_sum=new_sum,
+        score_count=new_count,
+        rating=rating_expression(new_sum, new_count),
+    ):
+        title_update_entry(title_id).save()
+    bump_model_version(Title)
+
+
+def apply_bucket_delta(title_id, score, delta):
+    """
+    Атомарно меняет число отзывов с оценкой ``score`` у произведения.
+
+    Прибавление делается одним INSERT ... ON CONFLICT DO UPDATE (SQLite и
+    PostgreSQL), поэтому строка распределения заводится при первом
+    отзыве с такой оценкой без гонки между параллельными запросами.
+    Старую оценку передаёт сигнал из заблокированной строки отзыва
+    (``Review.lock_saved_score``), а не из копии в памяти.
+    """
+    if delta < 0:
+        ScoreBucket.objects.filter(title_id=title_id, score=score).update(
+            count=F("count") + delta
+        )
+        return
+    connection = connections[router.db_for_write(ScoreBucket)]
+    table, title, score_column, count = map(
+        connection.ops.quote_name,
+        (ScoreBucket._meta.db_table, "title_id", "score", "count"),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({title}, {score_column}, {count}) "
+            f"VALUES (%s, %s, %s) "
+            f"ON CONFLICT ({title}, {score_column}) "
+            f"DO UPDATE SET {count} = {table}.{count} + excluded.{count}",
+            [title_id, score, delta],
+        )
+
+
+def get_score_distributions(title_ids):
+    """
+    Распределения оценок ``{title_id: {оценка: число отзывов}}``.
+
+    Один запрос с LEFT JOIN: произведения без отзывов получают нули,
+    несуществующих произведений в результате нет.
+    """
+    rows = Title.objects.filter(pk__in=title_ids).values_list(
+        "pk", "score_buckets__score", "score_buckets__count"
+    )
+    distributions = {}
+    for title_id, score, count in rows:
+        distribution = distributions.setdefault(
+            title_id, dict.fromkeys(range(MIN_SCORE, MAX_SCORE + 1), 0)
+        )
+        if score is not None:
+            distribution[score] = count
+    return distributions
+
+
+def rebuild_score_buckets(queryset=None):
+    """Пересчитывает распределения оценок с нуля по отзывам."""
+    reviews = Review.objects.all()
+    buckets = ScoreBucket.objects.all()
+    if queryset is not None:
+        reviews = reviews.filter(title__in=queryset)
+        buckets = buckets.filter(title__in=queryset)
+    buckets.delete()
+    ScoreBucket.objects.bulk_create(
+        ScoreBucket(title_id=row["title"], score=row["score"], count=row["n"])
+        for row in reviews.values("title", "score")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+
+
+def _review_totals():
+    reviews = Review.objects.filter(title=OuterRef("pk")).values("title")
+    score_sum = Coalesce(
+        Subquery(reviews.annotate(total=Sum("score")).values("total")),
+        0,
+        output_field=IntegerField(),
+    )
+    score_count = Coalesce(
+        Subquery(reviews.annotate(total=Count("id")).values("total")),
+        0,
+        output_field=IntegerField(),
+    )
+    return score_sum, score_count
+
+
+def find_rating_drift(queryset=None):
+    """Произведения, у которых сохранённые оценки расходятся с отзывами."""
+    if queryset is None:
+        queryset = Title.objects.all()
+    score_sum, score_count = _review_totals()
+    return (
+        queryset.annotate(actual_sum=score_sum, actual_count=score_count)
+        .filter(
+            ~Q(score_sum=F("actual_sum")) | ~Q(score_count=F("actual_count"))
+        )
+        .order_by("pk")
+    )
+
+
+def find_bucket_drift(queryset=None):
+    """
+    Произведения, у которых распределение оценок расходится с отзывами.
+
+    Расхождение — строка распределения с числом, не равным числу
+    отзывов с этой оценкой, или отзыв, для оценки которого строки нет.
+    """
+    if queryset is None:
+        queryset = Title.objects.all()
+    actual_count = Coalesce(
+        Subquery(
+            Review.objects.filter(
+                title=OuterRef("title"), score=OuterRef("score")
+            )
+            .values("title")
+            .annotate(total=Count("id"))
+            .values("total")
+        ),
+        0,
+        output_field=IntegerField(),
+    )
+    wrong_buckets = (
+        ScoreBucket.objects.filter(title=OuterRef("pk"))
+        .annotate(actual_count=actual_count)
+        .exclude(count=F("actual_count"))
+    )
+    missing_buckets = Review.objects.filter(title=OuterRef("pk")).exclude(
+        Exists(
+            ScoreBucket.objects.filter(
+                title=OuterRef("title"), score=OuterRef("score")
+            )
+        )
+    )
+    return queryset.filter(
+        Exists(wrong_buckets) | Exists(missing_buckets)
+    ).order_by("pk")
+
+
+def rebuild_ratings(queryset=None):
+    """
+    Пересчитывает оценки с нуля одним UPDATE, возвращает число строк.
+
+    Распределения оценок по произведениям пересчитываются заодно. В
+    журнал изменений попадают только произведения, оценки которых
+    расходились с отзывами.
+    """
+    if queryset is None:
+        queryset = Title.objects.all()
+    changed = list(find_rating_drift(queryset).values_list("pk", flat=True))
+    score_sum, score_count = _review_totals()
+    updated = queryset.update(
+        score_sum=score_sum,
+        score_count=score_count,
+        rating=rating_expression(score_sum, score_count),
+    )
+    rebuild_score_buckets(queryset)
+    record_title_updates(changed)
+    bump_model_version(Title)
+    return updated
@@ -0,0 +1,113 @@
+import re
+
+from django.db import connection, models
+from django.db.models import F, Lookup, Q
+
+from reviews.versions import bump_model_version
+
+FTS_TABLE = "reviews_title_fts"
+# Совпадение в названии весит больше, чем в описании.
+FTS_RANK = "bm25(10.0, 1.0)"
+TOKEN_REGEX = re.compile(r"(\w+)(\*?)")
+# Порядок результатов поиска; по нему же строится курсор пагинации.
+SEARCH_ORDERING = ("search_rank", "id")
+
+
+class FullTextField(models.TextField):
+    """Скрытый столбец FTS5-таблицы, по которому выполняется MATCH."""
+
+
+@FullTextField.register_lookup
+class Match(Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", lhs_params + rhs_params
+
+
+def is_search_supported():
+    return connection.vendor == "sqlite"
+
+
+def build_match_query(text):
+    """
+    Переводит пользовательский запрос в синтаксис FTS5.
+
+    Каждое слово берётся в кавычки, чтобы операторы FTS5 из ввода не
+    ломали запрос; звёздочка после слова включает поиск по префиксу.
+    Пустая строка означает, что искать нечего.
+    """
+    return " ".join(
+        f'"{word}"{star}' for word, star in TOKEN_REGEX.findall(text)
+    )
+
+
+def search_titles(queryset, text):
+    """Произведения по запросу, от более релевантных к менее."""
+    if not is_search_supported():
+        return queryset.filter(
+            Q(name__icontains=text) | Q(description__icontains=text)
+        )
+    match_query = build_match_query(text)
+    if not match_query:
+        return queryset.none()
+    return (
+        queryset.filter(search_index__document__match=match_query)
+        .annotate(search_rank=F("search_index__rank"))
+        .order_by(*SEARCH_ORDERING)
+    )
+
+
+# Тот же SQL скопирован в миграции 0003_title_search_index и
+# 0007_access_path_indexes: его изменение требует новой миграции.
+SEARCH_INDEX_SQL = (
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        name, description,
+        content='reviews_title', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) "
+    f"VALUES ('rank', '{FTS_RANK}')",
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON reviews_title
+    BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON reviews_title
+    BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_update
+    AFTER UPDATE OF name, description ON reviews_title
+    BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+)
+REBUILD_SQL = (
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')",
+)
+
+
+def rebuild_search_index(using=connection):
+    """Перестраивает индекс по текущему содержимому таблицы произведений."""
+    from reviews.models import Title
+
+    with using.cursor() as cursor:
+        for statement in REBUILD_SQL:
+            cursor.execute(statement)
+    bump_model_version(Title)
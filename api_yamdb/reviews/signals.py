@@ -0,0 +1,156 @@
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from reviews.changes import record_change
+from reviews.comments import apply_comment_added, recount_comments
+from reviews.models import (
+    Category,
+    Change,
+    Comment,
+    Genre,
+    Review,
+    Title,
+)
+from reviews.ratings import apply_bucket_delta, apply_score_delta
+from reviews.versions import bump_model_version
+
+User = get_user_model()
+
+VERSIONED_MODELS = (Category, Genre, Title, Review, Comment, User)
+LOGGED_MODELS = (Title, Review, Comment)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    if created or instance._saved_title_id is None:
+        apply_score_delta(instance.title_id, instance.score, 1)
+        apply_bucket_delta(instance.title_id, instance.score, 1)
+    elif instance._saved_title_id != instance.title_id:
+        apply_score_delta(instance._saved_title_id, -instance._saved_score, -1)
+        apply_bucket_delta(instance._saved_title_id, instance._saved_score, -1)
+        apply_score_delta(instance.title_id, instance.score, 1)
+        apply_bucket_delta(instance.title_id, instance.score, 1)
+    elif instance._saved_score != instance.score:
+        apply_score_delta(
+            instance.title_id, instance.score - instance._saved_score, 0
+        )
+        apply_bucket_delta(instance.title_id, instance._saved_score, -1)
+        apply_bucket_delta(instance.title_id, instance.score, 1)
+    instance.remember_score()
+
+
+def is_deferred_recount(origin):
+    """
+    Удаление пачкой, после которого пересчёт делает вызывающий код.
+
+    ``reviews.moderation`` помечает так удаляемый QuerySet: оценки,
+    счётчики комментариев и журнал изменений обновляются один раз на
+    пачку, а не в сигнале по каждому объекту.
+    """
+    return getattr(origin, "deferred_recount", False)
+
+
+def is_cascade(origin, instance, models):
+    """
+    ``instance`` удаляется каскадом вместе с объектом одной из ``models``.
+
+    Удаление начинается с объекта (``title.delete()``) или с QuerySet
+    (``Title.objects.filter(...).delete()``, действие админки); во втором
+    случае проверяется модель QuerySet.
+    """
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(model, models) and not isinstance(instance, model)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, origin=None, **kwargs):
+    if is_cascade(origin, instance, Title):
+        return
+    if is_deferred_recount(origin):
+        return
+    title_id = instance._saved_title_id or instance.title_id
+    score = instance._saved_score or instance.score
+    apply_score_delta(title_id, -score, -1)
+    apply_bucket_delta(title_id, score, -1)
+
+
+@receiver(post_save, sender=Comment)
+def update_comment_counters_on_save(sender, instance, created, **kwargs):
+    if created:
+        apply_comment_added(instance.review_id, instance.pub_date)
+
+
+@receiver(post_delete, sender=Comment)
+def update_comment_counters_on_delete(sender, instance, origin=None, **kwargs):
+    # Комментарии удаляются каскадом вместе с отзывом или произведением,
+    # тогда пересчитывать нечего. При удалении пачкой (например, вместе
+    # с пользователем) каждый отзыв пересчитывается один раз: к моменту
+    # сигнала все комментарии пачки уже удалены.
+    if is_cascade(origin, instance, (Review, Title)):
+        return
+    if is_deferred_recount(origin):
+        return
+    recounted = getattr(origin, "_recounted_reviews", None)
+    if recounted is None:
+        recounted = set()
+        if origin is not None:
+            origin._recounted_reviews = recounted
+    if instance.review_id not in recounted:
+        recounted.add(instance.review_id)
+        recount_comments(Review.objects.filter(pk=instance.review_id))
+
+
+def bump_version_on_save(sender, **kwargs):
+    bump_model_version(sender)
+
+
+def bump_version_on_delete(sender, origin=None, **kwargs):
+    # При каскадном удалении сигнал приходит на каждый объект, а версию
+    # модели достаточно поднять один раз на всю операцию.
+    bumped = getattr(origin, "_bumped_versions", None)
+    if bumped is None:
+        bumped = set()
+        if origin is not None:
+            origin._bumped_versions = bumped
+    if sender not in bumped:
+        bumped.add(sender)
+        bump_model_version(sender)
+
+
+def record_change_on_save(sender, instance, created, **kwargs):
+    record_change(instance, Change.CREATED if created else Change.UPDATED)
+
+
+def record_change_on_delete(sender, instance, origin=None, **kwargs):
+    # Удаление произведения или отзыва означает и удаление всего, что к
+    # ним относится, поэтому каскадные удаления в журнал не пишутся.
+    # Удаления вместе с пользователем записываются по каждому объекту.
+    # Сигнал pre_delete нужен, чтобы отзыв удаляемого комментария ещё был
+    # в БД: из него берётся произведение для записи журнала.
+    if is_cascade(origin, instance, (Title, Review)):
+        return
+    if is_deferred_recount(origin):
+        return
+    record_change(instance, Change.DELETED)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def bump_version_on_genre_change(sender, action, **kwargs):
+    if action.startswith("post_"):
+        bump_model_version(Title)
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_version_on_save, sender=model)
+    post_delete.connect(bump_version_on_delete, sender=model)
+
+for model in LOGGED_MODELS:
+    post_save.connect(record_change_on_save, sender=model)
+    pre_delete.connect(record_change_on_delete, sender=model)
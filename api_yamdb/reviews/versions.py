@@ -0,0 +1,81 @@
+from time import time, time_ns
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.db import transaction
+
+VERSION_KEY = "model-version:{}"
+MODIFIED_KEY = "model-modified:{}"
+
+
+def get_cache():
+    """Кэш для версий моделей и данных, которые от них зависят."""
+    return caches[getattr(settings, "API_CACHE_ALIAS", DEFAULT_CACHE_ALIAS)]
+
+
+def version_key(model):
+    return VERSION_KEY.format(model._meta.label_lower)
+
+
+def modified_key(model):
+    return MODIFIED_KEY.format(model._meta.label_lower)
+
+
+def get_model_state(*models):
+    """
+    Версии моделей и время последней записи в них (в секундах).
+
+    Версия — счётчик, который растёт при любой записи в модель, поэтому
+    ключ с версией перестаёт совпадать сразу после изменения данных.
+    Время записи хранится рядом отдельным ключом и читается тем же
+    ``get_many``. Отсутствующие значения заводятся от текущего времени:
+    версия — чтобы после вытеснения из кэша не совпасть со старыми
+    ключами, время — чтобы не оказаться раньше настоящей записи.
+    """
+    cache = get_cache()
+    keys = [version_key(model) for model in models]
+    times = [modified_key(model) for model in models]
+    values = cache.get_many(keys + times)
+    for key in keys:
+        if key not in values:
+            initial = time_ns()
+            cache.add(key, initial, timeout=None)
+            values[key] = cache.get(key, initial)
+    for key in times:
+        if key not in values:
+            initial = int(time())
+            cache.add(key, initial, timeout=None)
+            values[key] = cache.get(key, initial)
+    modified_at = max((values[key] for key in times), default=None)
+    return [values[key] for key in keys], modified_at
+
+
+def get_model_versions(*models):
+    """Текущие версии моделей для ключей кэша."""
+    return get_model_state(*models)[0]
+
+
+def bump_model_version(*models):
+    """
+    Поднимает версии моделей после фиксации транзакции.
+
+    До коммита параллельный запрос ещё видит старые данные и мог бы
+    закэшировать их уже под новой версией. Версия увеличивается
+    атомарным ``incr``, поэтому одновременные записи не теряют подъёмы;
+    время записи просто перезаписывается текущим.
+    """
+
+    def bump():
+        cache = get_cache()
+        for model in models:
+            key = version_key(model)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, time_ns(), timeout=None)
+        now = int(time())
+        cache.set_many(
+            {modified_key(model): now for model in models}, timeout=None
+        )
+
+    transaction.on_commit(bump)
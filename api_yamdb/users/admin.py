@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
-from users.models import User
+from users.models import OutgoingEmail, User
 
 
 @admin.register(User)
@@ -35,3 +35,19 @@ class DefaultUserAdmin(UserAdmin):
     add_fieldsets = UserAdmin.add_fieldsets + (
         ("Дополнительная информация", {"fields": ("bio", "role")}),
     )
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "recipient",
+        "subject",
+        "created",
+        "attempts",
+        "next_attempt_at",
+        "sent_at",
+    )
+    search_fields = ("recipient",)
+    ordering = ("-id",)
+    readonly_fields = ("created", "attempts", "sent_at", "last_error")
@@ -0,0 +1,47 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from users.outbox import BATCH_SIZE, send_batch
+
+
+class Command(BaseCommand):
+    """
+    Отправка писем из очереди (outbox).
+
+    Письма отправляются пачками через одно соединение с почтовым
+    сервером. Без ``--once`` команда работает постоянно и, когда очередь
+    пуста, закрывает соединение и ждёт ``--interval`` секунд.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Отправить письма, срок которых подошёл, и завершиться.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Пауза в секундах, когда очередь пуста.",
+        )
+
+    def handle(self, *args, **options):
+        connection = get_connection()
+        try:
+            while True:
+                sent, failed = send_batch(connection, options["batch_size"])
+                if sent or failed:
+                    self.stdout.write(
+                        f"Отправлено писем: {sent}, отложено: {failed}"
+                    )
+                    continue
+                if options["once"]:
+                    break
+                connection.close()
+                time.sleep(options["interval"])
+        finally:
+            connection.close()
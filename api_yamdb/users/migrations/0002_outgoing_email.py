@@ -0,0 +1,84 @@
+# Generated by Django 5.1.1 on 2026-10-18 20:51
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutgoingEmail",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "recipient",
+                    models.EmailField(
+                        max_length=254, verbose_name="Получатель"
+                    ),
+                ),
+                (
+                    "subject",
+                    models.CharField(max_length=255, verbose_name="Тема"),
+                ),
+                ("body", models.TextField(verbose_name="Текст")),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Дата создания"
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Попыток отправки"
+                    ),
+                ),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(
+                        blank=True,
+                        default=django.utils.timezone.now,
+                        null=True,
+                        verbose_name="Следующая попытка",
+                    ),
+                ),
+                (
+                    "sent_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Дата отправки"
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(
+                        blank=True, verbose_name="Последняя ошибка"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Исходящее письмо",
+                "verbose_name_plural": "Исходящие письма",
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("sent_at__isnull", True)),
+                        fields=["next_attempt_at", "id"],
+                        name="outgoing_email_pending_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.1 on 2026-10-18 21:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_outgoing_email"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="token_epoch",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Эпоха токенов"
+            ),
+        ),
+    ]
@@ -1,22 +1,44 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
 
 from reviews.constants import (
     EMAIL_MAX_LENGTH,
+    EMAIL_SUBJECT_MAX_LENGTH,
     FIRST_LAST_NAME_MAX_LENGTH,
     ROLE_MAX_LENGTH,
     USERNAME_MAX_LENGTH,
 )
 
 
-class User(AbstractUser):
-    """Кастомная модель юзера."""
+class RoleMixin:
+    """
+    Роли пользователя и проверки по ним.
+
+    Проверки читают только атрибуты ``role`` и ``is_superuser``, поэтому
+    одинаково работают у модели и у пользователя, восстановленного из
+    клеймов токена (``api.authentication.ClaimsUser``).
+    """
 
     ADMIN = "admin"
     MODERATOR = "moderator"
     USER = "user"
 
     ROLE_CHOISES = ((ADMIN, "admin"), (MODERATOR, "moderator"), (USER, "user"))
+
+    @property
+    def is_admin(self):
+        return self.role == self.ADMIN or bool(self.is_superuser)
+
+    @property
+    def is_moderator(self):
+        return self.role == self.MODERATOR
+
+
+class User(RoleMixin, AbstractUser):
+    """Кастомная модель юзера."""
+
     username = models.CharField(
         max_length=USERNAME_MAX_LENGTH,
         unique=True,
@@ -36,25 +58,105 @@ class User(AbstractUser):
     role = models.CharField(
         "Роль",
         max_length=ROLE_MAX_LENGTH,
-        choices=ROLE_CHOISES,
-        default=USER,
+        choices=RoleMixin.ROLE_CHOISES,
+        default=RoleMixin.USER,
     )
     bio = models.TextField("Биография", blank=True)
+    token_epoch = models.PositiveIntegerField(
+        "Эпоха токенов", default=0, editable=False
+    )
+
+    _saved_claims = None
 
     class Meta:
         ordering = [
             "username",
         ]
+        # Поиск по началу username и email без учёта регистра
+        # (users.search) читает эти индексы.
+        indexes = [
+            models.Index(Lower("username"), name="user_username_lower_idx"),
+            models.Index(Lower("email"), name="user_email_lower_idx"),
+        ]
         verbose_name = "Пользователь"
         verbose_name_plural = "Пользователи"
 
     def __str__(self):
         return self.username
 
-    @property
-    def is_admin(self):
-        return self.role == self.ADMIN or self.is_superuser
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_claims()
+        return instance
 
-    @property
-    def is_moderator(self):
-        return self.role == self.MODERATOR
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.remember_claims()
+
+    def token_claims(self):
+        """Поля, которые попадают в токен или разрешают его выдачу."""
+        return tuple(
+            self.__dict__.get(field)
+            for field in ("role", "is_superuser", "is_active")
+        )
+
+    def remember_claims(self):
+        """Запоминает сохранённые роль и права для сравнения при записи."""
+        self._saved_claims = self.token_claims()
+
+    def save(self, *args, **kwargs):
+        # Токены несут роль в клеймах, поэтому её смена (через API или
+        # админку) поднимает эпоху токенов: выданные раньше токены с
+        # устаревшей ролью больше не принимаются. Эпоха увеличивается в
+        # самом UPDATE, чтобы одновременные изменения не потеряли подъём.
+        bump_epoch = (
+            self._saved_claims is not None
+            and self._saved_claims != self.token_claims()
+        )
+        if bump_epoch:
+            self.token_epoch = models.F("token_epoch") + 1
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "token_epoch"}
+        super().save(*args, **kwargs)
+        if bump_epoch:
+            self.refresh_from_db(fields=["token_epoch"])
+        self.remember_claims()
+
+
+class OutgoingEmail(models.Model):
+    """
+    Письмо в очереди на отправку (outbox).
+
+    Письмо сохраняется в транзакции запроса, а отправляет его команда
+    ``send_emails``. ``next_attempt_at`` — время следующей попытки;
+    ``None`` означает, что попытки исчерпаны.
+    """
+
+    recipient = models.EmailField("Получатель", max_length=EMAIL_MAX_LENGTH)
+    subject = models.CharField("Тема", max_length=EMAIL_SUBJECT_MAX_LENGTH)
+    body = models.TextField("Текст")
+    created = models.DateTimeField("Дата создания", auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField("Попыток отправки", default=0)
+    next_attempt_at = models.DateTimeField(
+        "Следующая попытка", null=True, blank=True, default=timezone.now
+    )
+    sent_at = models.DateTimeField("Дата отправки", null=True, blank=True)
+    last_error = models.TextField("Последняя ошибка", blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        # Очередь читается по неотправленным письмам в порядке попыток.
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at", "id"],
+                condition=models.Q(sent_at__isnull=True),
+                name="outgoing_email_pending_idx",
+            )
+        ]
+        verbose_name = "Исходящее письмо"
+        verbose_name_plural = "Исходящие письма"
+
+    def __str__(self):
+        return f"{self.recipient}: {self.subject}"
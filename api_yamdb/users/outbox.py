@@ -0,0 +1,112 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db.models import F
+from django.utils import timezone
+
+from users.models import OutgoingEmail
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = timedelta(minutes=1)
+RETRY_MAX_DELAY = timedelta(hours=1)
+# Пока пачка отправляется, её письма не выбираются повторно; если
+# отправитель упал, письма вернутся в очередь по истечении этого срока.
+SEND_LEASE = timedelta(minutes=5)
+
+
+def enqueue_email(subject, body, recipient):
+    """
+    Ставит письмо в очередь на отправку.
+
+    Вызывается в транзакции запроса: письмо появится в очереди, только
+    если транзакция зафиксирована.
+    """
+    return OutgoingEmail.objects.create(
+        subject=subject, body=body, recipient=recipient
+    )
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед попыткой номер ``attempts + 1``."""
+    return min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+
+
+def pending_emails(now=None):
+    """Неотправленные письма, срок попытки которых подошёл."""
+    return OutgoingEmail.objects.filter(
+        sent_at__isnull=True,
+        next_attempt_at__lte=now or timezone.now(),
+    ).order_by("next_attempt_at", "id")
+
+
+def send_batch(connection, batch_size=None):
+    """
+    Отправляет пачку писем из очереди через соединение ``connection``.
+
+    Соединение открывается один раз и остаётся открытым для следующих
+    пачек; после ошибки оно закрывается и переоткрывается на следующем
+    письме. Каждое письмо перед отправкой захватывается условным UPDATE:
+    если другой отправитель уже взял его, письмо пропускается. Отправленное
+    письмо отмечается сразу, поэтому падение посреди пачки не приводит к
+    повторной отправке. Любая ошибка отправки откладывает письмо с
+    экспоненциальной задержкой, после ``MAX_ATTEMPTS`` попыток письмо
+    больше не отправляется. Возвращает пару (отправлено, не отправлено).
+    """
+    now = timezone.now()
+    batch = list(pending_emails(now)[: batch_size or BATCH_SIZE])
+    sent = failed = 0
+    for email in batch:
+        if not claim(email, now):
+            continue
+        try:
+            connection.open()
+            connection.send_messages(
+                [
+                    EmailMessage(
+                        subject=email.subject,
+                        body=email.body,
+                        from_email=settings.DEFAULT_FROM_EMAIL,
+                        to=[email.recipient],
+                    )
+                ]
+            )
+        except Exception as error:
+            connection.close()
+            postpone(email, error)
+            failed += 1
+        else:
+            OutgoingEmail.objects.filter(pk=email.pk).update(
+                sent_at=timezone.now(), last_error=""
+            )
+            sent += 1
+    return sent, failed
+
+
+def claim(email, now):
+    """
+    Захватывает письмо для отправки на ``SEND_LEASE``.
+
+    UPDATE срабатывает, только если письмо всё ещё не отправлено и срок
+    попытки не отодвинут другим отправителем; по числу изменённых строк
+    видно, досталось ли письмо этому отправителю.
+    """
+    claimed = OutgoingEmail.objects.filter(
+        pk=email.pk, sent_at__isnull=True, next_attempt_at__lte=now
+    ).update(attempts=F("attempts") + 1, next_attempt_at=now + SEND_LEASE)
+    if not claimed:
+        return False
+    email.attempts += 1
+    return True
+
+
+def postpone(email, error):
+    if email.attempts >= MAX_ATTEMPTS:
+        next_attempt_at = None
+    else:
+        next_attempt_at = timezone.now() + retry_delay(email.attempts)
+    OutgoingEmail.objects.filter(pk=email.pk).update(
+        next_attempt_at=next_attempt_at,
+        last_error=f"{type(error).__name__}: {error}",
+    )
@@ -0,0 +1,71 @@
+import string
+import sys
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+SEARCH_FIELDS = ("username", "email")
+# LOWER() в SQLite без расширения ICU меняет регистр только у ASCII-букв.
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+# Коды суррогатов UTF-16: одиночный суррогат не бывает символом строки.
+SURROGATES = (0xD800, 0xDFFF)
+
+
+def db_lower(text):
+    """Строка в нижнем регистре так, как её приводит LOWER() в БД."""
+    if connection.vendor == "sqlite":
+        return text.translate(ASCII_LOWER)
+    return text.lower()
+
+
+def prefix_range(field, prefix):
+    """
+    Условие «``field`` начинается с ``prefix``» в виде диапазона.
+
+    Диапазон ``[prefix, prefix с увеличенным последним символом)`` по
+    ``LOWER(field)`` читается по функциональному индексу, в отличие от
+    LIKE, который SQLite по выражению не оптимизирует. Диапазон верен
+    только при побайтовом сравнении строк (BINARY в SQLite): при
+    сравнении по правилам языка в него попадают не те строки. Если
+    следующий символ получить нельзя (последний символ Unicode или
+    суррогат), верхней границы нет, а начало строки проверяется LIKE.
+    """
+    condition = Q(**{f"{field}__gte": prefix})
+    next_code = ord(prefix[-1]) + 1
+    low, high = SURROGATES
+    if next_code > sys.maxunicode or low <= next_code <= high:
+        return condition & Q(**{f"{field}__startswith": prefix})
+    upper = prefix[:-1] + chr(next_code)
+    return condition & Q(**{f"{field}__lt": upper})
+
+
+def is_prefix_range_supported():
+    # Только в SQLite строки по умолчанию сравниваются побайтово (BINARY).
+    return connection.vendor == "sqlite"
+
+
+def search_users(queryset, text):
+    """
+    Пользователи, у которых username или email начинается с ``text``.
+
+    Регистр не учитывается. Условия по двум полям объединяются через OR,
+    и каждое читается по своему индексу ``LOWER(...)``, поэтому поиск не
+    просматривает всю таблицу пользователей. В других БД сравнение строк
+    зависит от правил сортировки, и поиск идёт через ``istartswith``.
+    """
+    text = text.strip()
+    if not text:
+        return queryset
+    if not is_prefix_range_supported():
+        condition = Q()
+        for field in SEARCH_FIELDS:
+            condition |= Q(**{f"{field}__istartswith": text})
+        return queryset.filter(condition)
+    prefix = db_lower(text)
+    condition = Q()
+    for field in SEARCH_FIELDS:
+        condition |= prefix_range(f"{field}_lower", prefix)
+    return queryset.alias(
+        **{f"{field}_lower": Lower(field) for field in SEARCH_FIELDS}
+    ).filter(condition)
@@ -28,4 +28,8 @@ if FILENAME not in project_dir_content:
 
 pytest_plugins = [
     'tests.fixtures.fixture_user',
+    'tests.fixtures.fixture_cache',
+    'tests.fixtures.fixture_db',
+    'tests.fixtures.fixture_queries',
+    'tests.fixtures.fixture_content',
 ]
@@ -0,0 +1,17 @@
+import pytest
+
+from tests.utils import create_comments
+
+
+@pytest.fixture
+def content(admin_client, admin, user_client, user, moderator_client,
+            moderator):
+    """
+    Произведения, отзывы и комментарии администратора, пользователя и
+    модератора: кортеж ``(comments, reviews, titles)``.
+    """
+    return create_comments(admin_client, {
+        admin: admin_client,
+        user: user_client,
+        moderator: moderator_client,
+    })
@@ -0,0 +1,15 @@
+import pytest
+from django.conf import settings
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(
+    django_db_modify_db_settings_parallel_suffix, tmp_path_factory
+):
+    # Тестовая SQLite в памяти блокирует таблицы между потоками вместо
+    # ожидания, а файловая ведёт себя как рабочая база.
+    database = settings.DATABASES['default']
+    if database['ENGINE'] == 'django.db.backends.sqlite3':
+        database.setdefault('TEST', {})['NAME'] = str(
+            tmp_path_factory.mktemp('db') / 'test.sqlite3'
+        )
@@ -0,0 +1,29 @@
+from contextlib import contextmanager
+
+import pytest
+
+from api.instrumentation import profile_queries
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Проверка запросов к БД внутри блока ``with query_budget(n):``.
+
+    Тест падает, если запросов больше ``n`` или одна и та же форма
+    SELECT выполнялась несколько раз (N+1), если это не разрешено
+    параметром ``allow_repeated``.
+    """
+
+    @contextmanager
+    def check(budget, allow_repeated=False):
+        with profile_queries() as profile:
+            yield profile
+        assert profile.count <= budget, (
+            f'Превышен бюджет запросов к БД ({budget}).\n{profile.report()}'
+        )
+        assert allow_repeated or not profile.repeated, (
+            f'Найдены повторяющиеся запросы (N+1).\n{profile.report()}'
+        )
+
+    return check
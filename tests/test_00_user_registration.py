@@ -1,7 +1,9 @@
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
 from django.core import mail
+from django.core.management import call_command
 from django.db.utils import IntegrityError
 
 from tests.utils import (
@@ -112,6 +114,12 @@ class Test00UserRegistration:
         }
 
         response = client.post(self.URL_SIGNUP, data=valid_data)
+        # Письмо ставится в очередь и отправляется командой send_emails.
+        assert len(mail.outbox) == outbox_before_count, (
+            f'Проверьте, что POST-запрос к `{self.URL_SIGNUP}` не отправляет '
+            'письмо сам, а ставит его в очередь.'
+        )
+        call_command('send_emails', '--once', stdout=StringIO())
         outbox_after = mail.outbox  # email outbox after user create
 
         assert response.status_code != HTTPStatus.NOT_FOUND, (
@@ -356,3 +356,39 @@ class Test04TitleAPI:
             f'Проверьте, что PUT-запрос к `{self.TITLES_DETAIL_URL_TEMPLATE} '
             'не предусмотрен и возвращает статус 405.'
         )
+
+    def test_07_titles_malformed_slugs(self, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        data = {
+            'name': 'Чапаев',
+            'year': 1934,
+            'genre': [genres[0]['slug']],
+            'category': categories[0]['slug'],
+        }
+        invalid_values = (
+            {'category': ['a']},
+            {'category': {'a': 1}},
+            {'genre': [['a']]},
+            {'genre': [{'a': 1}]},
+        )
+        for invalid in invalid_values:
+            response = admin_client.post(
+                self.TITLES_URL, data={**data, **invalid}, format='json'
+            )
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                'Проверьте, что POST-запрос администратора к '
+                f'`{self.TITLES_URL}` с категорией или жанром не строкой '
+                'возвращает ответ со статусом 400.'
+            )
+            response = admin_client.patch(
+                self.TITLES_DETAIL_URL_TEMPLATE.format(
+                    title_id=titles[0]['id']
+                ),
+                data=invalid,
+                format='json',
+            )
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                'Проверьте, что PATCH-запрос администратора к '
+                f'`{self.TITLES_DETAIL_URL_TEMPLATE}` с категорией или '
+                'жанром не строкой возвращает ответ со статусом 400.'
+            )
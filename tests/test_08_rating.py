@@ -0,0 +1,103 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from reviews.models import Review, Title
+from tests.utils import create_reviews, create_single_review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def get_title(self, title_id):
+        return Title.objects.get(pk=title_id)
+
+    def test_01_rating_follows_reviews(self, admin_client, admin, user_client,
+                                       user, moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        title = self.get_title(title_id)
+        assert (title.score_sum, title.score_count) == (15, 3), (
+            'Проверьте, что при создании отзыва обновляются сумма и '
+            'количество оценок произведения.'
+        )
+        assert title.rating == 5
+
+        user_review = next(
+            review for review in reviews if review['author'] == user.username
+        )
+        user_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=user_review['id']
+            ),
+            data={'score': 10}
+        )
+        title = self.get_title(title_id)
+        assert (title.score_sum, title.score_count) == (20, 3), (
+            'Проверьте, что при изменении оценки отзыва пересчитывается '
+            'рейтинг произведения.'
+        )
+        assert title.rating == 6.7
+
+        user_client.delete(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=user_review['id']
+            )
+        )
+        title = self.get_title(title_id)
+        assert (title.score_sum, title.score_count) == (10, 2), (
+            'Проверьте, что при удалении отзыва пересчитывается рейтинг '
+            'произведения.'
+        )
+
+        moderator.delete()
+        admin.delete()
+        title = self.get_title(title_id)
+        assert (title.score_sum, title.score_count) == (0, 0), (
+            'Проверьте, что при каскадном удалении отзывов вместе с автором '
+            'пересчитывается рейтинг произведения.'
+        )
+        assert title.rating is None
+
+    def test_02_title_delete_cascades_reviews(self, admin_client, user_client,
+                                              user):
+        _, titles = create_reviews(admin_client, {user: user_client})
+        title_id = titles[0]['id']
+        response = admin_client.delete(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        )
+        assert response.status_code == 204
+        assert not Review.objects.filter(title_id=title_id).exists()
+
+    def test_03_rebuild_ratings_command(self, admin_client, user_client,
+                                        user):
+        _, titles = create_reviews(admin_client, {user: user_client})
+        title_id = titles[1]['id']
+        create_single_review(user_client, title_id, 'text', 3)
+        Title.objects.filter(pk=title_id).update(
+            score_sum=0, score_count=0, rating=None
+        )
+
+        with pytest.raises(CommandError):
+            call_command('rebuild_ratings', '--check', stdout=StringIO())
+
+        call_command('rebuild_ratings', stdout=StringIO())
+        title = self.get_title(title_id)
+        assert (title.score_sum, title.score_count, title.rating) == (
+            3, 1, 3
+        ), (
+            'Проверьте, что команда `rebuild_ratings` пересчитывает '
+            'рейтинги произведений по отзывам.'
+        )
+        call_command('rebuild_ratings', '--check', stdout=StringIO())
@@ -0,0 +1,296 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, resolve
+
+from api.urls import urlpatterns
+from tests.utils import create_single_review
+
+TITLES_URL = '/api/v1/titles/'
+TITLE_DETAIL_URL = '/api/v1/titles/{title_id}/'
+REVIEWS_URL = '/api/v1/titles/{title_id}/reviews/'
+REVIEW_DETAIL_URL = '/api/v1/titles/{title_id}/reviews/{review_id}/'
+COMMENTS_URL = '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+COMMENT_DETAIL_URL = (
+    '/api/v1/titles/{title_id}/reviews/{review_id}/comments/{comment_id}/'
+)
+# Наибольший бюджет запросов к БД для каждого маршрута API. Бюджет
+# отдельного запроса в тестах ниже может быть строже.
+ROUTE_BUDGETS = {
+    'api-root': 0,
+    'signup': 8,
+    'get_token': 1,
+    'bulk_delete': 9,
+    'users-list': 6,
+    'users-detail': 10,
+    'users-me': 5,
+    'categories-list': 3,
+    'categories-detail': 6,
+    'genres-list': 3,
+    'genres-detail': 6,
+    'titles-list': 11,
+    'titles-detail': 13,
+    'titles-bulk': 9,
+    'titles-score-distribution': 1,
+    'titles-score-distributions': 1,
+    'titles-export': 3,
+    'title-reviews-list': 11,
+    'title-reviews-detail': 12,
+    'review-comments-list': 7,
+    'review-comments-detail': 7,
+    'changes-list': 2,
+}
+
+
+def check_budget(budget, request, url, *args, **kwargs):
+    """Выполняет запрос и проверяет, что он уложился в бюджет запросов к БД."""
+    route = resolve(url.partition('?')[0]).url_name
+    assert budget <= ROUTE_BUDGETS[route], (
+        f'Бюджет запроса к `{url}` больше бюджета маршрута `{route}` '
+        'в ROUTE_BUDGETS.'
+    )
+    with CaptureQueriesContext(connection) as context:
+        response = request(url, *args, **kwargs)
+        if response.streaming:
+            # Потоковый ответ обращается к БД при чтении тела.
+            b''.join(response.streaming_content)
+    queries = '\n'.join(
+        query['sql'] for query in context.captured_queries
+    )
+    assert len(context) <= budget, (
+        f'Запрос `{request.__name__.upper()} {url}` выполнил '
+        f'{len(context)} запросов к БД при бюджете {budget}:\n{queries}'
+    )
+    return response
+
+
+@pytest.fixture
+def content(content, admin_client, user_client):
+    comments, reviews, titles = content
+    for idx in range(8):
+        response = admin_client.post(TITLES_URL, data={
+            'name': f'Произведение {idx}',
+            'year': 2000 + idx,
+            'genre': ['horror', 'comedy'],
+            'category': 'films',
+            'description': 'Описание',
+        })
+        create_single_review(user_client, response.json()['id'], 'text', 7)
+    return {
+        'title_id': titles[0]['id'],
+        'review_id': reviews[0]['id'],
+        'comment_id': comments[0]['id'],
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09QueryBudget:
+
+    def test_01_auth(self, client, user):
+        # Пользователь и письмо в очереди сохраняются в одной транзакции.
+        check_budget(
+            8, client.post, '/api/v1/auth/signup/',
+            data={'username': 'budget', 'email': 'budget@yamdb.fake'}
+        )
+        response = check_budget(
+            1, client.post, '/api/v1/auth/token/',
+            data={
+                'username': user.username,
+                'confirmation_code': default_token_generator.make_token(user)
+            }
+        )
+        assert response.status_code == HTTPStatus.OK
+
+    def test_02_users(self, admin_client, user_client, user):
+        check_budget(3, admin_client.get, '/api/v1/users/')
+        check_budget(
+            2, admin_client.get, f'/api/v1/users/{user.username}/'
+        )
+        check_budget(
+            6, admin_client.post, '/api/v1/users/',
+            data={'username': 'budget', 'email': 'budget@yamdb.fake'}
+        )
+        check_budget(
+            6, admin_client.patch, '/api/v1/users/budget/',
+            data={'first_name': 'Бюджет'}
+        )
+        check_budget(1, user_client.get, '/api/v1/users/me/')
+        check_budget(
+            5, user_client.patch, '/api/v1/users/me/', data={'bio': 'bio'}
+        )
+        check_budget(
+            10, admin_client.delete, '/api/v1/users/budget/'
+        )
+
+    @pytest.mark.parametrize('url', ('/api/v1/categories/',
+                                     '/api/v1/genres/'))
+    def test_03_categories_and_genres(self, client, admin_client, url,
+                                      content):
+        check_budget(2, client.get, url)
+        check_budget(2, client.get, url, data={'limit': 50})
+        check_budget(
+            3, admin_client.post, url,
+            data={'name': 'Бюджет', 'slug': 'budget'}
+        )
+        check_budget(6, admin_client.delete, f'{url}budget/')
+
+    def test_04_titles(self, client, admin_client, content):
+        check_budget(4, client.get, TITLES_URL, data={'limit': 1})
+        for limit in (1, 5, 50):
+            check_budget(2, client.get, TITLES_URL, data={'limit': limit})
+        check_budget(3, admin_client.get, TITLES_URL, data={'limit': 50})
+        check_budget(
+            2, client.get, TITLES_URL,
+            data={'pagination': 'cursor', 'limit': 50}
+        )
+        check_budget(
+            3, client.get, TITLES_URL,
+            data={'genre': 'horror', 'category': 'films', 'limit': 50}
+        )
+        title_url = TITLE_DETAIL_URL.format(title_id=content['title_id'])
+        check_budget(2, client.get, title_url)
+        # Каждая запись добавляет строку в журнал изменений, а жанры для
+        # ответа перечитываются одним запросом. Жанры из запроса
+        # загружаются одним запросом независимо от их числа.
+        for genres in (['horror'], ['horror', 'drama', 'comedy']):
+            check_budget(
+                11, admin_client.post, TITLES_URL,
+                data={
+                    'name': 'Бюджет',
+                    'year': 2001,
+                    'genre': genres,
+                    'category': 'books',
+                    'description': 'Описание',
+                }
+            )
+        check_budget(
+            13, admin_client.patch, title_url,
+            data={'name': 'Бюджет', 'genre': ['drama']}
+        )
+        # Запись и строка журнала сохраняются в одной транзакции.
+        check_budget(8, admin_client.patch, title_url, data={'year': 1999})
+        check_budget(13, admin_client.delete, title_url)
+
+    def test_05_reviews(self, client, admin_client, user_client, content):
+        reviews_url = REVIEWS_URL.format(title_id=content['title_id'])
+        review_url = REVIEW_DETAIL_URL.format(
+            title_id=content['title_id'], review_id=content['review_id']
+        )
+        check_budget(2, client.get, reviews_url)
+        check_budget(1, client.get, review_url)
+        # Автор подгружается джойном: число запросов не зависит от limit.
+        # Третий запрос — загрузка пользователя по токену.
+        for limit in (1, 3, 50):
+            check_budget(
+                3, user_client.get, reviews_url, data={'limit': limit}
+            )
+        new_title = admin_client.post(TITLES_URL, data={
+            'name': 'Бюджет',
+            'year': 2001,
+            'genre': ['horror'],
+            'category': 'books',
+            'description': 'Описание',
+        }).json()
+        # Отзыв и счётчики оценок пишутся в одной транзакции: BEGIN и
+        # COMMIT вместо проверки существования отзыва перед вставкой.
+        # Изменение рейтинга пишется в журнал изменений произведения.
+        # Вставка идёт в точке сохранения внутри транзакции запроса.
+        check_budget(
+            11, user_client.post,
+            REVIEWS_URL.format(title_id=new_title['id']),
+            data={'text': 'Бюджет', 'score': 3}
+        )
+        # Старая оценка берётся из заблокированной строки отзыва:
+        # BEGIN, SELECT и COMMIT вокруг изменения.
+        check_budget(
+            11, admin_client.patch, review_url, data={'score': 1}
+        )
+        # Права автора проверяются по author_id, без загрузки автора;
+        # старая оценка читается из заблокированной строки.
+        check_budget(12, admin_client.delete, review_url)
+
+    def test_06_comments(self, client, admin_client, user_client, content):
+        comments_url = COMMENTS_URL.format(
+            title_id=content['title_id'], review_id=content['review_id']
+        )
+        comment_url = COMMENT_DETAIL_URL.format(
+            title_id=content['title_id'],
+            review_id=content['review_id'],
+            comment_id=content['comment_id'],
+        )
+        check_budget(2, client.get, comments_url)
+        check_budget(1, client.get, comment_url)
+        for limit in (1, 3, 50):
+            check_budget(
+                3, user_client.get, comments_url, data={'limit': limit}
+            )
+        # Счётчик комментариев у отзыва обновляется одним UPDATE, в одной
+        # транзакции с комментарием и строкой журнала.
+        check_budget(
+            7, user_client.post, comments_url, data={'text': 'Бюджет'}
+        )
+        check_budget(
+            6, admin_client.patch, comment_url, data={'text': 'Бюджет'}
+        )
+        check_budget(7, admin_client.delete, comment_url)
+
+    def test_07_title_actions(self, client, admin_client, content):
+        title_id = content['title_id']
+        # Категории и жанры всех произведений загружаются двумя запросами.
+        check_budget(
+            9, admin_client.post, f'{TITLES_URL}bulk/',
+            data=[
+                {
+                    'name': f'Пачка {number}',
+                    'year': 2001,
+                    'genre': ['horror', 'drama'],
+                    'category': 'books',
+                    'description': 'Описание',
+                }
+                for number in range(5)
+            ],
+            format='json'
+        )
+        check_budget(
+            1, client.get, f'{TITLES_URL}{title_id}/score-distribution/'
+        )
+        check_budget(
+            1, client.get, f'{TITLES_URL}score-distribution/',
+            data={'ids': ','.join(str(number) for number in range(1, 10))}
+        )
+        # Отзывы и комментарии читаются двумя курсорами, без N+1.
+        check_budget(
+            3, client.get, f'{TITLES_URL}{title_id}/export/',
+            data={'comments': 'true'}
+        )
+
+    def test_08_service_routes(self, client, admin_client, moderator_client,
+                               content):
+        check_budget(0, client.get, '/api/v1/')
+        check_budget(
+            2, admin_client.get, '/api/v1/changes/', data={'limit': 50}
+        )
+        check_budget(
+            9, moderator_client.post, '/api/v1/moderation/delete/',
+            data={'model': 'comments', 'ids': [content['comment_id']]},
+            format='json'
+        )
+
+    def test_09_every_route_has_budget(self):
+        def route_names(patterns):
+            for pattern in patterns:
+                if isinstance(pattern, URLResolver):
+                    yield from route_names(pattern.url_patterns)
+                else:
+                    yield pattern.name
+
+        routes = set(route_names(urlpatterns))
+        assert routes == set(ROUTE_BUDGETS), (
+            'Приведите `ROUTE_BUDGETS` в `tests/test_09_query_budget.py` в '
+            'соответствие маршрутам API. Нет бюджета для: '
+            f'{sorted(routes - set(ROUTE_BUDGETS))}; лишние: '
+            f'{sorted(set(ROUTE_BUDGETS) - routes)}.'
+        )
@@ -0,0 +1,142 @@
+import json
+from base64 import b64encode
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_reviews, create_titles
+
+
+def walk(client, url, params, link='next'):
+    items = []
+    response = client.get(url, data=params)
+    while True:
+        assert response.status_code == HTTPStatus.OK, response.json()
+        data = response.json()
+        assert data['count'] is None, (
+            'Проверьте, что в режиме курсора ответ не содержит `count`.'
+        )
+        items.extend(data['results'])
+        if not data[link]:
+            return items, data
+        response = client.get(data[link])
+
+
+def make_cursor(position, reverse=False):
+    payload = json.dumps({'p': position, 'r': reverse})
+    return b64encode(payload.encode()).decode()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CursorPagination:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def create_more_titles(self, admin_client, count):
+        for idx in range(count):
+            admin_client.post(self.TITLES_URL, data={
+                'name': 'Дубль' if idx % 2 else f'Произведение {idx}',
+                'year': 2000,
+                'genre': ['horror'],
+                'category': 'films',
+                'description': 'Описание',
+            })
+
+    def test_01_titles_cursor_matches_offset(self, client, admin_client):
+        create_titles(admin_client)
+        self.create_more_titles(admin_client, 7)
+        offset_data = client.get(self.TITLES_URL, data={'limit': 100}).json()
+        expected = [title['id'] for title in offset_data['results']]
+
+        items, last_page = walk(
+            client, self.TITLES_URL, {'pagination': 'cursor', 'limit': 2}
+        )
+        assert [title['id'] for title in items] == expected, (
+            'Проверьте, что в режиме курсора страницы `/api/v1/titles/` '
+            'идут в порядке (name, id) без пропусков и повторов.'
+        )
+        assert len(last_page['results']) == 1
+        assert last_page['previous']
+
+        items, _ = walk(client, last_page['previous'], {}, link='previous')
+        assert [title['id'] for title in items] == [
+            title_id
+            for chunk in reversed(
+                [expected[idx:idx + 2] for idx in range(0, 8, 2)]
+            )
+            for title_id in chunk
+        ], (
+            'Проверьте, что ссылка `previous` в режиме курсора ведёт на '
+            'предыдущие страницы.'
+        )
+
+    def test_02_first_page_has_no_previous(self, client, admin_client):
+        create_titles(admin_client)
+        data = client.get(
+            self.TITLES_URL, data={'pagination': 'cursor', 'limit': 1}
+        ).json()
+        assert data['previous'] is None
+        assert 'cursor=' in data['next']
+        assert 'offset=' not in data['next']
+
+    def test_03_reviews_cursor(self, client, admin_client, admin, user,
+                               user_client, moderator, moderator_client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        _, titles = create_reviews(admin_client, author_map)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        expected = [
+            review['id']
+            for review in client.get(url, data={'limit': 100}).json()[
+                'results'
+            ]
+        ]
+        items, _ = walk(client, url, {'pagination': 'cursor', 'limit': 1})
+        assert [review['id'] for review in items] == expected, (
+            'Проверьте, что в режиме курсора отзывы идут по убыванию '
+            '`pub_date`.'
+        )
+
+    def test_04_invalid_cursor(self, client):
+        response = client.get(self.TITLES_URL, data={'cursor': 'нет'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что неверный курсор возвращает ответ со статусом 400.'
+        )
+
+    @pytest.mark.parametrize('position', [
+        ['a', {'x': 1}],
+        ['a', 'zz'],
+        ['a', None],
+        ['a', [1, 2]],
+    ])
+    def test_05_tampered_title_cursor(self, client, admin_client, position):
+        create_titles(admin_client)
+        response = client.get(
+            self.TITLES_URL, data={'cursor': make_cursor(position)}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что курсор с подменёнными значениями позиции '
+            'возвращает ответ со статусом 400.'
+        )
+        assert 'cursor' in response.json()
+
+    @pytest.mark.parametrize('position', [
+        ['не дата', 1],
+        [{'x': 1}, 1],
+        ['2024-01-01T00:00:00+00:00', 'zz'],
+    ])
+    def test_06_tampered_review_cursor(self, client, admin_client, admin,
+                                       position):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        response = client.get(url, data={'cursor': make_cursor(position)})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'cursor' in response.json()
+        response = client.get(url, data={
+            'cursor': make_cursor(['2024-01-01T00:00:00+00:00', 1])
+        })
+        assert response.status_code == HTTPStatus.OK
@@ -0,0 +1,96 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.pagination import StandardResultsSetPagination
+from tests.utils import create_titles
+
+
+def count_queries(client, url, data=None):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, data=data)
+    counts = [
+        query for query in context.captured_queries
+        if 'COUNT(*)' in query['sql']
+    ]
+    return response.json(), len(counts)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11PaginationCounts:
+
+    TITLES_URL = '/api/v1/titles/'
+    GENRES_URL = '/api/v1/genres/'
+
+    def test_01_count_is_cached_until_write(self, client, admin_client):
+        create_titles(admin_client)
+        data, counts = count_queries(client, self.TITLES_URL)
+        assert (data['count'], data['count_exact'], counts) == (2, True, 1)
+
+        data, counts = count_queries(
+            client, self.TITLES_URL, {'limit': 1, 'offset': 1}
+        )
+        assert (data['count'], counts) == (2, 0), (
+            'Проверьте, что число объектов списка кэшируется и не зависит '
+            'от параметров пагинации.'
+        )
+
+        _, counts = count_queries(client, self.TITLES_URL, {'year': 1984})
+        assert counts == 1, (
+            'Проверьте, что кэш числа объектов учитывает параметры фильтрации.'
+        )
+
+        admin_client.post(self.TITLES_URL, data={
+            'name': 'Новое',
+            'year': 1984,
+            'genre': ['drama'],
+            'category': 'films',
+            'description': 'Описание',
+        })
+        data, counts = count_queries(client, self.TITLES_URL)
+        assert (data['count'], counts) == (3, 1), (
+            'Проверьте, что кэш числа объектов сбрасывается при записи в '
+            'модель.'
+        )
+        data, _ = count_queries(client, self.TITLES_URL, {'year': 1984})
+        assert data['count'] == 2
+
+    def test_02_related_writes_reset_count(self, client, admin_client):
+        create_titles(admin_client)
+        data, _ = count_queries(client, self.TITLES_URL, {'genre': 'drama'})
+        assert data['count'] == 1
+        admin_client.delete(f'{self.GENRES_URL}drama/')
+        data, _ = count_queries(client, self.TITLES_URL, {'genre': 'drama'})
+        assert data['count'] == 0, (
+            'Проверьте, что изменение связанных моделей сбрасывает кэш '
+            'числа объектов.'
+        )
+
+    def test_03_estimated_count(self, client, admin_client, monkeypatch):
+        monkeypatch.setattr(
+            StandardResultsSetPagination, 'estimated_count_threshold', 1
+        )
+        create_titles(admin_client)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        data, counts = count_queries(client, self.TITLES_URL)
+        assert (data['count'], data['count_exact'], counts) == (2, True, 1), (
+            'Проверьте, что по умолчанию число объектов точное.'
+        )
+
+        data, counts = count_queries(
+            client, self.TITLES_URL, {'count': 'estimated'}
+        )
+        assert (data['count'], data['count_exact'], counts) == (
+            2, False, 0
+        ), (
+            'Проверьте, что с `?count=estimated` число объектов '
+            'нефильтрованного списка берётся из статистики таблицы.'
+        )
+        assert data['next'] is None
+
+        data, counts = count_queries(
+            client, self.TITLES_URL, {'count': 'estimated', 'year': 1984}
+        )
+        assert (data['count'], data['count_exact'], counts) == (1, True, 1)
@@ -0,0 +1,101 @@
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+
+from reviews.models import Title
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12TitleSearch:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def search(self, client, query):
+        response = client.get(self.TITLES_URL, data={'q': query})
+        assert response.status_code == 200
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_search_by_name_and_description(self, client, admin_client):
+        create_titles(admin_client)
+        assert self.search(client, 'терминатор') == ['Терминатор'], (
+            'Проверьте, что параметр `q` ищет произведения по названию без '
+            'учёта регистра.'
+        )
+        assert self.search(client, 'yippie') == ['Крепкий орешек'], (
+            'Проверьте, что параметр `q` ищет произведения по описанию.'
+        )
+        assert self.search(client, 'терм*') == ['Терминатор'], (
+            'Проверьте, что параметр `q` поддерживает поиск по префиксу.'
+        )
+        assert self.search(client, 'терм') == []
+        assert self.search(client, '" OR *') == []
+
+    def test_02_ranking(self, client, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        admin_client.post(self.TITLES_URL, data={
+            'name': 'Фильм про орешки',
+            'year': 2000,
+            'genre': [genres[0]['slug']],
+            'category': categories[0]['slug'],
+            'description': 'Снова крепкий орешек',
+        })
+        assert self.search(client, 'крепкий') == [
+            'Крепкий орешек', 'Фильм про орешки'
+        ], (
+            'Проверьте, что совпадение в названии ранжируется выше '
+            'совпадения в описании.'
+        )
+
+    def test_03_cursor_keeps_ranking(self, client, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        for number in range(3):
+            admin_client.post(self.TITLES_URL, data={
+                'name': f'Фильм {number}',
+                'year': 2000,
+                'genre': [genres[0]['slug']],
+                'category': categories[0]['slug'],
+                'description': 'Снова крепкий орешек ' * (number + 1),
+            })
+        expected = self.search(client, 'крепкий')
+        url, names = self.TITLES_URL, []
+        params = {'q': 'крепкий', 'pagination': 'cursor', 'limit': 1}
+        while url:
+            response = client.get(url, data=params)
+            assert response.status_code == 200
+            data = response.json()
+            names.extend(title['name'] for title in data['results'])
+            url, params = data['next'], None
+        assert names == expected, (
+            'Проверьте, что в режиме курсора результаты поиска по `q` '
+            'отдаются по релевантности, как и в режиме limit/offset.'
+        )
+        assert names[0] == 'Крепкий орешек'
+
+    def test_04_index_follows_writes(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_url = self.TITLE_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        admin_client.patch(title_url, data={'name': 'Хищник'})
+        assert self.search(client, 'терминатор') == []
+        assert self.search(client, 'хищник') == ['Хищник']
+        admin_client.delete(title_url)
+        assert self.search(client, 'хищник') == []
+
+    def test_05_rebuild_command(self, client, admin_client):
+        create_titles(admin_client)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO reviews_title_fts(reviews_title_fts) "
+                "VALUES ('delete-all')"
+            )
+        cache.clear()
+        assert self.search(client, 'терминатор') == []
+        call_command('rebuild_search_index', stdout=StringIO())
+        assert self.search(client, 'терминатор') == ['Терминатор']
+        assert Title.objects.count() == 2
@@ -0,0 +1,131 @@
+from io import StringIO
+
+import pytest
+from django.core.checks import run_checks
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category
+from tests.utils import create_reviews, create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13ResponseCache:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    CATEGORIES_URL = '/api/v1/categories/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    def test_01_anonymous_get_is_cached(self, client, admin_client):
+        create_titles(admin_client)
+        response = client.get(self.TITLES_URL)
+        assert response['X-Cache'] == 'MISS'
+        with CaptureQueriesContext(connection) as context:
+            cached = client.get(self.TITLES_URL)
+        assert cached['X-Cache'] == 'HIT', (
+            'Проверьте, что повторный анонимный GET-запрос к '
+            f'`{self.TITLES_URL}` отдаётся из кэша.'
+        )
+        assert len(context) == 0
+        assert cached.json() == response.json()
+        assert client.get(
+            self.TITLES_URL, data={'limit': 1}
+        )['X-Cache'] == 'MISS'
+
+    def test_02_authenticated_get_is_not_cached(self, admin_client):
+        create_titles(admin_client)
+        admin_client.get(self.TITLES_URL)
+        assert 'X-Cache' not in admin_client.get(self.TITLES_URL)
+
+    def test_03_writes_invalidate(self, client, admin_client, user,
+                                  user_client):
+        _, titles = create_reviews(admin_client, {user: user_client})
+        detail_url = self.TITLE_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[1]['id']
+        )
+        assert client.get(detail_url).json()['rating'] is None
+        client.get(detail_url)
+
+        create_single_review(user_client, titles[1]['id'], 'text', 8)
+        response = client.get(detail_url)
+        assert (response['X-Cache'], response.json()['rating']) == (
+            'MISS', 8
+        ), (
+            'Проверьте, что новый отзыв сбрасывает кэш ответа с рейтингом '
+            'произведения.'
+        )
+
+        client.get(detail_url)
+        admin_client.patch(detail_url, data={'name': 'Новое название'})
+        assert client.get(detail_url).json()['name'] == 'Новое название'
+
+    def test_04_orm_and_import_writes_invalidate(self, client):
+        assert client.get(self.CATEGORIES_URL).json()['count'] == 0
+        Category.objects.create(name='Фильм', slug='films')
+        assert client.get(self.CATEGORIES_URL).json()['count'] == 1, (
+            'Проверьте, что запись в модель вне API (например, из админки) '
+            'сбрасывает кэш ответов.'
+        )
+        call_command('import_csv', stdout=StringIO())
+        assert client.get(self.CATEGORIES_URL).json()['count'] > 1, (
+            'Проверьте, что импорт из CSV сбрасывает кэш ответов.'
+        )
+
+    def test_05_parent_delete_invalidates(self, client, admin_client, user,
+                                          user_client):
+        reviews, titles = create_reviews(admin_client, {user: user_client})
+        reviews_url = self.REVIEWS_URL_TEMPLATE.format(
+            title_id=titles[1]['id']
+        )
+        comments_url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[0]['id']
+        )
+        for url, parent_url in (
+            (reviews_url, self.TITLE_DETAIL_URL_TEMPLATE.format(
+                title_id=titles[1]['id']
+            )),
+            (comments_url, comments_url.removesuffix('comments/')),
+        ):
+            assert client.get(url).json()['count'] == 0
+            assert client.get(url)['X-Cache'] == 'HIT'
+            admin_client.delete(parent_url)
+            assert client.get(url).status_code == 404, (
+                'Проверьте, что удаление произведения или отзыва сбрасывает '
+                f'кэш пустого списка `{url}`.'
+            )
+
+    def test_06_cache_check(self, settings, tmp_path):
+        def warnings():
+            return [
+                message.id
+                for message in run_checks(
+                    tags=['caches'], include_deployment_checks=True
+                )
+            ]
+
+        assert 'api.W003' not in [
+            message.id for message in run_checks(tags=['caches'])
+        ], (
+            'Проверьте, что о локальном кэше ответов предупреждает только '
+            '`check --deploy`.'
+        )
+        assert 'api.W003' in warnings(), (
+            'Проверьте, что проверка системы предупреждает о кэше ответов, '
+            'локальном для процесса.'
+        )
+        settings.CACHES = {
+            **settings.CACHES,
+            'shared': {
+                'BACKEND': (
+                    'django.core.cache.backends.filebased.FileBasedCache'
+                ),
+                'LOCATION': str(tmp_path),
+            },
+        }
+        settings.API_CACHE_ALIAS = 'shared'
+        assert 'api.W003' not in warnings()
@@ -0,0 +1,124 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Genre
+from reviews.versions import bump_model_version, get_model_state
+from tests.utils import create_reviews, create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14ConditionalGet:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    CATEGORIES_URL = '/api/v1/categories/'
+    GENRES_URL = '/api/v1/genres/'
+    USERS_URL = '/api/v1/users/'
+
+    def test_01_validators_on_every_viewset(self, admin_client, user,
+                                            user_client):
+        _, titles = create_reviews(admin_client, {user: user_client})
+        urls = (
+            self.TITLES_URL,
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id']),
+            self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id']),
+            self.CATEGORIES_URL,
+            self.GENRES_URL,
+            self.USERS_URL,
+        )
+        for url in urls:
+            response = admin_client.get(url)
+            assert response.status_code == 200
+            assert 'ETag' in response and 'Last-Modified' in response, (
+                f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+                'заголовки `ETag` и `Last-Modified`.'
+            )
+
+    def test_02_if_none_match(self, client, admin_client):
+        create_titles(admin_client)
+        etag = client.get(self.TITLES_URL)['ETag']
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.TITLES_URL, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что запрос с актуальным `If-None-Match` получает '
+            'ответ 304.'
+        )
+        assert response['ETag'] == etag
+        assert len(context) == 0, (
+            'Проверьте, что ответ 304 отдаётся без запросов к базе данных.'
+        )
+        assert client.get(
+            self.TITLES_URL, data={'limit': 1}, HTTP_IF_NONE_MATCH=etag
+        ).status_code == 200
+
+    def test_03_if_modified_since(self, admin_client):
+        create_titles(admin_client)
+        last_modified = admin_client.get(self.CATEGORIES_URL)['Last-Modified']
+        response = admin_client.get(
+            self.CATEGORIES_URL, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        assert response.status_code == 304
+        assert admin_client.get(
+            self.CATEGORIES_URL,
+            HTTP_IF_MODIFIED_SINCE='Thu, 01 Jan 2015 00:00:00 GMT',
+        ).status_code == 200
+
+    def test_04_writes_change_etag(self, client, admin_client, user,
+                                   user_client):
+        _, titles = create_reviews(admin_client, {user: user_client})
+        detail_url = self.TITLE_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[1]['id']
+        )
+        etag = client.get(detail_url)['ETag']
+        create_single_review(user_client, titles[1]['id'], 'text', 8)
+        response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый отзыв меняет `ETag` произведения.'
+        )
+        assert response['ETag'] != etag
+        assert response.json()['rating'] == 8
+
+        etag = response['ETag']
+        admin_client.delete(
+            f'{self.CATEGORIES_URL}{titles[1]["category"]}/'
+        )
+        assert client.get(
+            detail_url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == 200, (
+            'Проверьте, что удаление категории меняет `ETag` произведения.'
+        )
+
+    def test_05_writes_are_not_conditional(self, admin_client):
+        create_titles(admin_client)
+        etag = admin_client.get(self.CATEGORIES_URL)['ETag']
+        response = admin_client.post(
+            self.CATEGORIES_URL,
+            data={'name': 'Музыка', 'slug': 'music'},
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        assert response.status_code == 201
+
+    def test_06_version_bumps(self):
+        (version,), modified_at = get_model_state(Category)
+        bump_model_version(Category)
+        bump_model_version(Category, Genre)
+        (new_version,), new_modified_at = get_model_state(Category)
+        assert new_version == version + 2, (
+            'Проверьте, что версия модели поднимается атомарным `incr` '
+            'при каждой записи.'
+        )
+        assert new_modified_at >= modified_at
+
+    def test_07_parent_delete_changes_etag(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        etag = client.get(url)['ETag']
+        admin_client.delete(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        )
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 404, (
+            'Проверьте, что удаление произведения меняет `ETag` списка его '
+            'отзывов.'
+        )
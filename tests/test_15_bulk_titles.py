@@ -0,0 +1,110 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Title
+from tests.utils import create_categories, create_genre
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15BulkTitles:
+
+    BULK_URL = '/api/v1/titles/bulk/'
+
+    def make_titles(self, admin_client, count):
+        categories = create_categories(admin_client)
+        genres = create_genre(admin_client)
+        return [
+            {
+                'name': f'Произведение {number}',
+                'year': 2000 + number,
+                'description': 'Описание',
+                'category': categories[number % 2]['slug'],
+                'genre': [
+                    genres[number % 3]['slug'],
+                    genres[(number + 1) % 3]['slug'],
+                ],
+            }
+            for number in range(count)
+        ]
+
+    def test_01_bulk_create(self, admin_client):
+        data = self.make_titles(admin_client, 20)
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(self.BULK_URL, data=data,
+                                         format='json')
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что POST-запрос администратора к '
+            f'`{self.BULK_URL}` с корректными данными возвращает ответ '
+            'со статусом 201.'
+        )
+        # Пользователь, категории, жанры, BEGIN, произведения, связи
+        # с жанрами, жанры для ответа, записи журнала изменений, COMMIT.
+        assert len(context) <= 9, (
+            'Проверьте, что массовое создание произведений не делает '
+            'запросов к БД на каждое произведение или жанр.'
+        )
+        results = response.json()
+        assert [title['name'] for title in results] == [
+            title['name'] for title in data
+        ]
+        assert all(title['id'] for title in results)
+        assert results[0]['category']['slug'] == data[0]['category']
+        assert sorted(genre['slug'] for genre in results[0]['genre']) == (
+            sorted(data[0]['genre'])
+        )
+        assert Title.objects.count() == 20
+        title = Title.objects.get(pk=results[1]['id'])
+        assert sorted(title.genre.values_list('slug', flat=True)) == (
+            sorted(data[1]['genre'])
+        )
+
+    def test_02_per_item_errors(self, admin_client):
+        data = self.make_titles(admin_client, 3)
+        data[1]['category'] = 'unknown'
+        data[2]['genre'] = []
+        response = admin_client.post(self.BULK_URL, data=data, format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        errors = response.json()
+        assert len(errors) == 3, (
+            'Проверьте, что ошибки массового создания возвращаются '
+            'списком по элементам запроса.'
+        )
+        assert errors[0] == {}
+        assert 'category' in errors[1]
+        assert 'genre' in errors[2]
+        assert not Title.objects.exists(), (
+            'Проверьте, что при ошибке в одном элементе не создаётся ни '
+            'одно произведение.'
+        )
+
+    def test_03_permissions(self, client, user_client):
+        response = client.post(
+            self.BULK_URL, data='[]', content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+        response = user_client.post(self.BULK_URL, data=[], format='json')
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что массовое создание произведений доступно только '
+            'администратору.'
+        )
+
+    def test_04_malformed_slugs(self, admin_client):
+        data = self.make_titles(admin_client, 4)
+        data[0]['category'] = ['a']
+        data[1]['genre'] = [['a']]
+        data[2]['genre'] = [{'a': 1}]
+        data[3]['category'] = {'a': 1}
+        response = admin_client.post(self.BULK_URL, data=data, format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что категория или жанр, переданные не строкой, '
+            f'отклоняются `{self.BULK_URL}` со статусом 400.'
+        )
+        errors = response.json()
+        assert 'category' in errors[0]
+        assert 'genre' in errors[1]
+        assert 'genre' in errors[2]
+        assert 'category' in errors[3]
+        assert not Title.objects.exists()
@@ -0,0 +1,88 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16SparseFields:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    def get(self, client, url, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, data=params)
+        assert response.status_code == HTTPStatus.OK
+        return response.json(), context.captured_queries
+
+    def test_01_title_fields(self, client, admin_client):
+        create_titles(admin_client)
+        data, queries = self.get(
+            client, self.TITLES_URL, fields='id,name,rating'
+        )
+        assert all(
+            set(title) == {'id', 'name', 'rating'}
+            for title in data['results']
+        ), (
+            'Проверьте, что параметр `fields` оставляет в ответе только '
+            'перечисленные поля произведения.'
+        )
+        sql = ' '.join(query['sql'] for query in queries)
+        assert 'reviews_category' not in sql
+        assert 'reviews_genre' not in sql, (
+            'Проверьте, что невыбранные связи произведения не загружаются.'
+        )
+        assert '"reviews_title"."description"' not in sql, (
+            'Проверьте, что невыбранные столбцы откладываются через '
+            '`only()`.'
+        )
+
+    def test_02_title_omit(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        data, queries = self.get(client, url, omit='genre,description')
+        assert set(data) == {'id', 'name', 'year', 'rating', 'category'}
+        assert data['category'] == {'name': 'Фильм', 'slug': 'films'}
+        assert len(queries) == 1, (
+            'Проверьте, что при `omit=genre` жанры не подгружаются '
+            'отдельным запросом.'
+        )
+
+    def test_03_unknown_field(self, client):
+        response = client.get(self.TITLES_URL, data={'fields': 'id,secret'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'fields' in response.json()
+
+    def test_04_reviews_and_comments(self, client, admin_client, user,
+                                     user_client):
+        _, reviews, titles = create_comments(
+            admin_client, {user: user_client}
+        )
+        data, _ = self.get(
+            client,
+            self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id']),
+            fields='id,score',
+        )
+        assert all(
+            set(review) == {'id', 'score'} for review in data['results']
+        )
+        data, _ = self.get(
+            client,
+            self.COMMENTS_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[0]['id']
+            ),
+            omit='text',
+            pagination='cursor',
+        )
+        assert all(
+            set(comment) == {'id', 'author', 'pub_date'}
+            for comment in data['results']
+        )
@@ -0,0 +1,124 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review, ScoreBucket
+from reviews.ratings import get_score_distributions, rebuild_ratings
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17ScoreDistribution:
+
+    DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/score-distribution/'
+    BULK_URL = '/api/v1/titles/score-distribution/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def test_01_incremental_updates(self, client, admin_client, user_client,
+                                    moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = self.DETAIL_URL_TEMPLATE.format(title_id=title_id)
+
+        data = client.get(url).json()
+        assert data['count'] == 0
+        empty = {str(score): 0 for score in range(1, 11)}
+        assert data['distribution'] == empty
+
+        review = create_single_review(user_client, title_id, 'text', 7)
+        create_single_review(moderator_client, title_id, 'text', 7)
+        data = client.get(url).json()
+        assert (data['count'], data['distribution']['7']) == (2, 2), (
+            'Проверьте, что новый отзыв учитывается в распределении оценок.'
+        )
+
+        review_url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=title_id, review_id=review.json()['id']
+        )
+        user_client.patch(review_url, data={'score': 3})
+        data = client.get(url).json()
+        assert (data['distribution']['7'], data['distribution']['3']) == (
+            1, 1
+        ), 'Проверьте, что изменение оценки переносит отзыв в другую ячейку.'
+
+        user_client.delete(review_url)
+        data = client.get(url).json()
+        assert (data['count'], data['distribution']['3']) == (1, 0), (
+            'Проверьте, что удаление отзыва учитывается в распределении '
+            'оценок.'
+        )
+
+    def test_02_bulk(self, client, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[1]['id'], 'text', 10)
+        ids = f'{titles[1]["id"]},{titles[0]["id"]},100500'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.BULK_URL, data={'ids': ids})
+        assert response.status_code == HTTPStatus.OK
+        assert len(context) == 1, (
+            'Проверьте, что распределения оценок для списка произведений '
+            'загружаются одним запросом.'
+        )
+        data = response.json()
+        assert [item['title'] for item in data] == [
+            titles[1]['id'], titles[0]['id']
+        ]
+        assert data[0]['distribution']['10'] == 1
+        assert data[1]['count'] == 0
+
+        assert client.get(
+            self.BULK_URL, data={'ids': '1,x'}
+        ).status_code == HTTPStatus.BAD_REQUEST
+        assert client.get(
+            self.DETAIL_URL_TEMPLATE.format(title_id=100500)
+        ).status_code == HTTPStatus.NOT_FOUND
+
+        huge_id = 10 ** 30
+        assert client.get(
+            self.BULK_URL, data={'ids': f'1,{huge_id}'}
+        ).status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что идентификаторы вне диапазона первичного ключа '
+            'отклоняются со статусом 400.'
+        )
+        assert client.get(
+            self.DETAIL_URL_TEMPLATE.format(title_id=huge_id)
+        ).status_code == HTTPStatus.NOT_FOUND
+
+    def test_03_rebuild(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'text', 4)
+        Review.objects.update(score=9)
+        ScoreBucket.objects.update(count=5)
+        rebuild_ratings()
+        assert get_score_distributions([titles[0]['id']])[
+            titles[0]['id']
+        ][9] == 1
+        assert ScoreBucket.objects.get().score == 9
+
+    def test_04_check_buckets(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'text', 4)
+        call_command('rebuild_ratings', '--check', stdout=StringIO())
+        for drift in (
+            lambda: ScoreBucket.objects.update(count=5),
+            lambda: ScoreBucket.objects.all().delete(),
+        ):
+            drift()
+            with pytest.raises(CommandError):
+                call_command(
+                    'rebuild_ratings', '--check', stdout=StringIO()
+                )
+            call_command('rebuild_ratings', stdout=StringIO())
+            call_command('rebuild_ratings', '--check', stdout=StringIO())
+        assert get_score_distributions([titles[0]['id']])[
+            titles[0]['id']
+        ][4] == 1, (
+            'Проверьте, что `rebuild_ratings --check` находит расхождения '
+            'распределения оценок с отзывами.'
+        )
@@ -0,0 +1,192 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.views import ReviewsViewSet
+from reviews.models import Review, ScoreBucket, Title
+from reviews.ratings import find_bucket_drift
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18ReviewRace:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    THREADS = 8
+
+    def test_01_duplicate_review(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        data = {'text': 'Отзыв', 'score': 5}
+        assert user_client.post(url, data=data).status_code == (
+            HTTPStatus.CREATED
+        )
+        response = user_client.post(url, data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json() == {
+            'non_field_errors': ['Вы уже оставили отзыв на это произведение.']
+        }
+
+    def test_02_parallel_posts(self, admin_client, user, token_user,
+                               monkeypatch):
+        titles, _, _ = create_titles(admin_client)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        statuses = []
+
+        # Все запросы проходят валидацию до того, как хотя бы один
+        # вставит отзыв: так гонка воспроизводится на каждом запуске.
+        validated = threading.Barrier(self.THREADS, timeout=10)
+        perform_create = ReviewsViewSet.perform_create
+
+        def perform_create_after_all(view, serializer):
+            validated.wait()
+            perform_create(view, serializer)
+
+        monkeypatch.setattr(
+            ReviewsViewSet, 'perform_create', perform_create_after_all
+        )
+
+        def post_review(score):
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f'Bearer {token_user["access"]}'
+            )
+            try:
+                response = client.post(
+                    url, data={'text': 'Отзыв', 'score': score}
+                )
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=post_review, args=(score,))
+            for score in range(1, self.THREADS + 1)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(statuses) == (
+            [HTTPStatus.CREATED] + [HTTPStatus.BAD_REQUEST] * (
+                self.THREADS - 1
+            )
+        ), (
+            'Проверьте, что из параллельных POST-запросов одного автора к '
+            'одному произведению создаётся ровно один отзыв, а остальные '
+            'получают ответ 400.'
+        )
+        review = Review.objects.get(author=user)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.score_sum, title.score_count) == (review.score, 1)
+        assert list(ScoreBucket.objects.values_list('score', 'count')) == [
+            (review.score, 1)
+        ]
+
+    def test_03_stale_copies(self, admin_client, user):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review = Review.objects.create(
+            author=user, title_id=title_id, text='Отзыв', score=2
+        )
+        first = Review.objects.get(pk=review.pk)
+        second = Review.objects.get(pk=review.pk)
+        first.score = 7
+        first.save()
+        second.score = 9
+        second.save()
+        title = Title.objects.get(pk=title_id)
+        assert (title.score_sum, title.score_count, title.rating) == (
+            9, 1, 9
+        ), (
+            'Проверьте, что рейтинг пересчитывается от оценки из БД, а не '
+            'от устаревшей копии отзыва в памяти.'
+        )
+
+        first.delete()
+        title.refresh_from_db()
+        assert (title.score_sum, title.score_count, title.rating) == (
+            0, 0, None
+        )
+        assert second.delete() == (0, {})
+        title.refresh_from_db()
+        assert title.score_count == 0
+
+    def test_04_stale_buckets(self, admin_client, user):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review = Review.objects.create(
+            author=user, title_id=title_id, text='Отзыв', score=2
+        )
+        copies = [Review.objects.get(pk=review.pk) for _ in range(3)]
+        for copy, score in zip(copies, (7, 9, 4)):
+            copy.score = score
+            copy.save()
+        assert list(
+            ScoreBucket.objects.filter(count__gt=0).values_list(
+                'score', 'count'
+            )
+        ) == [(4, 1)], (
+            'Проверьте, что распределение оценок уменьшается на оценку из '
+            'БД, а не на оценку устаревшей копии отзыва.'
+        )
+        assert not ScoreBucket.objects.filter(count__lt=0).exists()
+        assert not list(find_bucket_drift())
+
+        copies[0].delete()
+        assert not ScoreBucket.objects.filter(count__gt=0).exists()
+        assert not list(find_bucket_drift())
+
+    def test_05_saves_of_deleted_rows(self, admin_client, user, user_client,
+                                      monkeypatch):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        title = Title.objects.only('name').get(pk=title_id)
+        title.name = 'Новое название'
+        with CaptureQueriesContext(connection) as context:
+            title.save()
+        assert not any('"year"' in query['sql'] for query in context), (
+            'Проверьте, что сохранение объекта, загруженного через '
+            '`only()`, не загружает и не перезаписывает отложенные поля.'
+        )
+        assert Title.objects.get(pk=title_id).name == 'Новое название'
+
+        Title.objects.filter(pk=title_id).delete()
+        with pytest.raises(Title.DoesNotExist):
+            title.save()
+        assert not Title.objects.filter(pk=title_id).exists()
+
+        title_id = titles[1]['id']
+        review = Review.objects.create(
+            author=user, title_id=title_id, text='Отзыв', score=2
+        )
+        copy = Review.objects.get(pk=review.pk)
+        review.delete()
+        with pytest.raises(Review.DoesNotExist):
+            copy.save()
+
+        review = Review.objects.create(
+            author=user, title_id=title_id, text='Отзыв', score=2
+        )
+        perform_update = ReviewsViewSet.perform_update
+
+        def delete_first(view, serializer):
+            Review.objects.filter(pk=serializer.instance.pk).delete()
+            perform_update(view, serializer)
+
+        monkeypatch.setattr(ReviewsViewSet, 'perform_update', delete_first)
+        response = user_client.patch(
+            f'{self.REVIEWS_URL_TEMPLATE.format(title_id=title_id)}'
+            f'{review.pk}/',
+            data={'score': 5},
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что изменение отзыва, удалённого параллельным '
+            'запросом, возвращает ответ со статусом 404.'
+        )
+        assert not Review.objects.filter(pk=review.pk).exists()
@@ -0,0 +1,124 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+
+from reviews.comments import recount_comments
+from reviews.models import Review
+from tests.utils import create_single_comment
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19CommentCounters:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+    COMMENT_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/{comment_id}/'
+    )
+
+    def get_review(self, client, title_id, review_id):
+        return client.get(self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=title_id, review_id=review_id
+        )).json()
+
+    def test_01_counters_in_response(self, client, admin_client, content):
+        comments, reviews, titles = content
+        title_id = titles[0]['id']
+        data = self.get_review(client, title_id, reviews[0]['id'])
+        assert data['comments_count'] == len(comments), (
+            'Проверьте, что ответ с отзывом содержит поле `comments_count` '
+            'с числом комментариев.'
+        )
+        last_comment = client.get(
+            self.COMMENT_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id,
+                review_id=reviews[0]['id'],
+                comment_id=comments[-1]['id'],
+            )
+        ).json()
+        assert data['last_comment_at'] == last_comment['pub_date'], (
+            'Проверьте, что `last_comment_at` совпадает с датой последнего '
+            'комментария.'
+        )
+        data = self.get_review(client, title_id, reviews[1]['id'])
+        assert (data['comments_count'], data['last_comment_at']) == (0, None)
+
+        admin_client.delete(self.COMMENT_DETAIL_URL_TEMPLATE.format(
+            title_id=title_id,
+            review_id=reviews[0]['id'],
+            comment_id=comments[-1]['id'],
+        ))
+        data = self.get_review(client, title_id, reviews[0]['id'])
+        assert data['comments_count'] == len(comments) - 1, (
+            'Проверьте, что удаление комментария уменьшает счётчик.'
+        )
+        assert data['last_comment_at'] < last_comment['pub_date'], (
+            'Проверьте, что после удаления последнего комментария '
+            '`last_comment_at` указывает на предыдущий.'
+        )
+
+    def test_02_cascade_delete(self, client, admin_client, user, content):
+        comments, reviews, titles = content
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        data = self.get_review(client, titles[0]['id'], reviews[0]['id'])
+        assert data['comments_count'] == len(comments) - 1, (
+            'Проверьте, что счётчик комментариев пересчитывается при '
+            'каскадном удалении автора.'
+        )
+
+    def test_03_ordering(self, client, user_client, content):
+        comments, reviews, titles = content
+        title_id = titles[0]['id']
+        create_single_comment(user_client, title_id, reviews[2]['id'], 'c')
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title_id)
+        expected = [reviews[0]['id'], reviews[2]['id'], reviews[1]['id']]
+        for pagination in ('offset', 'cursor'):
+            response = client.get(url, data={
+                'ordering': '-comments_count', 'pagination': pagination
+            })
+            assert response.status_code == HTTPStatus.OK
+            assert [
+                review['id'] for review in response.json()['results']
+            ] == expected, (
+                'Проверьте, что отзывы сортируются по числу комментариев '
+                f'при пагинации `{pagination}`.'
+            )
+        response = client.get(url, data={
+            'ordering': '-comments_count', 'pagination': 'cursor', 'limit': 1
+        })
+        response = client.get(response.json()['next'])
+        assert [review['id'] for review in response.json()['results']] == [
+            reviews[2]['id']
+        ], 'Проверьте, что курсор учитывает выбранную сортировку.'
+        assert client.get(
+            url, data={'ordering': 'text'}
+        ).status_code == HTTPStatus.OK
+
+    def test_04_index_scan(self, content):
+        _, _, titles = content
+        queryset = Review.objects.filter(
+            title_id=titles[0]['id']
+        ).order_by('-comments_count', 'id')
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        assert 'review_discussed_idx' in plan
+        assert 'TEMP B-TREE' not in plan, (
+            'Проверьте, что сортировка по числу комментариев идёт по '
+            'индексу без отдельной сортировки.'
+        )
+
+    def test_05_recount(self, content):
+        comments, reviews, _ = content
+        Review.objects.update(comments_count=100, last_comment_at=None)
+        assert recount_comments() == len(reviews)
+        review = Review.objects.get(pk=reviews[0]['id'])
+        assert review.comments_count == len(comments)
+        assert review.last_comment_at is not None
+        assert Review.objects.filter(comments_count=0).count() == (
+            len(reviews) - 1
+        )
@@ -0,0 +1,163 @@
+import re
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+PLAN_TABLE_SIZE = 200
+FULL_SCAN = re.compile(r'^SCAN \S+$')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+# Поиск по подстроке (`name`, `search`), полнотекстовый поиск (`q`) и
+# фильтр по жанру через M2M сортируют уже отобранные строки и в список
+# не входят.
+ENDPOINTS = (
+    ('/api/v1/titles/', {}, 'reviews_title'),
+    ('/api/v1/titles/', {'category': 'films'}, 'reviews_title'),
+    ('/api/v1/titles/', {'year': 1984}, 'reviews_title'),
+    ('/api/v1/titles/{title_id}/reviews/', {}, 'reviews_review'),
+    (
+        '/api/v1/titles/{title_id}/reviews/',
+        {'ordering': '-comments_count'},
+        'reviews_review',
+    ),
+    (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+        {},
+        'reviews_comment',
+    ),
+    ('/api/v1/categories/', {}, 'reviews_category'),
+    ('/api/v1/genres/', {}, 'reviews_genre'),
+    ('/api/v1/users/', {}, 'users_user'),
+)
+
+
+def fill_tables(title_id, review_id, size=PLAN_TABLE_SIZE):
+    """
+    Заполняет таблицы до ``size`` строк и собирает статистику ANALYZE.
+
+    На нескольких строках планировщик справедливо читает таблицу целиком,
+    поэтому планы проверяются на данных заметного размера и с актуальной
+    статистикой, как в рабочей базе.
+    """
+    category = Category.objects.get(slug='films')
+    users = User.objects.bulk_create(
+        User(username=f'plan{number}', email=f'plan{number}@yamdb.fake')
+        for number in range(size)
+    )
+    Category.objects.bulk_create(
+        Category(name=f'Категория {number}', slug=f'plan-{number}')
+        for number in range(size)
+    )
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {number}', slug=f'plan-{number}')
+        for number in range(size)
+    )
+    titles = Title.objects.bulk_create(
+        Title(
+            name=f'План {number}',
+            year=1900 + number % 100,
+            category=category if number % 2 else None,
+            description='',
+        )
+        for number in range(size)
+    )
+    Review.objects.bulk_create(
+        [
+            Review(author=user, title=title, text='', score=5)
+            for user, title in zip(users, titles)
+        ] + [
+            Review(author=user, title_id=title_id, text='', score=5)
+            for user in users
+        ]
+    )
+    Comment.objects.bulk_create(
+        Comment(author=user, review_id=review_id, text='') for user in users
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def explain(sql):
+    """План запроса SQLite: по строке на каждый шаг."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def check_query_plan(client, url, params, table):
+    """
+    Выполняет GET-запрос и проверяет план запроса страницы.
+
+    Запросом страницы считается SELECT из основной таблицы эндпоинта с
+    ORDER BY. Он не должен читать таблицу целиком без индекса и
+    сортировать строки во временном B-дереве.
+    """
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, data=params)
+    assert response.status_code == HTTPStatus.OK
+    page_queries = [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith('SELECT')
+        and f'FROM "{table}"' in query['sql']
+        and 'ORDER BY' in query['sql']
+    ]
+    assert page_queries, f'Запрос страницы к `{table}` не найден.'
+    for sql in page_queries:
+        plan = explain(sql)
+        assert not [
+            step for step in plan
+            if FULL_SCAN.match(step) or TEMP_SORT in step
+        ], (
+            f'Проверьте индексы для `GET {url}` с параметрами {params}: '
+            f'запрос страницы читает таблицу целиком или сортирует '
+            f'результат.\n{sql}\n' + '\n'.join(plan)
+        )
+    return response
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20QueryPlans:
+
+    @pytest.fixture
+    def ids(self, admin_client, content):
+        comments, reviews, titles = content
+        response = admin_client.post('/api/v1/titles/bulk/', data=[
+            {
+                'name': f'Произведение {idx}',
+                'year': titles[0]['year'],
+                'genre': titles[0]['genre'],
+                'category': titles[0]['category'],
+                'description': 'Описание',
+            }
+            for idx in range(2)
+        ], format='json')
+        assert response.status_code == HTTPStatus.CREATED
+        fill_tables(titles[0]['id'], reviews[0]['id'])
+        return {'title_id': titles[0]['id'], 'review_id': reviews[0]['id']}
+
+    @pytest.mark.parametrize('url,params,table', ENDPOINTS)
+    @pytest.mark.parametrize('pagination', ('offset', 'cursor'))
+    def test_01_first_page(self, admin_client, ids, url, params, table,
+                           pagination):
+        check_query_plan(
+            admin_client,
+            url.format(**ids),
+            {**params, 'pagination': pagination},
+            table,
+        )
+
+    @pytest.mark.parametrize('url,params,table', ENDPOINTS)
+    def test_02_next_cursor_page(self, admin_client, ids, url, params,
+                                 table):
+        response = admin_client.get(
+            url.format(**ids),
+            data={**params, 'pagination': 'cursor', 'limit': 1},
+        )
+        next_url = response.json()['next']
+        assert next_url
+        check_query_plan(admin_client, next_url, {}, table)
@@ -0,0 +1,131 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import ClaimsUser
+from api.permissions import (
+    IsAdmin,
+    IsAdminOrModeratorOrAuthor,
+    IsAdminOrReadOnly,
+)
+from api.tokens import RoleAccessToken
+from reviews.models import Review
+from tests.utils import create_reviews
+
+
+def make_request(method, user):
+    request = getattr(APIRequestFactory(), method.lower())('/')
+    request.user = user
+    return request
+
+
+def token_user(user):
+    """Пользователь, восстановленный из токена без обращения к БД."""
+    return ClaimsUser(RoleAccessToken.for_user(user))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21Permissions:
+
+    def test_01_role_claims(self, client, user_superuser):
+        response = client.post('/api/v1/auth/token/', data={
+            'username': user_superuser.username,
+            'confirmation_code': default_token_generator.make_token(
+                user_superuser
+            ),
+        })
+        assert response.status_code == HTTPStatus.OK
+        token = AccessToken(response.json()['token'])
+        assert (token['role'], token['is_superuser']) == ('user', True), (
+            'Проверьте, что токен содержит роль пользователя в клеймах '
+            '`role` и `is_superuser`.'
+        )
+
+    def test_02_role_permissions_from_claims(self, admin, moderator, user,
+                                             user_superuser):
+        cases = (
+            (admin, True),
+            (user_superuser, True),
+            (moderator, False),
+            (user, False),
+        )
+        with CaptureQueriesContext(connection) as context:
+            for db_user, expected in cases:
+                for permission in (IsAdmin(), IsAdminOrReadOnly()):
+                    assert permission.has_permission(
+                        make_request('POST', token_user(db_user)), None
+                    ) is expected
+            assert IsAdminOrReadOnly().has_permission(
+                make_request('GET', AnonymousUser()), None
+            )
+            assert not IsAdmin().has_permission(
+                make_request('GET', AnonymousUser()), None
+            )
+        assert len(context) == 0, (
+            'Проверьте, что пермишны по роли работают по клеймам токена '
+            'без запросов к БД.'
+        )
+
+    def test_03_object_permission_by_id(self, admin_client, admin, user,
+                                        user_client, moderator,
+                                        django_user_model):
+        create_reviews(admin_client, {user: user_client})
+        other = django_user_model.objects.create(
+            username='other', email='other@yamdb.fake'
+        )
+        review = Review.objects.get()
+        permission = IsAdminOrModeratorOrAuthor()
+        cases = (
+            (user, True),
+            (token_user(user), True),
+            (moderator, True),
+            (token_user(moderator), True),
+            (token_user(admin), True),
+            (token_user(other), False),
+        )
+        with CaptureQueriesContext(connection) as context:
+            for request_user, expected in cases:
+                assert permission.has_object_permission(
+                    make_request('DELETE', request_user), None, review
+                ) is expected
+        assert len(context) == 0, (
+            'Проверьте, что автор объекта сравнивается по `author_id`, '
+            'без загрузки пользователя из БД.'
+        )
+
+    def test_04_filter_queryset(self, admin_client, admin, user, user_client,
+                                moderator, moderator_client):
+        create_reviews(admin_client, {
+            user: user_client, moderator: moderator_client
+        })
+        permission = IsAdminOrModeratorOrAuthor()
+        queryset = Review.objects.all()
+
+        def allowed(request_user):
+            request = make_request('DELETE', request_user)
+            with CaptureQueriesContext(connection) as context:
+                authors = set(
+                    permission.filter_queryset(request, queryset)
+                    .values_list('author__username', flat=True)
+                )
+            assert len(context) <= 1, (
+                'Проверьте, что права на набор объектов проверяются одним '
+                'запросом.'
+            )
+            return authors
+
+        assert allowed(token_user(user)) == {user.username}
+        assert allowed(user) == {user.username}
+        assert allowed(token_user(moderator)) == {
+            user.username, moderator.username
+        }
+        assert allowed(token_user(admin)) == {
+            user.username, moderator.username
+        }
+        assert allowed(AnonymousUser()) == set()
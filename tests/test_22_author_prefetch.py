@@ -0,0 +1,62 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22AuthorPrefetch:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    @pytest.fixture
+    def urls(self, content):
+        comments, reviews, titles = content
+        return (
+            self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id']),
+            self.COMMENTS_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[0]['id']
+            ),
+        )
+
+    def get_page_sql(self, client, url, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, data=params)
+        authors = {item.get('author') for item in response.json()['results']}
+        sql = [
+            query['sql'] for query in context.captured_queries
+            if 'COUNT(*)' not in query['sql']
+        ]
+        return sql, authors
+
+    @pytest.mark.parametrize('url_index', (0, 1))
+    def test_01_author_join(self, client, urls, url_index):
+        url = urls[url_index]
+        counts = set()
+        for limit in (1, 2, 3):
+            sql, authors = self.get_page_sql(client, url, limit=limit)
+            counts.add(len(sql))
+            assert len(authors) == limit
+        assert counts == {1}, (
+            'Проверьте, что авторы отзывов и комментариев загружаются тем '
+            'же запросом, что и страница, при любом `limit`.'
+        )
+        assert '"users_user"."username"' in sql[0]
+        for column in ('password', 'email', 'bio'):
+            assert f'"users_user"."{column}"' not in sql[0], (
+                'Проверьте, что из полей автора загружается только '
+                '`username`.'
+            )
+
+    @pytest.mark.parametrize('url_index', (0, 1))
+    def test_02_sparse_fields(self, client, urls, url_index):
+        url = urls[url_index]
+        sql, _ = self.get_page_sql(client, url, fields='id,text')
+        assert 'users_user' not in sql[0], (
+            'Проверьте, что без поля `author` пользователи не джойнятся.'
+        )
+        sql, authors = self.get_page_sql(client, url, fields='id,author')
+        assert len(sql) == 1 and None not in authors
+        assert '"users_user"."password"' not in sql[0]
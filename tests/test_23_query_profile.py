@@ -0,0 +1,136 @@
+import json
+import logging
+
+import pytest
+
+from api.instrumentation import logger, profile_queries, query_shape
+from api.views import ReviewsViewSet
+from reviews.models import Review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23QueryProfile:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    @pytest.fixture
+    def reviews_url(self, content):
+        _, _, titles = content
+        return self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+
+    def test_01_debug_headers(self, settings, admin_client, reviews_url):
+        settings.DEBUG = True
+        with profile_queries() as profile:
+            response = admin_client.get(reviews_url)
+        assert int(response['X-DB-Queries']) == profile.count > 0, (
+            'Проверьте, что в режиме DEBUG ответ содержит число запросов к '
+            'БД в заголовке `X-DB-Queries`.'
+        )
+        assert float(response['X-DB-Time']) >= 0
+        assert response['X-DB-Repeated'] == '0'
+
+        settings.DEBUG = False
+        response = admin_client.get(reviews_url)
+        assert 'X-DB-Queries' not in response, (
+            'Проверьте, что вне режима DEBUG заголовки со статистикой '
+            'запросов не отдаются.'
+        )
+
+    def test_02_log_line(self, settings, caplog, monkeypatch, admin_client,
+                         reviews_url):
+        settings.QUERY_PROFILE_SAMPLE_RATE = 1
+        settings.QUERY_PROFILE_BUDGET = 0
+        monkeypatch.setattr(logger, 'propagate', True)
+        with caplog.at_level(logging.INFO, logger='api.queries'):
+            admin_client.get(reviews_url)
+        record = caplog.records[-1]
+        data = json.loads(record.getMessage())
+        assert (data['method'], data['path'], data['status']) == (
+            'GET', reviews_url, 200
+        )
+        assert data['queries'] >= 1 and data['repeated'] == []
+        assert len(data['slowest']) <= 3
+        assert [item['ms'] for item in data['slowest']] == sorted(
+            (item['ms'] for item in data['slowest']), reverse=True
+        )
+        assert record.levelno == logging.INFO
+
+    def test_03_n_plus_one(self, settings, client, monkeypatch, caplog,
+                           query_budget, reviews_url):
+        settings.QUERY_PROFILE_SAMPLE_RATE = 1
+        monkeypatch.setattr(ReviewsViewSet, 'queryset', Review.objects.all())
+        monkeypatch.setattr(logger, 'propagate', True)
+        with pytest.raises(AssertionError, match='N\\+1'):
+            with query_budget(100):
+                with caplog.at_level(logging.INFO, logger='api.queries'):
+                    client.get(reviews_url)
+        data = json.loads(caplog.records[-1].getMessage())
+        assert caplog.records[-1].levelno == logging.WARNING
+        assert [
+            (item['count'], item['origin']) for item in data['repeated']
+        ] == [(3, 'ReviewSerializer.author')], (
+            'Проверьте, что повторяющиеся запросы находятся вместе с полем '
+            'сериализатора, из которого они выполняются.'
+        )
+
+    def test_04_query_budget(self, client, query_budget, reviews_url):
+        with query_budget(2) as profile:
+            client.get(reviews_url)
+        assert profile.count == 2
+        with pytest.raises(AssertionError, match='бюджет'):
+            with query_budget(1):
+                client.get(reviews_url, data={'ordering': 'pub_date'})
+
+    def test_05_query_shape(self):
+        assert query_shape(
+            'SELECT 1 WHERE id IN (%s, %s, %s) AND x = %s'
+        ) == 'SELECT 1 WHERE id IN (%s) AND x = %s'
+
+    def test_06_quiet_and_sampled(self, settings, caplog, monkeypatch,
+                                  admin_client, reviews_url):
+        settings.QUERY_PROFILE_SAMPLE_RATE = 1
+        monkeypatch.setattr(logger, 'propagate', True)
+        with caplog.at_level(logging.INFO, logger='api.queries'):
+            admin_client.get(reviews_url)
+        assert not [
+            record for record in caplog.records
+            if record.name == 'api.queries'
+        ], (
+            'Проверьте, что запрос в пределах `QUERY_PROFILE_BUDGET` без '
+            'повторов не пишется в лог с уровнем INFO.'
+        )
+
+        settings.DEBUG = True
+        settings.QUERY_PROFILE_SAMPLE_RATE = 0
+        with caplog.at_level(logging.DEBUG, logger='api.queries'):
+            response = admin_client.get(reviews_url)
+        assert 'X-DB-Queries' not in response
+        assert not [
+            record for record in caplog.records
+            if record.name == 'api.queries'
+        ], (
+            'Проверьте, что при `QUERY_PROFILE_SAMPLE_RATE = 0` запросы не '
+            'профилируются.'
+        )
+
+    def test_07_streaming_body(self, settings, caplog, monkeypatch,
+                               admin_client, reviews_url):
+        settings.QUERY_PROFILE_SAMPLE_RATE = 1
+        settings.QUERY_PROFILE_BUDGET = 0
+        monkeypatch.setattr(logger, 'propagate', True)
+        export_url = reviews_url.replace('reviews/', 'export/')
+        with caplog.at_level(logging.INFO, logger='api.queries'):
+            with profile_queries() as profile:
+                response = admin_client.get(export_url)
+                assert response.streaming
+                b''.join(response.streaming_content)
+        records = [
+            record for record in caplog.records
+            if record.name == 'api.queries'
+        ]
+        assert records
+        data = json.loads(records[-1].getMessage())
+        assert data['queries'] == profile.count, (
+            'Проверьте, что у потокового ответа учитываются запросы, '
+            'выполненные при чтении тела.'
+        )
@@ -0,0 +1,109 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.utils import timezone
+
+from api import exports
+from api.instrumentation import profile_queries
+from reviews.models import Comment, Review
+from tests.utils import create_single_comment
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24Export:
+
+    EXPORT_URL_TEMPLATE = '/api/v1/titles/{title_id}/export/'
+
+    def export(self, client, title_id, **params):
+        with profile_queries() as profile:
+            response = client.get(
+                self.EXPORT_URL_TEMPLATE.format(title_id=title_id),
+                data=params,
+            )
+            assert response.status_code == HTTPStatus.OK
+            assert response.streaming, (
+                'Проверьте, что выгрузка отдаётся потоком '
+                '(`StreamingHttpResponse`).'
+            )
+            body = b''.join(response.streaming_content).decode()
+        assert response['Content-Type'] == 'application/x-ndjson'
+        return [json.loads(line) for line in body.splitlines()], profile
+
+    def test_01_reviews(self, client, content):
+        _, reviews, titles = content
+        lines, _ = self.export(client, titles[0]['id'])
+        assert [line['id'] for line in lines] == [
+            review['id'] for review in reversed(reviews)
+        ], (
+            'Проверьте, что выгрузка содержит все отзывы в порядке списка '
+            'отзывов: от новых к старым.'
+        )
+        assert {line['type'] for line in lines} == {'review'}
+        assert lines[-1]['author'] == reviews[0]['author']
+        assert lines[-1]['title'] == titles[0]['id']
+        assert lines[-1]['comments_count'] == 3
+
+        lines, _ = self.export(client, titles[1]['id'])
+        assert lines == []
+
+    def test_02_comments(self, client, user_client, content):
+        comments, reviews, titles = content
+        create_single_comment(
+            user_client, titles[0]['id'], reviews[2]['id'], 'последний'
+        )
+        lines, _ = self.export(client, titles[0]['id'], comments='true')
+        assert [(line['type'], line['id']) for line in lines] == [
+            ('review', reviews[2]['id']),
+            ('comment', Comment.objects.latest('pub_date').pk),
+            ('review', reviews[1]['id']),
+            ('review', reviews[0]['id']),
+            *(('comment', comment['id']) for comment in reversed(comments)),
+        ], (
+            'Проверьте, что при `comments=true` после каждого отзыва идут '
+            'его комментарии.'
+        )
+        assert all(line['review'] == reviews[0]['id'] for line in lines[4:])
+
+    def test_03_since(self, client, user_client, content):
+        comments, reviews, titles = content
+        title_id = titles[0]['id']
+        since = Review.objects.get(pk=reviews[1]['id']).pub_date
+        lines, _ = self.export(client, title_id, since=since.isoformat())
+        assert [line['id'] for line in lines] == [
+            reviews[2]['id'], reviews[1]['id']
+        ], 'Проверьте, что `since` оставляет только новые отзывы.'
+
+        since = timezone.now()
+        create_single_comment(user_client, title_id, reviews[0]['id'], 'new')
+        lines, _ = self.export(
+            client, title_id, since=since.isoformat(), comments='1'
+        )
+        assert [(line['type'], line['id']) for line in lines] == [
+            ('review', reviews[0]['id']),
+            ('comment', Comment.objects.latest('pub_date').pk),
+        ], (
+            'Проверьте, что с `comments` и `since` выгружаются новые '
+            'комментарии вместе с их отзывами.'
+        )
+
+    def test_04_constant_queries(self, client, monkeypatch, content):
+        _, _, titles = content
+        monkeypatch.setattr(exports, 'EXPORT_CHUNK_SIZE', 1)
+        _, profile = self.export(client, titles[0]['id'], comments='true')
+        assert profile.count == 3 and not profile.repeated, (
+            'Проверьте, что выгрузка читает отзывы и комментарии '
+            'итераторами без запросов на каждый объект.\n'
+            + profile.report()
+        )
+
+    def test_05_errors(self, client, content):
+        _, _, titles = content
+        response = client.get(self.EXPORT_URL_TEMPLATE.format(title_id=0))
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        response = client.get(
+            self.EXPORT_URL_TEMPLATE.format(title_id=titles[0]['id']),
+            data={'since': 'вчера'},
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'since' in json.loads(response.content)
@@ -0,0 +1,319 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.checks import run_checks
+from django.db import connection
+
+from reviews.models import Change, Comment, Review, Title
+from reviews.ratings import rebuild_ratings
+from tests.utils import (
+    create_categories,
+    create_genre,
+    create_single_comment,
+)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25Changes:
+
+    CHANGES_URL = '/api/v1/changes/'
+    COMMENT_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+        '{comment_id}/'
+    )
+
+    @staticmethod
+    def log():
+        return list(
+            Change.objects.values_list('model', 'object_id', 'action')
+        )
+
+    def read_feed(self, client, **params):
+        response = client.get(self.CHANGES_URL, data=params)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос администратора к `{self.CHANGES_URL}` '
+            'возвращает ответ со статусом 200.'
+        )
+        return response.json()
+
+    def test_01_log(self, admin_client, content):
+        comments, reviews, titles = content
+        created = [
+            ('review', review['id'], 'created') for review in reviews
+        ] + [('comment', comment['id'], 'created') for comment in comments]
+        assert [
+            change for change in self.log() if change[0] != 'title'
+        ] == created, (
+            'Проверьте, что создание отзывов и комментариев записывается в '
+            'журнал изменений в порядке создания.'
+        )
+        last = Change.objects.latest('id')
+        assert (last.title_id, last.review_id) == (
+            titles[0]['id'], reviews[0]['id']
+        )
+
+        url = self.COMMENT_URL_TEMPLATE.format(
+            title_id=titles[0]['id'],
+            review_id=reviews[0]['id'],
+            comment_id=comments[0]['id'],
+        )
+        admin_client.patch(url, data={'text': 'исправлено'})
+        admin_client.delete(url)
+        changes = list(Change.objects.order_by('-id')[:2])
+        assert [
+            (change.object_id, change.action) for change in reversed(changes)
+        ] == [(comments[0]['id'], 'updated'), (comments[0]['id'], 'deleted')]
+        assert all(
+            change.title_id == titles[0]['id'] for change in changes
+        ), (
+            'Проверьте, что записи журнала о комментарии содержат '
+            'произведение, даже если отзыв не загружался.'
+        )
+
+    def test_02_cascade(self, admin_client, user, content):
+        comments, reviews, titles = content
+        user_review = next(
+            review for review in reviews if review['author'] == user.username
+        )
+        # Чужой комментарий к отзыву пользователя удаляется вместе с
+        # отзывом, но произведение для записи журнала ещё можно найти.
+        other_comment = create_single_comment(
+            admin_client, titles[0]['id'], user_review['id'], 'чужой'
+        ).json()
+        start = Change.objects.latest('id').pk
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert set(
+            Change.objects.filter(pk__gt=start).values_list(
+                'model', 'object_id', 'action'
+            )
+        ) == {
+            ('comment', comment['id'], 'deleted')
+            for comment in comments if comment['author'] == user.username
+        } | {
+            ('comment', other_comment['id'], 'deleted'),
+            ('review', user_review['id'], 'deleted'),
+            ('title', titles[0]['id'], 'updated'),
+        }, (
+            'Проверьте, что удаление отзывов и комментариев вместе с '
+            'пользователем записывается в журнал по каждому объекту.'
+        )
+
+        start = Change.objects.latest('id').pk
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert list(
+            Change.objects.filter(pk__gt=start).values_list(
+                'model', 'object_id', 'action'
+            )
+        ) == [('title', titles[0]['id'], 'deleted')], (
+            'Проверьте, что при удалении произведения в журнал пишется '
+            'одна запись: его отзывы и комментарии удаляются вместе с ним.'
+        )
+
+    def test_03_feed(self, admin_client, content):
+        total = Change.objects.count()
+        seen, cursor, has_more = [], 0, True
+        while has_more:
+            data = self.read_feed(admin_client, after=cursor, limit=4)
+            assert len(data['results']) <= 4
+            seen.extend(item['id'] for item in data['results'])
+            cursor, has_more = data['cursor'], data['has_more']
+        assert seen == list(
+            Change.objects.order_by('id').values_list('id', flat=True)
+        ), (
+            f'Проверьте, что `{self.CHANGES_URL}` по курсору `after` отдаёт '
+            'все записи журнала по возрастанию id без пропусков.'
+        )
+        assert len(seen) == total
+        assert cursor == seen[-1]
+
+        data = self.read_feed(admin_client, after=cursor)
+        assert data['results'] == []
+        assert data['cursor'] == cursor
+        assert data['has_more'] is False
+        assert f'after={cursor}' in data['next'], (
+            'Проверьте, что на последней странице курсор и ссылка `next` '
+            'сохраняются, чтобы потребитель мог продолжить чтение.'
+        )
+
+        data = self.read_feed(admin_client, model='comment')
+        assert data['results']
+        assert {item['model'] for item in data['results']} == {'comment'}
+        item = data['results'][0]
+        assert set(item) == {
+            'id', 'model', 'object_id', 'action', 'title', 'review',
+            'created',
+        }
+
+    def test_04_feed_queries(self, admin_client, admin, content,
+                             django_assert_num_queries):
+        # Пользователь из токена и одна выборка записей — независимо от
+        # размера пачки.
+        for limit in (1, 10, 100):
+            with django_assert_num_queries(2):
+                self.read_feed(admin_client, after=0, limit=limit)
+
+    def test_05_access(self, client, user_client, moderator_client,
+                       admin_client):
+        assert client.get(self.CHANGES_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+        for role_client in (user_client, moderator_client):
+            assert role_client.get(self.CHANGES_URL).status_code == (
+                HTTPStatus.FORBIDDEN
+            ), (
+                f'Проверьте, что `{self.CHANGES_URL}` доступен только '
+                'администратору.'
+            )
+        for after in ('-1', 'abc'):
+            response = admin_client.get(
+                self.CHANGES_URL, data={'after': after}
+            )
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+            assert 'after' in response.json()
+
+    def test_06_bulk_titles(self, admin_client):
+        categories = create_categories(admin_client)
+        genres = create_genre(admin_client)
+        data = [
+            {
+                'name': f'Произведение {number}',
+                'year': 2000,
+                'description': 'Описание',
+                'category': categories[0]['slug'],
+                'genre': [genres[0]['slug']],
+            }
+            for number in range(3)
+        ]
+        response = admin_client.post(
+            '/api/v1/titles/bulk/', data=data, format='json'
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert self.log() == [
+            ('title', title['id'], 'created') for title in response.json()
+        ], (
+            'Проверьте, что произведения, созданные массово, тоже '
+            'записываются в журнал изменений.'
+        )
+
+    def test_07_rating_changes(self, admin_client, user_client, content):
+        _, reviews, titles = content
+        title_id = titles[0]['id']
+        review = next(
+            review for review in reviews if review['author'] == 'TestUser'
+        )
+        start = Change.objects.latest('id').pk
+        user_client.patch(
+            f'/api/v1/titles/{title_id}/reviews/{review["id"]}/',
+            data={'score': 1},
+        )
+        assert list(
+            Change.objects.filter(pk__gt=start).values_list(
+                'model', 'object_id', 'action'
+            )
+        ) == [
+            ('title', title_id, 'updated'),
+            ('review', review['id'], 'updated'),
+        ], (
+            'Проверьте, что изменение рейтинга произведения отзывом '
+            'записывается в журнал как изменение произведения.'
+        )
+
+        start = Change.objects.latest('id').pk
+        rebuild_ratings()
+        assert not Change.objects.filter(pk__gt=start).exists()
+        Change.objects.all().delete()
+        Title.objects.filter(pk=title_id).update(score_sum=0)
+        rebuild_ratings()
+        assert self.log() == [('title', title_id, 'updated')], (
+            'Проверьте, что пересчёт рейтингов записывает в журнал '
+            'произведения, у которых рейтинг изменился.'
+        )
+
+    def test_08_feed_database_check(self, monkeypatch):
+        def warnings():
+            return [message.id for message in run_checks()]
+
+        assert 'api.W002' not in warnings()
+        monkeypatch.setattr(connection, 'vendor', 'postgresql')
+        assert 'api.W002' in warnings(), (
+            'Проверьте, что проверка системы предупреждает о курсоре '
+            'ленты изменений вне SQLite.'
+        )
+
+    def test_09_rollback(self, admin_client, user_client, content,
+                         monkeypatch):
+        _, reviews, titles = content
+        title_id = titles[0]['id']
+        review = next(
+            review for review in reviews
+            if review['author'] == 'TestUser'
+            and Review.objects.filter(
+                pk=review['id'], title_id=title_id
+            ).exists()
+        )
+        review_url = f'/api/v1/titles/{title_id}/reviews/{review["id"]}/'
+
+        def state():
+            title = Title.objects.get(pk=title_id)
+            return (
+                title.name,
+                list(title.genre.values_list('slug', flat=True)),
+                title.score_sum,
+                title.rating,
+                list(Review.objects.values_list('id', 'score')),
+                list(Comment.objects.values_list('id', flat=True)),
+                list(Review.objects.values_list('id', 'comments_count')),
+                Change.objects.count(),
+            )
+
+        def fail(*args, **kwargs):
+            raise RuntimeError('Сбой записи в журнал')
+
+        before = state()
+        monkeypatch.setattr('reviews.signals.record_change', fail)
+        requests = (
+            (admin_client.post, review_url + 'comments/', {'text': 'Сбой'}),
+            (user_client.patch, review_url, {'score': 1}),
+            (
+                admin_client.patch,
+                f'/api/v1/titles/{title_id}/',
+                {'name': 'Сбой'},
+            ),
+            (admin_client.delete, review_url, {}),
+        )
+        for method, url, data in requests:
+            with pytest.raises(RuntimeError):
+                method(url, data=data, format='json')
+            assert state() == before, (
+                'Проверьте, что изменение объекта, его счётчики и запись '
+                'в журнал изменений сохраняются в одной транзакции: при '
+                f'сбое запроса к `{url}` ничего не должно измениться.'
+            )
+
+    def test_10_queryset_cascade(self, content):
+        review = Review.objects.filter(comments__isnull=False).first()
+        title_id = review.title_id
+        start = Change.objects.latest('id').pk
+        Review.objects.filter(pk=review.pk).delete()
+        assert set(
+            Change.objects.filter(pk__gt=start).values_list(
+                'model', 'object_id', 'action'
+            )
+        ) == {
+            ('review', review.pk, 'deleted'),
+            ('title', title_id, 'updated'),
+        }, (
+            'Проверьте, что при удалении отзывов через QuerySet их '
+            'комментарии не записываются в журнал по отдельности.'
+        )
+
+        start = Change.objects.latest('id').pk
+        Title.objects.filter(pk=title_id).delete()
+        assert list(
+            Change.objects.filter(pk__gt=start).values_list(
+                'model', 'object_id', 'action'
+            )
+        ) == [('title', title_id, 'deleted')], (
+            'Проверьте, что удаление произведения через QuerySet (как в '
+            'действии админки) записывается в журнал одной записью.'
+        )
@@ -0,0 +1,188 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews import moderation
+from reviews.models import Change, Comment, Review, ScoreBucket, Title
+from reviews.ratings import find_rating_drift, rebuild_ratings
+from tests.utils import create_titles
+from users.models import User
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26BulkDelete:
+
+    BULK_DELETE_URL = '/api/v1/moderation/delete/'
+
+    @pytest.fixture
+    def many_reviews(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        authors = User.objects.bulk_create(
+            User(username=f'spam{number}', email=f'spam{number}@yamdb.fake')
+            for number in range(12)
+        )
+        Review.objects.bulk_create(
+            Review(
+                author=author,
+                title_id=title['id'],
+                text='Спам',
+                score=number % 10 + 1,
+            )
+            for number, author in enumerate(authors)
+            for title in titles
+        )
+        rebuild_ratings()
+        return titles, authors
+
+    def bulk_delete(self, client, **data):
+        response = client.post(self.BULK_DELETE_URL, data=data, format='json')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что POST-запрос модератора к '
+            f'`{self.BULK_DELETE_URL}` возвращает ответ со статусом 200.'
+        )
+        return response.json()
+
+    def check_counters(self):
+        assert not find_rating_drift().exists(), (
+            'Проверьте, что после массового удаления отзывов оценки '
+            'произведений пересчитываются.'
+        )
+        for title in Title.objects.all():
+            buckets = {
+                bucket.score: bucket.count
+                for bucket in ScoreBucket.objects.filter(title=title)
+                if bucket.count
+            }
+            expected = {}
+            for score in title.reviews.values_list('score', flat=True):
+                expected[score] = expected.get(score, 0) + 1
+            assert buckets == expected
+
+    def test_01_delete_reviews_by_ids(self, moderator_client, content):
+        comments, reviews, titles = content
+        start = Change.objects.latest('id').pk
+        ids = [reviews[0]['id'], reviews[2]['id']]
+        data = self.bulk_delete(
+            moderator_client, model='reviews', ids=[*ids, 10 ** 6]
+        )
+        assert data == {'deleted': 2, 'not_found': [10 ** 6]}, (
+            'Проверьте, что ответ содержит число удалённых объектов и '
+            'идентификаторы, которых нет или которые удалять нельзя.'
+        )
+        assert list(Review.objects.values_list('id', flat=True)) == [
+            reviews[1]['id']
+        ]
+        assert not Comment.objects.exists()
+        self.check_counters()
+        assert Title.objects.get(pk=titles[0]['id']).rating == 5
+        assert sorted(
+            Change.objects.filter(pk__gt=start).values_list(
+                'model', 'object_id', 'action'
+            )
+        ) == [('review', review_id, 'deleted') for review_id in ids] + [
+            ('title', titles[0]['id'], 'updated')
+        ], (
+            'Проверьте, что массовое удаление записывается в журнал '
+            'изменений без каскадно удалённых комментариев.'
+        )
+
+    def test_02_queries_do_not_depend_on_size(self, moderator_client,
+                                              many_reviews, monkeypatch):
+        titles, authors = many_reviews
+        counts = []
+        for author in authors[:2]:
+            with CaptureQueriesContext(connection) as context:
+                self.bulk_delete(
+                    moderator_client, model='reviews',
+                    author=author.username,
+                )
+            counts.append(len(context))
+        monkeypatch.setattr(moderation, 'DELETE_CHUNK_SIZE', 100)
+        ids = list(
+            Review.objects.exclude(author=authors[-1]).values_list(
+                'id', flat=True
+            )
+        )
+        assert len(ids) > 2 * len(titles)
+        with CaptureQueriesContext(connection) as context:
+            data = self.bulk_delete(moderator_client, model='reviews', ids=ids)
+        assert data['deleted'] == len(ids)
+        counts.append(len(context))
+        assert len(set(counts)) == 1, (
+            'Проверьте, что число запросов к БД при массовом удалении не '
+            f'зависит от числа отзывов и произведений: {counts}.'
+        )
+        self.check_counters()
+        assert Review.objects.count() == len(titles)
+
+    def test_03_chunks(self, moderator_client, many_reviews, monkeypatch):
+        monkeypatch.setattr(moderation, 'DELETE_CHUNK_SIZE', 5)
+        calls = []
+        delete_chunk = moderation.delete_chunk
+
+        def counting_delete_chunk(model, ids):
+            calls.append(len(ids))
+            return delete_chunk(model, ids)
+
+        monkeypatch.setattr(moderation, 'delete_chunk', counting_delete_chunk)
+        ids = list(Review.objects.values_list('id', flat=True))[:12]
+        data = self.bulk_delete(moderator_client, model='reviews', ids=ids)
+        assert data['deleted'] == 12
+        assert calls == [5, 5, 2], (
+            'Проверьте, что отзывы удаляются пачками по DELETE_CHUNK_SIZE.'
+        )
+        self.check_counters()
+
+    def test_04_delete_comments_by_author(self, moderator_client, user,
+                                          user_client, content):
+        comments, reviews, titles = content
+        review = Review.objects.get(pk=reviews[0]['id'])
+        since = Comment.objects.get(pk=comments[0]['id']).pub_date
+        data = self.bulk_delete(
+            moderator_client, model='comments', author=user.username,
+            since=since.isoformat(),
+        )
+        assert data == {'deleted': 1, 'not_found': []}
+        assert not Comment.objects.filter(author=user).exists()
+        review.refresh_from_db()
+        assert review.comments_count == len(comments) - 1, (
+            'Проверьте, что после массового удаления комментариев счётчик '
+            'комментариев отзыва пересчитывается.'
+        )
+
+    def test_05_access(self, client, user_client, user, content):
+        comments, reviews, titles = content
+        response = client.post(
+            self.BULK_DELETE_URL,
+            data={'model': 'reviews', 'ids': [reviews[0]['id']]},
+            format='json',
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+        own = next(
+            review['id'] for review in reviews
+            if review['author'] == user.username
+        )
+        data = self.bulk_delete(
+            user_client, model='reviews', ids=[reviews[0]['id'], own]
+        )
+        assert data == {'deleted': 1, 'not_found': [reviews[0]['id']]}, (
+            'Проверьте, что пользователь без роли модератора может '
+            'массово удалять только свои отзывы.'
+        )
+        assert Review.objects.filter(pk=reviews[0]['id']).exists()
+
+        for data in (
+            {'model': 'reviews'},
+            {'model': 'titles', 'ids': [1]},
+            {'model': 'reviews', 'ids': []},
+            {'model': 'reviews', 'ids': [10 ** 30]},
+        ):
+            response = user_client.post(
+                self.BULK_DELETE_URL, data=data, format='json'
+            )
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что запрос с данными {data} возвращает '
+                'ответ со статусом 400.'
+            )
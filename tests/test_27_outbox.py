@@ -0,0 +1,199 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+
+from users import outbox
+from users.management.commands import send_emails
+from users.models import OutgoingEmail
+
+
+class FlakyEmailBackend(EmailBackend):
+    """
+    Почтовый бэкенд с ошибками по адресу получателя.
+
+    На fail@ сервер недоступен, на bad@ письмо отклоняется ошибкой, не
+    связанной с соединением, на crash@ отправитель падает целиком.
+    """
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any(to.startswith('fail@') for to in message.to):
+                raise OSError('Сервер недоступен')
+            if any(to.startswith('bad@') for to in message.to):
+                raise ValueError('Неверный заголовок')
+            if any(to.startswith('crash@') for to in message.to):
+                raise KeyboardInterrupt
+        return super().send_messages(messages)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27Outbox:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+
+    @staticmethod
+    def send_emails(*args):
+        call_command('send_emails', '--once', *args, stdout=StringIO())
+
+    def test_01_signup_enqueues(self, client):
+        response = client.post(self.URL_SIGNUP, data={
+            'email': 'queued@yamdb.fake', 'username': 'queued'
+        })
+        assert response.status_code == 200
+        assert mail.outbox == [], (
+            f'Проверьте, что POST-запрос к `{self.URL_SIGNUP}` не ждёт '
+            'почтовый сервер, а ставит письмо в очередь.'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.recipient == 'queued@yamdb.fake'
+        assert email.sent_at is None
+
+        self.send_emails()
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == ['queued@yamdb.fake']
+        assert mail.outbox[0].body == email.body
+        email.refresh_from_db()
+        assert email.sent_at is not None
+        assert email.attempts == 1
+
+        self.send_emails()
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что отправленное письмо не отправляется повторно.'
+        )
+
+    def test_02_enqueue_in_transaction(self, client):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                outbox.enqueue_email('Тема', 'Текст', 'lost@yamdb.fake')
+                raise RuntimeError
+        assert not OutgoingEmail.objects.exists(), (
+            'Проверьте, что письмо не остаётся в очереди, если транзакция '
+            'отменена.'
+        )
+
+    def test_03_batches_share_connection(self, monkeypatch):
+        for number in range(5):
+            outbox.enqueue_email('Тема', 'Текст', f'user{number}@yamdb.fake')
+        connections = []
+        get_connection = send_emails.get_connection
+
+        def counting_get_connection(*args, **kwargs):
+            connections.append(get_connection(*args, **kwargs))
+            return connections[-1]
+
+        monkeypatch.setattr(
+            send_emails, 'get_connection', counting_get_connection
+        )
+        self.send_emails('--batch-size', '2')
+        assert len(mail.outbox) == 5
+        assert len(connections) == 1, (
+            'Проверьте, что все пачки писем отправляются через одно '
+            'соединение с почтовым сервером.'
+        )
+        assert not OutgoingEmail.objects.filter(sent_at__isnull=True).exists()
+
+    def test_04_retry_with_backoff(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_27_outbox.FlakyEmailBackend'
+        outbox.enqueue_email('Тема', 'Текст', 'fail@yamdb.fake')
+        outbox.enqueue_email('Тема', 'Текст', 'ok@yamdb.fake')
+        started = timezone.now()
+        self.send_emails()
+        assert [message.to for message in mail.outbox] == [
+            ['ok@yamdb.fake']
+        ], 'Проверьте, что ошибка одного письма не мешает отправке других.'
+        failed = OutgoingEmail.objects.get(recipient='fail@yamdb.fake')
+        assert failed.sent_at is None
+        assert failed.attempts == 1
+        assert 'Сервер недоступен' in failed.last_error
+        assert failed.next_attempt_at - started >= outbox.RETRY_BASE_DELAY
+
+        self.send_emails()
+        failed.refresh_from_db()
+        assert failed.attempts == 1, (
+            'Проверьте, что письмо не отправляется повторно до истечения '
+            'задержки.'
+        )
+
+        delays = []
+        while failed.next_attempt_at is not None:
+            before = timezone.now()
+            OutgoingEmail.objects.filter(pk=failed.pk).update(
+                next_attempt_at=before - timedelta(seconds=1)
+            )
+            self.send_emails()
+            failed.refresh_from_db()
+            if failed.next_attempt_at is not None:
+                delays.append(failed.next_attempt_at - before)
+        assert failed.attempts == outbox.MAX_ATTEMPTS, (
+            'Проверьте, что после MAX_ATTEMPTS попыток письмо больше не '
+            'отправляется.'
+        )
+        assert len(delays) == outbox.MAX_ATTEMPTS - 2
+        assert all(
+            later > earlier for earlier, later in zip(delays, delays[1:])
+        ), 'Проверьте, что задержка между попытками растёт.'
+        assert len(mail.outbox) == 1
+
+    def test_05_retry_delay(self):
+        assert outbox.retry_delay(1) == outbox.RETRY_BASE_DELAY
+        assert outbox.retry_delay(2) == 2 * outbox.RETRY_BASE_DELAY
+        assert outbox.retry_delay(30) == outbox.RETRY_MAX_DELAY
+
+    def test_06_claimed_once(self, monkeypatch):
+        for number in range(2):
+            outbox.enqueue_email('Тема', 'Текст', f'user{number}@yamdb.fake')
+        # Второй отправитель выбрал те же письма до того, как первый их
+        # захватил.
+        stale = list(outbox.pending_emails())
+        monkeypatch.setattr(
+            outbox, 'pending_emails', lambda now=None: list(stale)
+        )
+        connection = send_emails.get_connection()
+        assert outbox.send_batch(connection) == (2, 0)
+        assert outbox.send_batch(connection) == (0, 0), (
+            'Проверьте, что письмо, захваченное другим отправителем, не '
+            'отправляется повторно.'
+        )
+        assert len(mail.outbox) == 2
+        assert set(
+            OutgoingEmail.objects.values_list('attempts', flat=True)
+        ) == {1}
+
+    def test_07_crash_mid_batch(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_27_outbox.FlakyEmailBackend'
+        outbox.enqueue_email('Тема', 'Текст', 'ok@yamdb.fake')
+        outbox.enqueue_email('Тема', 'Текст', 'crash@yamdb.fake')
+        with pytest.raises(KeyboardInterrupt):
+            self.send_emails()
+        assert OutgoingEmail.objects.get(
+            recipient='ok@yamdb.fake'
+        ).sent_at is not None, (
+            'Проверьте, что письмо отмечается отправленным сразу после '
+            'отправки, а не в конце пачки.'
+        )
+        OutgoingEmail.objects.filter(recipient='crash@yamdb.fake').delete()
+        self.send_emails()
+        assert len(mail.outbox) == 1
+
+    def test_08_other_errors(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_27_outbox.FlakyEmailBackend'
+        outbox.enqueue_email('Тема', 'Текст', 'bad@yamdb.fake')
+        outbox.enqueue_email('Тема', 'Текст', 'ok@yamdb.fake')
+        self.send_emails()
+        bad = OutgoingEmail.objects.get(recipient='bad@yamdb.fake')
+        assert bad.sent_at is None
+        assert bad.attempts == 1
+        assert bad.last_error == 'ValueError: Неверный заголовок', (
+            'Проверьте, что любая ошибка отправки откладывает письмо, '
+            'а не останавливает отправителя.'
+        )
+        assert bad.next_attempt_at is not None
+        assert [message.to for message in mail.outbox] == [
+            ['ok@yamdb.fake']
+        ]
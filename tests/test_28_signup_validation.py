@@ -0,0 +1,58 @@
+from http import HTTPStatus
+
+import pytest
+
+from api.serializers import SignUpSerializer, UserSerializer
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28SignupValidation:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+
+    @pytest.mark.parametrize('data,errors', [
+        ({'username': 'TestUser', 'email': 'testuser@yamdb.fake'}, {}),
+        ({'username': 'new_user', 'email': 'new@yamdb.fake'}, {}),
+        (
+            {'username': 'new_user', 'email': 'testuser@yamdb.fake'},
+            {'email': ['Пользователь с таким email уже зарегистрирован.']},
+        ),
+        (
+            {'username': 'TestUser', 'email': 'new@yamdb.fake'},
+            {'username': ['Этот username уже занят.']},
+        ),
+        (
+            {'username': 'TestModerator', 'email': 'testuser@yamdb.fake'},
+            {'email': ['Пользователь с таким email уже зарегистрирован.']},
+        ),
+    ])
+    def test_01_single_query(self, user, moderator, data, errors,
+                             django_assert_num_queries):
+        serializer = SignUpSerializer(data=data)
+        with django_assert_num_queries(1):
+            is_valid = serializer.is_valid()
+        assert is_valid == (not errors)
+        assert serializer.errors == errors, (
+            'Проверьте, что проверка уникальности email и username '
+            'выполняется одним запросом и возвращает прежние сообщения.'
+        )
+
+    def test_02_partial_update(self, user, moderator):
+        serializer = UserSerializer(
+            user, data={'username': moderator.username}, partial=True
+        )
+        assert not serializer.is_valid()
+        assert 'username' in serializer.errors
+        serializer = UserSerializer(
+            user, data={'first_name': 'Имя'}, partial=True
+        )
+        assert serializer.is_valid(), serializer.errors
+
+    def test_03_repeat_signup(self, client, user):
+        response = client.post(self.URL_SIGNUP, data={
+            'username': user.username, 'email': user.email
+        })
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что повторная регистрация с той же парой username '
+            'и email возвращает ответ со статусом 200.'
+        )
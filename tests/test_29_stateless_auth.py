@@ -0,0 +1,192 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.checks import run_checks
+from django.db.models import F
+from rest_framework.test import APIClient
+
+from api.tokens import RoleAccessToken
+from tests.utils import create_single_review, create_titles
+from users.models import User
+
+
+def claims_client(user):
+    client = APIClient()
+    token = RoleAccessToken.for_user(user)
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29StatelessAuth:
+
+    ME_URL = '/api/v1/users/me/'
+    USERS_URL = '/api/v1/users/'
+    CHANGES_URL = '/api/v1/changes/'
+
+    def test_01_no_user_query(self, admin, django_assert_num_queries):
+        client = claims_client(admin)
+        # Эпоха токенов читается из БД один раз, затем берётся из кэша.
+        with django_assert_num_queries(2):
+            client.get(self.CHANGES_URL)
+        # Пользователь не загружается из БД: только выборка записей.
+        with django_assert_num_queries(1):
+            response = client.get(self.CHANGES_URL)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что права администратора проверяются по клеймам '
+            'токена без загрузки пользователя из БД.'
+        )
+
+    def test_02_me_row_cache(self, user, django_assert_num_queries):
+        client = claims_client(user)
+        # Эпоха токенов и строка пользователя.
+        with django_assert_num_queries(2):
+            response = client.get(self.ME_URL)
+        assert response.json()['username'] == user.username
+        with django_assert_num_queries(0):
+            response = client.get(self.ME_URL)
+        assert response.json()['bio'] == user.bio, (
+            f'Проверьте, что повторный запрос к `{self.ME_URL}` берёт '
+            'строку пользователя из кэша процесса.'
+        )
+        response = client.patch(self.ME_URL, data={'bio': 'новая'})
+        assert response.status_code == HTTPStatus.OK
+        assert client.get(self.ME_URL).json()['bio'] == 'новая', (
+            'Проверьте, что после изменения пользователя кэш строки '
+            'пользователя сбрасывается.'
+        )
+
+    def test_03_role_change_revokes(self, admin_client, admin, user):
+        client = claims_client(user)
+        assert client.get(self.CHANGES_URL).status_code == (
+            HTTPStatus.FORBIDDEN
+        )
+        response = admin_client.patch(
+            f'{self.USERS_URL}{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert client.get(self.ME_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что после смены роли токен с прежней ролью '
+            'перестаёт приниматься.'
+        )
+        user.refresh_from_db()
+        assert claims_client(user).get(self.CHANGES_URL).status_code == (
+            HTTPStatus.OK
+        )
+
+        client = claims_client(user)
+        user.bio = 'без смены роли'
+        user.save()
+        assert client.get(self.ME_URL).status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение полей, кроме роли и статуса, не '
+            'отзывает токены.'
+        )
+        user.is_superuser = True
+        user.save(update_fields=['is_superuser'])
+        assert client.get(self.ME_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+
+    def test_04_deleted_user(self, admin_client, user):
+        client = claims_client(user)
+        assert client.get(self.ME_URL).status_code == HTTPStatus.OK
+        admin_client.delete(f'{self.USERS_URL}{user.username}/')
+        assert client.get(self.ME_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что токен удалённого пользователя не принимается.'
+
+    def test_05_author_from_claims(self, admin_client, user):
+        titles, _, _ = create_titles(admin_client)
+        client = claims_client(user)
+        response = create_single_review(
+            client, titles[0]['id'], 'Отзыв', 5
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['author'] == user.username
+        assert user.reviews.count() == 1
+
+    def test_06_state_expires(self, settings, user):
+        # Состояние не задерживается в кэше: каждый запрос видит эпоху
+        # из БД, как процесс, у которого истёк AUTH_STATE_TIMEOUT.
+        settings.AUTH_STATE_TIMEOUT = 0
+        client = claims_client(user)
+        assert client.get(self.ME_URL).status_code == HTTPStatus.OK
+        # Смена роли в другом процессе не трогает кэш этого процесса.
+        User.objects.filter(pk=user.pk).update(
+            token_epoch=F('token_epoch') + 1
+        )
+        assert client.get(self.ME_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что состояние токенов в кэше живёт ограниченное '
+            'время и затем перечитывается из БД.'
+        )
+
+    def test_07_atomic_epoch(self, user):
+        first = User.objects.get(pk=user.pk)
+        second = User.objects.get(pk=user.pk)
+        first.role = User.MODERATOR
+        first.save()
+        second.is_active = False
+        second.save(update_fields=['is_active'])
+        user.refresh_from_db()
+        assert user.token_epoch == 2, (
+            'Проверьте, что одновременные изменения роли не теряют '
+            'подъём эпохи токенов.'
+        )
+        assert second.token_epoch == 2
+
+    def test_08_cache_check(self, settings, tmp_path):
+        def warnings():
+            return [
+                message.id
+                for message in run_checks(
+                    tags=['caches'], include_deployment_checks=True
+                )
+            ]
+
+        assert 'api.W001' not in [
+            message.id for message in run_checks(tags=['caches'])
+        ], (
+            'Проверьте, что о локальном кэше предупреждает только '
+            '`check --deploy`.'
+        )
+        assert 'api.W001' in warnings(), (
+            'Проверьте, что проверка системы предупреждает о кэше, '
+            'локальном для процесса.'
+        )
+        settings.CACHES = {
+            **settings.CACHES,
+            'shared': {
+                'BACKEND': (
+                    'django.core.cache.backends.filebased.FileBasedCache'
+                ),
+                'LOCATION': str(tmp_path),
+            },
+        }
+        settings.API_CACHE_ALIAS = 'shared'
+        assert 'api.W001' not in warnings()
+
+    def test_09_inactive_user(self, client, user):
+        token_client = claims_client(user)
+        assert token_client.get(self.ME_URL).status_code == HTTPStatus.OK
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        cache.clear()
+        assert token_client.get(self.ME_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что токен заблокированного пользователя не '
+            'принимается.'
+        )
+        user.refresh_from_db()
+        response = client.post('/api/v1/auth/token/', data={
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что заблокированный пользователь не получает токен.'
+        )
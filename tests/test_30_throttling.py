@@ -0,0 +1,161 @@
+import json
+import logging
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from rest_framework.test import APIClient
+
+from api import throttling
+from users.models import User
+
+
+@pytest.fixture
+def throttle_rates(settings):
+    def set_rates(**rates):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': rates,
+        }
+    return set_rates
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [60 * 1000.0]
+    monkeypatch.setattr(
+        throttling.SlidingWindowThrottle, 'timer', lambda self: now[0]
+    )
+    return now
+
+
+@pytest.mark.django_db(transaction=True)
+class Test30Throttling:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    URL_TOKEN = '/api/v1/auth/token/'
+
+    @staticmethod
+    def signup(client, number, **extra):
+        return client.post('/api/v1/auth/signup/', data={
+            'username': f'user{number}', 'email': f'user{number}@yamdb.fake'
+        }, **extra)
+
+    def test_01_ip_limit(self, client, throttle_rates, clock,
+                         django_assert_num_queries):
+        throttle_rates(signup_ip='3/min')
+        for number in range(3):
+            assert self.signup(client, number).status_code == HTTPStatus.OK
+        with django_assert_num_queries(0):
+            response = self.signup(client, 3)
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что POST-запросы к `{self.URL_SIGNUP}` сверх '
+            'лимита с одного IP отклоняются до запросов к БД.'
+        )
+        assert int(response['Retry-After']) > 0
+        assert not User.objects.filter(username='user3').exists()
+        response = self.signup(client, 3, REMOTE_ADDR='10.0.0.2')
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что лимит считается отдельно для каждого IP.'
+        )
+
+    def test_02_username_limit(self, client, throttle_rates, clock):
+        throttle_rates(signup_username='2/min')
+        for number in range(2):
+            response = self.signup(
+                client, 0, REMOTE_ADDR=f'10.0.0.{number + 1}'
+            )
+            assert response.status_code == HTTPStatus.OK
+        response = self.signup(client, 0, REMOTE_ADDR='10.0.0.9')
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что повторные запросы с одним username '
+            'ограничиваются независимо от IP.'
+        )
+        assert self.signup(client, 1).status_code == HTTPStatus.OK
+
+    def test_03_sliding_window(self, client, throttle_rates, clock):
+        throttle_rates(signup_ip='4/min')
+        clock[0] += 30
+        statuses = [
+            self.signup(client, number).status_code for number in range(5)
+        ]
+        assert statuses == [HTTPStatus.OK] * 4 + [
+            HTTPStatus.TOO_MANY_REQUESTS
+        ]
+        # Середина следующего окна: половина запросов прошлого окна ещё
+        # учитывается, поэтому свободно только два места.
+        clock[0] += 60
+        statuses = [
+            self.signup(client, number).status_code
+            for number in range(5, 8)
+        ]
+        assert statuses == [HTTPStatus.OK] * 2 + [
+            HTTPStatus.TOO_MANY_REQUESTS
+        ], (
+            'Проверьте, что лимит считается по скользящему окну: запросы '
+            'предыдущего окна учитываются пропорционально.'
+        )
+        clock[0] += 120
+        assert self.signup(client, 8).status_code == HTTPStatus.OK
+
+    def test_04_token_bruteforce(self, client, user, throttle_rates, clock):
+        throttle_rates(token_username='3/min')
+        for _ in range(3):
+            response = client.post(self.URL_TOKEN, data={
+                'username': user.username, 'confirmation_code': 'wrong'
+            })
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = client.post(self.URL_TOKEN, data={
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        })
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что подбор кода подтверждения через '
+            f'`{self.URL_TOKEN}` ограничивается по username.'
+        )
+
+    def test_05_metrics(self, client, throttle_rates, clock, caplog,
+                        monkeypatch):
+        throttle_rates(signup_ip='1/min')
+        monkeypatch.setattr(throttling.logger, 'propagate', True)
+        self.signup(client, 0)
+        with caplog.at_level(logging.WARNING, logger='api.throttling'):
+            for number in range(1, 3):
+                self.signup(client, number)
+        assert throttling.get_rejection_counts('signup_ip', 'token_ip') == {
+            'signup_ip': 2, 'token_ip': 0
+        }, 'Проверьте, что отказы считаются по областям ограничения.'
+        records = [
+            record for record in caplog.records
+            if record.name == 'api.throttling'
+        ]
+        assert records, (
+            'Проверьте, что отказы пишутся в логгер `api.throttling`.'
+        )
+        data = json.loads(records[-1].getMessage())
+        assert (data['scope'], data['path']) == (
+            'signup_ip', self.URL_SIGNUP
+        )
+        assert data['wait'] > 0
+
+    def test_06_default_rates(self, client):
+        statuses = [
+            self.signup(client, number).status_code for number in range(11)
+        ]
+        assert HTTPStatus.TOO_MANY_REQUESTS in statuses, (
+            f'Проверьте, что `{self.URL_SIGNUP}` ограничен по умолчанию.'
+        )
+        other = APIClient(REMOTE_ADDR='10.0.0.5')
+        assert self.signup(other, 20).status_code == HTTPStatus.OK
+
+    @pytest.mark.parametrize('url', [
+        '/api/v1/auth/signup/', '/api/v1/auth/token/'
+    ])
+    def test_07_non_object_body(self, client, url):
+        response = client.post(
+            url, data='[1, 2]', content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что POST-запрос к `{url}` с телом не в виде '
+            'объекта возвращает ответ со статусом 400.'
+        )
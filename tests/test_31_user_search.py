@@ -0,0 +1,90 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.test_20_query_plans import FULL_SCAN, explain
+from users.models import User
+from users.search import search_users
+
+
+@pytest.mark.django_db(transaction=True)
+class Test31UserSearch:
+
+    USERS_URL = '/api/v1/users/'
+
+    def search(self, client, **params):
+        response = client.get(self.USERS_URL, data=params)
+        assert response.status_code == HTTPStatus.OK
+        return [user['username'] for user in response.json()['results']]
+
+    def test_01_prefix(self, admin_client, admin, user, moderator):
+        assert self.search(admin_client, search='testu') == [user.username]
+        assert self.search(admin_client, search='TESTMODER@') == [
+            moderator.username
+        ], (
+            'Проверьте, что поиск пользователей ищет по началу username и '
+            'email без учёта регистра.'
+        )
+        assert self.search(admin_client, search='test') == sorted(
+            [admin.username, moderator.username, user.username]
+        )
+        assert self.search(admin_client, search='admin') == []
+        assert self.search(admin_client, search='%') == []
+        assert self.search(admin_client, search='_est') == []
+
+    def test_02_contains(self, admin_client, admin):
+        assert self.search(
+            admin_client, search='admin', search_mode='contains'
+        ) == [admin.username], (
+            'Проверьте, что поиск по подстроке доступен с параметром '
+            '`search_mode=contains`.'
+        )
+        response = admin_client.get(
+            self.USERS_URL, data={'search': 'a', 'search_mode': 'regex'}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'search_mode' in response.json()
+
+    def test_03_query_plan(self, admin_client, admin, user):
+        with CaptureQueriesContext(connection) as context:
+            assert self.search(admin_client, search='TestU') == [
+                user.username
+            ]
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "users_user"' in query['sql']
+            and 'LOWER' in query['sql']
+        ]
+        assert queries, 'Запрос поиска пользователей не найден.'
+        for sql in queries:
+            plan = explain(sql)
+            assert not [step for step in plan if FULL_SCAN.match(step)], (
+                'Проверьте, что поиск по началу username и email читает '
+                'функциональные индексы, а не всю таблицу.\n'
+                + '\n'.join(plan)
+            )
+            assert any('lower_idx' in step for step in plan)
+
+    def test_04_range_edges(self, admin):
+        User.objects.create(username='a\ud7ffb', email='edge@yamdb.fake')
+        User.objects.create(username='a\ue000', email='after@yamdb.fake')
+        assert list(
+            search_users(User.objects.all(), 'a\ud7ff').values_list(
+                'email', flat=True
+            )
+        ) == ['edge@yamdb.fake'], (
+            'Проверьте, что поиск по префиксу, после последнего символа '
+            'которого идут суррогаты, не выходит за пределы префикса.'
+        )
+
+    def test_05_other_databases(self, admin, user, monkeypatch):
+        monkeypatch.setattr(connection, 'vendor', 'postgresql')
+        queryset = search_users(User.objects.all(), user.username.upper())
+        assert 'LOWER' not in str(queryset.query), (
+            'Проверьте, что вне SQLite поиск по префиксу не полагается на '
+            'побайтовое сравнение строк.'
+        )
+        assert list(queryset) == [user]
@@ -0,0 +1,138 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.views import BaseCommentReviewViewSet
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+TITLE_URL = '/api/v1/titles/{title}/'
+REVIEWS_URL = TITLE_URL + 'reviews/'
+REVIEW_URL = REVIEWS_URL + '{review}/'
+COMMENTS_URL = REVIEW_URL + 'comments/'
+COMMENT_URL = COMMENTS_URL + '{comment}/'
+
+# Сколько запросов к БД экономит маршрут по сравнению с загрузкой
+# родителя перед каждым запросом.
+SAVINGS = {
+    'GET reviews': 1,
+    'GET reviews, нет отзывов': 0,
+    'GET reviews, нет произведения': -2,
+    'GET review': 1,
+    'PATCH review': 1,
+    'GET comments': 1,
+    'GET comment': 1,
+    'POST comment': 0,
+    'PATCH comment': 1,
+    'DELETE comment': 1,
+    'DELETE review': 1,
+    'POST review': 0,
+}
+
+
+def measure(prefix, count=5):
+    """Число запросов к БД на каждом вложенном маршруте."""
+    users = User.objects.bulk_create(
+        User(username=f'{prefix}{number}', email=f'{prefix}{number}@y.fake')
+        for number in range(count + 1)
+    )
+    author, *others = users
+    title = Title.objects.create(
+        name='Произведение',
+        year=2000,
+        description='',
+        category=Category.objects.create(name=prefix, slug=prefix),
+    )
+    title.genre.add(Genre.objects.create(name=prefix, slug=prefix))
+    empty_title = Title.objects.create(name='Пусто', year=2000)
+    for user in others:
+        Review.objects.create(author=user, title=title, text='', score=5)
+    review = Review.objects.create(
+        author=author, title=title, text='', score=5
+    )
+    for user in others:
+        Comment.objects.create(author=user, review=review, text='')
+    comment = Comment.objects.create(author=author, review=review, text='')
+
+    client = APIClient()
+    client.force_authenticate(author)
+    ids = {'title': title.pk, 'review': review.pk, 'comment': comment.pk}
+    routes = (
+        ('GET reviews', 'get', REVIEWS_URL.format(**ids), {}),
+        (
+            'GET reviews, нет отзывов',
+            'get',
+            REVIEWS_URL.format(title=empty_title.pk),
+            {},
+        ),
+        ('GET reviews, нет произведения', 'get',
+         REVIEWS_URL.format(title=10 ** 6), {}),
+        ('GET review', 'get', REVIEW_URL.format(**ids), {}),
+        ('PATCH review', 'patch', REVIEW_URL.format(**ids), {'text': 'A'}),
+        ('GET comments', 'get', COMMENTS_URL.format(**ids), {}),
+        ('GET comment', 'get', COMMENT_URL.format(**ids), {}),
+        ('POST comment', 'post', COMMENTS_URL.format(**ids), {'text': 'A'}),
+        ('PATCH comment', 'patch', COMMENT_URL.format(**ids),
+         {'text': 'A'}),
+        ('DELETE comment', 'delete', COMMENT_URL.format(**ids), {}),
+        ('DELETE review', 'delete', REVIEW_URL.format(**ids), {}),
+        ('POST review', 'post', REVIEWS_URL.format(**ids),
+         {'text': 'A', 'score': 5}),
+    )
+    results = {}
+    for route, method, url, data in routes:
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(client, method)(url, data=data, format='json')
+        assert response.status_code < 500
+        results[route] = len(context)
+    cache.clear()
+    return results
+
+
+@pytest.mark.django_db(transaction=True)
+class Test32NestedRoutes:
+
+    def test_01_parent_lookups(self, monkeypatch):
+        after = measure('after')
+        get_queryset = BaseCommentReviewViewSet.get_queryset
+
+        def load_parent_first(view):
+            view.get_parent()
+            return get_queryset(view)
+
+        monkeypatch.setattr(
+            BaseCommentReviewViewSet, 'get_queryset', load_parent_first
+        )
+        before = measure('before')
+        savings = {route: before[route] - after[route] for route in after}
+        assert savings == SAVINGS, (
+            'Проверьте, что вложенные маршруты отзывов и комментариев не '
+            'загружают родителя отдельным запросом.\n'
+            f'До: {before}\nПосле: {after}'
+        )
+
+    def test_02_parent_ids_out_of_range(self, client):
+        title = Title.objects.create(name='Произведение', year=2000)
+        author = User.objects.create(username='author', email='a@y.fake')
+        review = Review.objects.create(
+            author=author, title=title, text='', score=5
+        )
+        comment = Comment.objects.create(author=author, review=review, text='')
+        huge_id = 10 ** 30
+        for url in (
+            REVIEWS_URL.format(title=huge_id),
+            REVIEW_URL.format(title=huge_id, review=review.pk),
+            COMMENTS_URL.format(title=title.pk, review=huge_id),
+            COMMENTS_URL.format(title=huge_id, review=review.pk),
+            COMMENT_URL.format(
+                title=title.pk, review=huge_id, comment=comment.pk
+            ),
+        ):
+            assert client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+                'Проверьте, что идентификатор родителя вне диапазона '
+                f'первичного ключа в `{url}` даёт ответ со статусом 404.'
+            )
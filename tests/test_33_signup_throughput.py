@@ -0,0 +1,61 @@
+import os
+import time
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from users.models import User
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+SIGNUPS = 40
+# Запросов к БД на новую и повторную регистрацию.
+QUERIES = {'новая': 8, 'повторная': 5}
+
+
+def signup(client, name):
+    return client.post(
+        SIGNUP_URL, data={'username': name, 'email': f'{name}@yamdb.fake'}
+    ).status_code
+
+
+@pytest.mark.django_db(transaction=True)
+class Test33SignupThroughput:
+
+    @pytest.fixture(autouse=True)
+    def no_throttling(self, settings):
+        # Все запросы идут с одного адреса.
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {},
+        }
+
+    def test_01_queries(self):
+        client = APIClient()
+        data = {'username': 'bench', 'email': 'bench@yamdb.fake'}
+        counts = {}
+        for label in QUERIES:
+            with CaptureQueriesContext(connection) as context:
+                response = client.post(SIGNUP_URL, data=data)
+            assert response.status_code == HTTPStatus.OK
+            counts[label] = len(context)
+        assert counts == QUERIES, (
+            'Проверьте число запросов к БД при регистрации.'
+        )
+
+    @pytest.mark.skipif(
+        not os.environ.get('YAMDB_BENCHMARK'),
+        reason='Замер скорости включается переменной YAMDB_BENCHMARK=1.',
+    )
+    def test_02_throughput(self, record_property):
+        client = APIClient()
+        names = [f'bench-{number}' for number in range(SIGNUPS)]
+        for label in ('новые', 'повторные'):
+            started = time.perf_counter()
+            statuses = [signup(client, name) for name in names]
+            rate = len(names) / (time.perf_counter() - started)
+            record_property(f'signups_per_second ({label})', round(rate))
+            assert statuses == [HTTPStatus.OK] * len(names)
+        assert User.objects.count() == len(names)